@@ -0,0 +1,35 @@
+-- Set-based cleaning (PostgreSQL) that can't happen row by row at load time.
+-- Row-level fixes are in ../../cleaning_spec.json and applied by the loader;
+-- the pipeline runs this file instead of 03_cleaning.sql with --cleaning spec.
+
+-- 0) Remember which prices get imputed, so refresh_incremental.sql can
+--    recompute them when new order items arrive for the same products
+DROP TABLE IF EXISTS _imputed_product_prices;
+CREATE TABLE _imputed_product_prices (product_id INT PRIMARY KEY);
+INSERT INTO _imputed_product_prices
+SELECT product_id FROM products WHERE unit_price IS NULL;
+
+DROP TABLE IF EXISTS _imputed_item_prices;
+CREATE TABLE _imputed_item_prices (order_item_id INT PRIMARY KEY, product_id INT NOT NULL);
+INSERT INTO _imputed_item_prices
+SELECT order_item_id, product_id FROM order_items WHERE unit_price IS NULL;
+CREATE INDEX idx_imputed_item_prices_product ON _imputed_item_prices(product_id);
+
+-- 1) Infer missing product prices from order_items
+UPDATE products p
+SET unit_price = sub.avg_price
+FROM (
+  SELECT product_id, AVG(unit_price) AS avg_price
+  FROM order_items
+  WHERE unit_price IS NOT NULL
+  GROUP BY 1
+) sub
+WHERE p.product_id = sub.product_id
+  AND p.unit_price IS NULL;
+
+-- 2) Fill missing order item price from products (discounts were defaulted at load)
+UPDATE order_items oi
+SET unit_price = p.unit_price
+FROM products p
+WHERE oi.product_id = p.product_id
+  AND oi.unit_price IS NULL;
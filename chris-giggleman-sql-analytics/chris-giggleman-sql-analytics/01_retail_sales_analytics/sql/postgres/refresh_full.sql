@@ -0,0 +1,33 @@
+-- Marts rebuilt from scratch after a full load (PostgreSQL).
+-- refresh_incremental.sql keeps them current after incremental loads.
+
+-- v_order_totals, stored: one row per order
+DROP TABLE IF EXISTS mart_order_totals;
+
+CREATE TABLE mart_order_totals (
+  order_id      INT PRIMARY KEY,
+  customer_id   INT NOT NULL,
+  order_date    DATE NOT NULL,
+  status        TEXT NOT NULL,
+  channel       TEXT NOT NULL,
+  item_revenue  NUMERIC,
+  shipping_cost NUMERIC(10,2),
+  gross_revenue NUMERIC
+);
+
+INSERT INTO mart_order_totals
+SELECT
+  o.order_id,
+  o.customer_id,
+  o.order_date,
+  o.status,
+  o.channel,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) AS item_revenue,
+  o.shipping_cost,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) + o.shipping_cost AS gross_revenue
+FROM orders o
+JOIN order_items oi ON oi.order_id = o.order_id
+GROUP BY o.order_id;
+
+CREATE INDEX idx_mart_order_totals_customer ON mart_order_totals(customer_id);
+CREATE INDEX idx_mart_order_totals_date ON mart_order_totals(order_date);
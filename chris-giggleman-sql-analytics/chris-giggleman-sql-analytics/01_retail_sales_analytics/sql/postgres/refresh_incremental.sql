@@ -0,0 +1,77 @@
+-- Incremental refresh (PostgreSQL), run instead of cleaning_post_load.sql
+-- after an incremental load. Rows above _pipeline_watermarks.previous_value
+-- were just loaded (and row-cleaned by the loader); only what they touch is redone.
+
+-- 1) New rows with missing prices join the imputed sets
+INSERT INTO _imputed_product_prices
+SELECT product_id FROM products WHERE unit_price IS NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO _imputed_item_prices
+SELECT order_item_id, product_id FROM order_items WHERE unit_price IS NULL
+ON CONFLICT DO NOTHING;
+
+-- 2) Imputed products whose average can move: new items sold, or still unpriced
+CREATE TEMP TABLE affected_products ON COMMIT DROP AS
+SELECT ip.product_id
+FROM _imputed_product_prices ip
+WHERE ip.product_id IN (
+        SELECT product_id FROM order_items
+        WHERE order_id > (SELECT previous_value::int FROM _pipeline_watermarks WHERE table_name = 'order_items')
+      )
+   OR ip.product_id IN (SELECT product_id FROM products WHERE unit_price IS NULL);
+
+-- 3) Re-infer their price from observed (never imputed) item prices, as a full build would
+UPDATE products p
+SET unit_price = sub.avg_price
+FROM (
+  SELECT ap.product_id, AVG(oi.unit_price) AS avg_price
+  FROM affected_products ap
+  LEFT JOIN order_items oi
+    ON oi.product_id = ap.product_id
+   AND oi.unit_price IS NOT NULL
+   AND NOT EXISTS (SELECT 1 FROM _imputed_item_prices ii WHERE ii.order_item_id = oi.order_item_id)
+  GROUP BY 1
+) sub
+WHERE p.product_id = sub.product_id;
+
+-- 4) Refill imputed item prices of those products, plus new missing ones
+--    (only rows whose price actually changes, so nothing downstream goes stale)
+UPDATE order_items oi
+SET unit_price = p.unit_price
+FROM products p
+WHERE oi.product_id = p.product_id
+  AND (oi.unit_price IS NULL
+       OR oi.order_item_id IN (
+            SELECT order_item_id FROM _imputed_item_prices
+            WHERE product_id IN (SELECT product_id FROM affected_products)
+          ))
+  AND oi.unit_price IS DISTINCT FROM p.unit_price;
+
+-- 5) Orders whose totals changed: new orders and orders holding refilled items
+CREATE TEMP TABLE affected_orders ON COMMIT DROP AS
+SELECT order_id FROM orders
+WHERE order_id > (SELECT previous_value::int FROM _pipeline_watermarks WHERE table_name = 'orders')
+UNION
+SELECT oi.order_id
+FROM _imputed_item_prices ii
+JOIN order_items oi ON oi.order_item_id = ii.order_item_id
+WHERE ii.product_id IN (SELECT product_id FROM affected_products);
+
+DELETE FROM mart_order_totals
+WHERE order_id IN (SELECT order_id FROM affected_orders);
+
+INSERT INTO mart_order_totals
+SELECT
+  o.order_id,
+  o.customer_id,
+  o.order_date,
+  o.status,
+  o.channel,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) AS item_revenue,
+  o.shipping_cost,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) + o.shipping_cost AS gross_revenue
+FROM orders o
+JOIN order_items oi ON oi.order_id = o.order_id
+WHERE o.order_id IN (SELECT order_id FROM affected_orders)
+GROUP BY o.order_id;
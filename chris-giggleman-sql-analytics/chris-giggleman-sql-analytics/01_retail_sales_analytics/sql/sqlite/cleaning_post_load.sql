@@ -0,0 +1,32 @@
+-- Set-based cleaning (SQLite) that can't happen row by row at load time.
+-- Row-level fixes (trim, blanks -> NULL, shipping/discount defaults) are in
+-- ../../cleaning_spec.json and applied by the loader; the pipeline runs this
+-- file instead of 03_cleaning.sql with --cleaning spec.
+
+-- 0) Remember which prices get imputed, so refresh_incremental.sql can
+--    recompute them when new order items arrive for the same products
+DROP TABLE IF EXISTS _imputed_product_prices;
+CREATE TABLE _imputed_product_prices (product_id INTEGER PRIMARY KEY);
+INSERT INTO _imputed_product_prices
+SELECT product_id FROM products WHERE unit_price IS NULL;
+
+DROP TABLE IF EXISTS _imputed_item_prices;
+CREATE TABLE _imputed_item_prices (order_item_id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL);
+INSERT INTO _imputed_item_prices
+SELECT order_item_id, product_id FROM order_items WHERE unit_price IS NULL;
+CREATE INDEX idx_imputed_item_prices_product ON _imputed_item_prices(product_id);
+
+-- 1) Infer missing product prices from order_items (idx_order_items_product)
+UPDATE products
+SET unit_price = (
+  SELECT AVG(oi.unit_price)
+  FROM order_items oi
+  WHERE oi.product_id = products.product_id
+    AND oi.unit_price IS NOT NULL
+)
+WHERE unit_price IS NULL;
+
+-- 2) Fill missing order item unit_price from products (primary key lookup)
+UPDATE order_items
+SET unit_price = (SELECT p.unit_price FROM products p WHERE p.product_id = order_items.product_id)
+WHERE unit_price IS NULL;
@@ -0,0 +1,19 @@
+-- Index migration (SQLite) for 01_retail_sales_analytics
+-- Proposed by utils/pipeline/index_advisor.py, then reviewed. Each index was trialled
+-- alone and kept only if it made the 04_analysis / 05_views / 06_tests queries faster.
+-- Trial data: order_items 600,441, orders 200,000, products 8,000 rows
+-- Workload (10 queries): 11% faster
+
+-- orders(status)
+--   04_analysis:4: 69% faster  [SCAN o USING INDEX ix_orders_status]
+CREATE INDEX IF NOT EXISTS ix_orders_status ON orders (status);
+
+-- Rejected:
+--   order_items(discount): no plan change
+--   order_items(order_id, product_id): no plan change
+--   order_items(product_id, order_id): no plan change
+--   order_items(unit_price): no plan change
+--   orders(channel): no plan change
+--   orders(order_date): no query 10% faster
+--   orders(order_id, status): no gain next to the kept indexes
+--   orders(shipping_cost): no query 10% faster
@@ -0,0 +1,77 @@
+-- Incremental refresh (SQLite), run instead of cleaning_post_load.sql after
+-- an incremental load. Rows above _pipeline_watermarks.previous_value were
+-- just loaded (and row-cleaned by the loader); only what they touch is redone.
+
+-- 1) New rows with missing prices join the imputed sets
+INSERT OR IGNORE INTO _imputed_product_prices
+SELECT product_id FROM products WHERE unit_price IS NULL;
+
+INSERT OR IGNORE INTO _imputed_item_prices
+SELECT order_item_id, product_id FROM order_items WHERE unit_price IS NULL;
+
+-- 2) Imputed products whose average can move: new items sold, or still unpriced
+DROP TABLE IF EXISTS temp.affected_products;
+
+CREATE TEMP TABLE affected_products AS
+SELECT ip.product_id
+FROM _imputed_product_prices ip
+WHERE ip.product_id IN (
+        SELECT product_id FROM order_items
+        WHERE order_id > (SELECT previous_value FROM _pipeline_watermarks WHERE table_name = 'order_items')
+      )
+   OR ip.product_id IN (SELECT product_id FROM products WHERE unit_price IS NULL);
+
+-- 3) Re-infer their price from observed (never imputed) item prices, as a full build would
+UPDATE products
+SET unit_price = (
+  SELECT AVG(oi.unit_price)
+  FROM order_items oi
+  WHERE oi.product_id = products.product_id
+    AND oi.unit_price IS NOT NULL
+    AND oi.order_item_id NOT IN (SELECT order_item_id FROM _imputed_item_prices)
+)
+WHERE product_id IN (SELECT product_id FROM temp.affected_products);
+
+-- 4) Refill imputed item prices of those products, plus new missing ones
+--    (only rows whose price actually changes, so nothing downstream goes stale)
+UPDATE order_items
+SET unit_price = (SELECT p.unit_price FROM products p WHERE p.product_id = order_items.product_id)
+WHERE (unit_price IS NULL
+       OR order_item_id IN (
+            SELECT order_item_id FROM _imputed_item_prices
+            WHERE product_id IN (SELECT product_id FROM temp.affected_products)
+          ))
+  AND unit_price IS NOT (SELECT p.unit_price FROM products p WHERE p.product_id = order_items.product_id);
+
+-- 5) Orders whose totals changed: new orders and orders holding refilled items
+DROP TABLE IF EXISTS temp.affected_orders;
+
+CREATE TEMP TABLE affected_orders AS
+SELECT order_id FROM orders
+WHERE order_id > (SELECT previous_value FROM _pipeline_watermarks WHERE table_name = 'orders')
+UNION
+SELECT oi.order_id
+FROM _imputed_item_prices ii
+JOIN order_items oi ON oi.order_item_id = ii.order_item_id
+WHERE ii.product_id IN (SELECT product_id FROM temp.affected_products);
+
+DELETE FROM mart_order_totals
+WHERE order_id IN (SELECT order_id FROM temp.affected_orders);
+
+INSERT INTO mart_order_totals
+SELECT
+  o.order_id,
+  o.customer_id,
+  o.order_date,
+  o.status,
+  o.channel,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) AS item_revenue,
+  o.shipping_cost,
+  SUM(oi.quantity * (oi.unit_price - oi.discount)) + o.shipping_cost AS gross_revenue
+FROM orders o
+JOIN order_items oi ON oi.order_id = o.order_id
+WHERE o.order_id IN (SELECT order_id FROM temp.affected_orders)
+GROUP BY o.order_id;
+
+DROP TABLE temp.affected_orders;
+DROP TABLE temp.affected_products;
@@ -0,0 +1,19 @@
+-- Set-based cleaning (PostgreSQL) that can't happen row by row at load time.
+-- Trim/blank/department normalization is in ../../cleaning_spec.json and
+-- applied by the loader; the pipeline runs this file instead of
+-- 03_cleaning.sql with --cleaning spec.
+
+-- Impute missing salary with department median
+WITH med AS (
+  SELECT
+    department,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY salary) AS median_salary
+  FROM employees
+  WHERE salary IS NOT NULL
+  GROUP BY 1
+)
+UPDATE employees e
+SET salary = med.median_salary::INT
+FROM med
+WHERE e.department = med.department
+  AND e.salary IS NULL;
@@ -19,7 +19,7 @@ UPDATE employees SET salary = NULL WHERE salary = '';
 
 -- Impute missing salary with department median approximation (fallback to avg)
 -- SQLite doesn't have MEDIAN built-in; use AVG by dept as a simple, explainable rule.
-UPDATE employees e
+UPDATE employees AS e
 SET salary = (
   SELECT CAST(AVG(salary) AS INT)
   FROM employees
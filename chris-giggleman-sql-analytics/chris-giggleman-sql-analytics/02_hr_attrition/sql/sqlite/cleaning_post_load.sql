@@ -0,0 +1,17 @@
+-- Set-based cleaning (SQLite) that can't happen row by row at load time.
+-- Trim/blank/department normalization is in ../../cleaning_spec.json and
+-- applied by the loader; the pipeline runs this file instead of
+-- 03_cleaning.sql with --cleaning spec.
+
+-- Impute missing salary with the department average, computed once per
+-- department instead of once per missing row
+UPDATE employees
+SET salary = d.avg_salary
+FROM (
+  SELECT department, CAST(AVG(salary) AS INT) AS avg_salary
+  FROM employees
+  WHERE salary IS NOT NULL
+  GROUP BY department
+) AS d
+WHERE employees.department = d.department
+  AND employees.salary IS NULL;
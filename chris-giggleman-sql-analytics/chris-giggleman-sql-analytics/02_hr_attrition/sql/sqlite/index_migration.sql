@@ -0,0 +1,16 @@
+-- Index migration (SQLite) for 02_hr_attrition
+-- Proposed by utils/pipeline/index_advisor.py, then reviewed. Each index was trialled
+-- alone and kept only if it made the 04_analysis / 05_views / 06_tests queries faster.
+-- Trial data: employees 40,000 rows
+-- Workload (9 queries): 12% faster
+
+-- employees(department, salary)
+--   04_analysis:63: 89% faster  [SCAN employees USING COVERING INDEX ix_employees_department_salary]
+CREATE INDEX IF NOT EXISTS ix_employees_department_salary ON employees (department, salary);
+
+-- Rejected:
+--   employees(hire_date): no plan change
+--   employees(performance_rating): no plan change
+--   employees(role): slower overall
+--   employees(salary): no plan change
+--   employees(termination_date): no plan change
@@ -0,0 +1,33 @@
+-- Marts rebuilt from scratch after a full load (PostgreSQL).
+-- refresh_incremental.sql keeps them current after incremental loads.
+
+-- No-show counts per appointment day, clinic, provider and lead-time bucket;
+-- the clinic/provider and lead-bucket reports in 04_analysis roll these up.
+DROP TABLE IF EXISTS mart_appointments_daily;
+
+CREATE TABLE mart_appointments_daily (
+  appointment_date DATE NOT NULL,
+  clinic           TEXT NOT NULL,
+  provider         TEXT,
+  lead_bucket      TEXT NOT NULL,
+  total            INT NOT NULL,
+  noshows          INT NOT NULL
+);
+
+INSERT INTO mart_appointments_daily
+SELECT
+  appointment_at AS appointment_date,
+  clinic,
+  provider,
+  CASE
+    WHEN (appointment_at - booked_at) <= 1 THEN '0-1 days'
+    WHEN (appointment_at - booked_at) <= 7 THEN '2-7 days'
+    WHEN (appointment_at - booked_at) <= 14 THEN '8-14 days'
+    ELSE '15+ days'
+  END AS lead_bucket,
+  COUNT(*) AS total,
+  SUM(CASE WHEN status = 'NoShow' THEN 1 ELSE 0 END) AS noshows
+FROM appointments
+GROUP BY 1,2,3,4;
+
+CREATE INDEX idx_mart_appointments_daily_date ON mart_appointments_daily(appointment_date);
@@ -0,0 +1,27 @@
+-- Incremental refresh (PostgreSQL) after an incremental load: only the
+-- appointment days that received new rows are recounted.
+
+CREATE TEMP TABLE touched_days ON COMMIT DROP AS
+SELECT DISTINCT appointment_at AS appointment_date
+FROM appointments
+WHERE appointment_id > (SELECT previous_value::int FROM _pipeline_watermarks WHERE table_name = 'appointments');
+
+DELETE FROM mart_appointments_daily
+WHERE appointment_date IN (SELECT appointment_date FROM touched_days);
+
+INSERT INTO mart_appointments_daily
+SELECT
+  appointment_at AS appointment_date,
+  clinic,
+  provider,
+  CASE
+    WHEN (appointment_at - booked_at) <= 1 THEN '0-1 days'
+    WHEN (appointment_at - booked_at) <= 7 THEN '2-7 days'
+    WHEN (appointment_at - booked_at) <= 14 THEN '8-14 days'
+    ELSE '15+ days'
+  END AS lead_bucket,
+  COUNT(*) AS total,
+  SUM(CASE WHEN status = 'NoShow' THEN 1 ELSE 0 END) AS noshows
+FROM appointments
+WHERE appointment_at IN (SELECT appointment_date FROM touched_days)
+GROUP BY 1,2,3,4;
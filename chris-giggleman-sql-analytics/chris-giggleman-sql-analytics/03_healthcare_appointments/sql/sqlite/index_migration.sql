@@ -0,0 +1,12 @@
+-- Index migration (SQLite) for 03_healthcare_appointments
+-- Proposed by utils/pipeline/index_advisor.py, then reviewed. Each index was trialled
+-- alone and kept only if it made the 04_analysis / 05_views / 06_tests queries faster.
+-- Trial data: appointments 250,000 rows
+-- Workload (7 queries): no change
+
+-- No candidate index measurably helped; nothing to apply.
+
+-- Rejected:
+--   appointments(appointment_at): no plan change
+--   appointments(booked_at): no plan change
+--   appointments(status): no plan change
@@ -0,0 +1,31 @@
+-- Incremental refresh (SQLite) after an incremental load: only the
+-- appointment days that received new rows are recounted.
+
+DROP TABLE IF EXISTS temp.touched_days;
+
+CREATE TEMP TABLE touched_days AS
+SELECT DISTINCT date(appointment_at) AS appointment_date
+FROM appointments
+WHERE appointment_id > (SELECT previous_value FROM _pipeline_watermarks WHERE table_name = 'appointments');
+
+DELETE FROM mart_appointments_daily
+WHERE appointment_date IN (SELECT appointment_date FROM temp.touched_days);
+
+INSERT INTO mart_appointments_daily
+SELECT
+  date(appointment_at) AS appointment_date,
+  clinic,
+  provider,
+  CASE
+    WHEN (julianday(appointment_at) - julianday(booked_at)) <= 1 THEN '0-1 days'
+    WHEN (julianday(appointment_at) - julianday(booked_at)) <= 7 THEN '2-7 days'
+    WHEN (julianday(appointment_at) - julianday(booked_at)) <= 14 THEN '8-14 days'
+    ELSE '15+ days'
+  END AS lead_bucket,
+  COUNT(*) AS total,
+  SUM(CASE WHEN status = 'NoShow' THEN 1 ELSE 0 END) AS noshows
+FROM appointments
+WHERE date(appointment_at) IN (SELECT appointment_date FROM temp.touched_days)
+GROUP BY 1,2,3,4;
+
+DROP TABLE temp.touched_days;
@@ -0,0 +1,32 @@
+-- Marts rebuilt from scratch after a full load (PostgreSQL).
+-- refresh_incremental.sql keeps them current after incremental loads.
+
+-- MRR by month (04_analysis query 1), stored
+DROP TABLE IF EXISTS mart_mrr_monthly;
+
+CREATE TABLE mart_mrr_monthly (
+  month_start DATE PRIMARY KEY,
+  active_subs INT NOT NULL,
+  mrr         NUMERIC NOT NULL
+);
+
+INSERT INTO mart_mrr_monthly
+WITH bounds AS (
+  SELECT
+    date_trunc('month', MIN(start_date))::date AS min_month,
+    date_trunc('month', MAX(COALESCE(end_date, CURRENT_DATE)))::date AS max_month
+  FROM subscriptions
+),
+months AS (
+  SELECT generate_series(min_month, max_month, interval '1 month')::date AS month_start
+  FROM bounds
+)
+SELECT
+  m.month_start,
+  COUNT(DISTINCT s.subscription_id) AS active_subs,
+  ROUND(SUM(s.monthly_price),2) AS mrr
+FROM months m
+JOIN subscriptions s
+  ON s.start_date <= (m.month_start + interval '1 month' - interval '1 day')
+ AND (s.end_date IS NULL OR s.end_date >= m.month_start)
+GROUP BY 1;
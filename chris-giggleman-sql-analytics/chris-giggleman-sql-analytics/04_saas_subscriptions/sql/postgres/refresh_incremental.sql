@@ -0,0 +1,30 @@
+-- Incremental refresh (PostgreSQL) after an incremental load: only months a
+-- new subscription is active in are recomputed, plus the months from the last
+-- stored one up to today (open subscriptions extend into them as time passes).
+
+CREATE TEMP TABLE touched_months ON COMMIT DROP AS
+WITH bounds AS (
+  SELECT
+    LEAST(
+      (SELECT date_trunc('month', MIN(start_date))::date FROM subscriptions
+       WHERE subscription_id > (SELECT previous_value::int FROM _pipeline_watermarks WHERE table_name = 'subscriptions')),
+      (SELECT MAX(month_start) FROM mart_mrr_monthly)
+    ) AS min_month,
+    (SELECT date_trunc('month', MAX(COALESCE(end_date, CURRENT_DATE)))::date FROM subscriptions) AS max_month
+)
+SELECT generate_series(min_month, max_month, interval '1 month')::date AS month_start
+FROM bounds;
+
+DELETE FROM mart_mrr_monthly
+WHERE month_start IN (SELECT month_start FROM touched_months);
+
+INSERT INTO mart_mrr_monthly
+SELECT
+  tm.month_start,
+  COUNT(DISTINCT s.subscription_id) AS active_subs,
+  ROUND(SUM(s.monthly_price),2) AS mrr
+FROM touched_months tm
+JOIN subscriptions s
+  ON s.start_date <= (tm.month_start + interval '1 month' - interval '1 day')
+ AND (s.end_date IS NULL OR s.end_date >= tm.month_start)
+GROUP BY 1;
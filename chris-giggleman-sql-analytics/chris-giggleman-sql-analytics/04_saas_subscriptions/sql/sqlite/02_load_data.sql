@@ -3,3 +3,6 @@
 -- File -> Import -> Table from CSV
 -- Choose the matching table name.
 -- Then run 03_cleaning.sql and 04_analysis.sql.
+--
+-- Scripted alternative (bulk, repeatable; blanks load as NULL):
+--   python utils/pipeline/run_pipeline.py --project <NN> --stages 01 02
@@ -1,50 +1,43 @@
 -- SaaS analysis (SQLite)
--- SQLite doesn't have generate_series; use a recursive month calendar for the covered range.
+-- Month series come from dim_calendar (one row per day with month / ISO-week keys),
+-- which the pipeline builds from calendar.json when it loads the data
+-- (python utils/pipeline/dim_calendar.py --db <file> builds it for a hand-loaded database).
+-- Dates are looked up by date_key as stored, never wrapped in date().
+-- A subscription is active in every month from its start month to its end month, so
+-- subscriptions are first reduced to (first month, last month) spans, and only the spans
+-- are joined to the month rows in between (a range over dim_calendar's month-start index).
 
--- 1) Build a month calendar from min(start_date) to max(COALESCE(end_date, today))
-WITH RECURSIVE bounds AS (
-  SELECT
-    date(MIN(start_date), 'start of month') AS min_month,
-    date(MAX(COALESCE(end_date, date('now'))), 'start of month') AS max_month
-  FROM subscriptions
+-- 1) MRR by month, from the first start month to the month of max(COALESCE(end_date, today))
+WITH bounds AS (
+  SELECT c.month_start AS last_month
+  FROM dim_calendar c
+  WHERE c.date_key = (SELECT MAX(COALESCE(end_date, date('now'))) FROM subscriptions)
 ),
-months(m) AS (
-  SELECT min_month FROM bounds
-  UNION ALL
-  SELECT date(m, '+1 month')
-  FROM months, bounds
-  WHERE m < max_month
-),
-active AS (
-  SELECT
-    months.m AS month_start,
-    s.subscription_id,
-    s.account_id,
-    s.industry,
-    s.monthly_price
-  FROM months
-  JOIN subscriptions s
-    ON date(s.start_date) <= date(months.m, '+1 month', '-1 day')
-   AND (s.end_date IS NULL OR date(s.end_date) >= months.m)
+spans AS (
+  SELECT sd.month_start AS first_month, COALESCE(ed.month_start, b.last_month) AS last_month,
+         COUNT(*) AS subs, SUM(s.monthly_price) AS mrr
+  FROM subscriptions s
+  JOIN dim_calendar sd ON sd.date_key = s.start_date
+  LEFT JOIN dim_calendar ed ON ed.date_key = s.end_date
+  CROSS JOIN bounds b
+  GROUP BY 1, 2
 )
-SELECT
-  month_start,
-  COUNT(DISTINCT subscription_id) AS active_subs,
-  ROUND(SUM(monthly_price),2) AS mrr
-FROM active
+SELECT m.date_key AS month_start, SUM(sp.subs) AS active_subs, ROUND(SUM(sp.mrr),2) AS mrr
+FROM spans sp
+CROSS JOIN dim_calendar m
+  ON m.is_month_start = 1
+ AND m.date_key BETWEEN sp.first_month AND sp.last_month
 GROUP BY 1
 ORDER BY 1;
 
 -- 2) Churned accounts by month (end_date month)
-WITH churn AS (
-  SELECT date(end_date, 'start of month') AS churn_month, COUNT(DISTINCT account_id) AS churned_accounts
-  FROM subscriptions
-  WHERE end_date IS NOT NULL
-  GROUP BY 1
-)
-SELECT churn_month, churned_accounts
-FROM churn
-ORDER BY churn_month;
+SELECT
+  c.month_start AS churn_month,
+  COUNT(DISTINCT s.account_id) AS churned_accounts
+FROM subscriptions s
+JOIN dim_calendar c ON c.date_key = s.end_date
+GROUP BY 1
+ORDER BY 1;
 
 -- 3) Churn by industry
 SELECT
@@ -55,46 +48,62 @@ WHERE end_date IS NOT NULL
 GROUP BY 1
 ORDER BY churned_accounts DESC;
 
--- 4) Cohort retention (accounts)
-WITH cohorts AS (
-  SELECT account_id, date(MIN(start_date), 'start of month') AS cohort_month
-  FROM subscriptions
-  GROUP BY 1
+-- 4) Cohort retention (accounts): every cohort month x every month since, up to the current month
+WITH bounds AS (
+  SELECT month_start AS current_month FROM dim_calendar WHERE date_key = date('now')
+),
+spans AS (
+  SELECT s.account_id, sd.month_start AS first_month,
+         MIN(COALESCE(ed.month_start, b.current_month), b.current_month) AS last_month
+  FROM subscriptions s
+  JOIN dim_calendar sd ON sd.date_key = s.start_date
+  LEFT JOIN dim_calendar ed ON ed.date_key = s.end_date
+  CROSS JOIN bounds b
+  WHERE sd.month_start <= b.current_month
 ),
-calendar AS (
-  WITH RECURSIVE months(m) AS (
-    SELECT date((SELECT MIN(cohort_month) FROM cohorts))
-    UNION ALL
-    SELECT date(m, '+1 month') FROM months
-    WHERE m < date('now', 'start of month')
-  )
-  SELECT m FROM months
+-- overlapping subscriptions of one account are merged first, so an active account counts once a month
+flagged AS (
+  SELECT *, CASE WHEN first_month <= MAX(last_month) OVER (
+                   PARTITION BY account_id ORDER BY first_month, last_month
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) THEN 0 ELSE 1 END AS starts_island
+  FROM spans
+),
+islands AS (
+  SELECT account_id, first_month, last_month,
+         SUM(starts_island) OVER (PARTITION BY account_id ORDER BY first_month, last_month
+                                  ROWS UNBOUNDED PRECEDING) AS island
+  FROM flagged
+),
+merged AS (
+  SELECT account_id, MIN(first_month) AS first_month, MAX(last_month) AS last_month
+  FROM islands
+  GROUP BY account_id, island
+),
+cohorts AS (
+  SELECT account_id, MIN(first_month) AS cohort_month FROM merged GROUP BY 1
+),
+grouped AS (
+  SELECT c.cohort_month, mg.first_month, mg.last_month, COUNT(*) AS accounts
+  FROM merged mg JOIN cohorts c ON c.account_id = mg.account_id
+  GROUP BY 1, 2, 3
 ),
 active_accounts AS (
-  SELECT
-    c.cohort_month,
-    cal.m AS month_start,
-    COUNT(DISTINCT s.account_id) AS active_accounts
-  FROM cohorts c
-  JOIN calendar cal
-  LEFT JOIN subscriptions s
-    ON s.account_id = c.account_id
-   AND date(s.start_date) <= date(cal.m, '+1 month', '-1 day')
-   AND (s.end_date IS NULL OR date(s.end_date) >= cal.m)
-  WHERE cal.m >= c.cohort_month
-  GROUP BY 1,2
+  SELECT g.cohort_month, m.date_key AS month_start, SUM(g.accounts) AS active_accounts
+  FROM grouped g
+  CROSS JOIN dim_calendar m
+    ON m.is_month_start = 1 AND m.date_key BETWEEN g.first_month AND g.last_month
+  GROUP BY 1, 2
 ),
 cohort_size AS (
-  SELECT cohort_month, COUNT(*) AS cohort_accounts
-  FROM cohorts
-  GROUP BY 1
+  SELECT cohort_month, COUNT(*) AS cohort_accounts FROM cohorts GROUP BY 1
+),
+grid AS (
+  SELECT cs.cohort_month, m.date_key AS month_start, cs.cohort_accounts
+  FROM cohort_size cs CROSS JOIN bounds b
+  CROSS JOIN dim_calendar m ON m.is_month_start = 1 AND m.date_key BETWEEN cs.cohort_month AND b.current_month
 )
-SELECT
-  a.cohort_month,
-  a.month_start,
-  a.active_accounts,
-  cs.cohort_accounts,
-  ROUND(100.0 * a.active_accounts / cs.cohort_accounts, 2) AS retention_pct
-FROM active_accounts a
-JOIN cohort_size cs ON cs.cohort_month = a.cohort_month
-ORDER BY a.cohort_month, a.month_start;
+SELECT g.cohort_month, g.month_start, COALESCE(a.active_accounts, 0) AS active_accounts, g.cohort_accounts,
+  ROUND(100.0 * COALESCE(a.active_accounts, 0) / g.cohort_accounts, 2) AS retention_pct
+FROM grid g
+LEFT JOIN active_accounts a ON a.cohort_month = g.cohort_month AND a.month_start = g.month_start
+ORDER BY g.cohort_month, g.month_start;
@@ -10,3 +10,10 @@ WHERE end_date IS NOT NULL
 SELECT *
 FROM subscriptions
 WHERE account_id IS NULL OR plan IS NULL OR start_date IS NULL OR monthly_price IS NULL;
+
+-- dates the analysis cannot place on dim_calendar (not 'YYYY-MM-DD', or outside it)
+SELECT *
+FROM subscriptions s
+WHERE NOT EXISTS (SELECT 1 FROM dim_calendar c WHERE c.date_key = s.start_date)
+   OR (s.end_date IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM dim_calendar c WHERE c.date_key = s.end_date));
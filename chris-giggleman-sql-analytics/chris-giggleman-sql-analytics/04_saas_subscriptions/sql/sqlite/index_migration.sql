@@ -0,0 +1,18 @@
+-- Index migration (SQLite) for 04_saas_subscriptions
+-- Proposed by utils/pipeline/index_advisor.py, then reviewed. Each index was trialled
+-- alone and kept only if it made the 04_analysis / 05_views / 06_tests queries faster.
+-- Trial data: dim_calendar 1,096, subscriptions 80,000 rows
+-- Workload (8 queries): 3% faster
+
+-- subscriptions(end_date, start_date)
+--   04_analysis:11: 16% faster  [SEARCH subscriptions USING COVERING INDEX ix_subscriptions_end_date_start_date]
+CREATE INDEX IF NOT EXISTS ix_subscriptions_end_date_start_date ON subscriptions (end_date, start_date);
+
+-- Rejected:
+--   dim_calendar(date_key, is_month_start): no plan change
+--   dim_calendar(date_key, month_start): no plan change
+--   dim_calendar(is_month_start, month_start): no plan change
+--   dim_calendar(month_start): no plan change
+--   subscriptions(end_date): no gain next to the kept indexes
+--   subscriptions(monthly_price): no plan change
+--   subscriptions(plan): no plan change
@@ -0,0 +1,33 @@
+-- Marts rebuilt from scratch after a full load (SQLite).
+-- refresh_incremental.sql keeps them current after incremental loads.
+
+-- MRR by month (04_analysis query 1), stored
+DROP TABLE IF EXISTS mart_mrr_monthly;
+
+CREATE TABLE mart_mrr_monthly (
+  month_start TEXT PRIMARY KEY,
+  active_subs INTEGER NOT NULL,
+  mrr         REAL NOT NULL
+);
+
+INSERT INTO mart_mrr_monthly
+WITH bounds AS (
+  SELECT c.month_start AS last_month
+  FROM dim_calendar c
+  WHERE c.date_key = (SELECT MAX(COALESCE(end_date, date('now'))) FROM subscriptions)
+),
+spans AS (
+  SELECT sd.month_start AS first_month, COALESCE(ed.month_start, b.last_month) AS last_month,
+         COUNT(*) AS subs, SUM(s.monthly_price) AS mrr
+  FROM subscriptions s
+  JOIN dim_calendar sd ON sd.date_key = s.start_date
+  LEFT JOIN dim_calendar ed ON ed.date_key = s.end_date
+  CROSS JOIN bounds b
+  GROUP BY 1, 2
+)
+SELECT m.date_key AS month_start, SUM(sp.subs) AS active_subs, ROUND(SUM(sp.mrr),2) AS mrr
+FROM spans sp
+CROSS JOIN dim_calendar m
+  ON m.is_month_start = 1
+ AND m.date_key BETWEEN sp.first_month AND sp.last_month
+GROUP BY 1;
@@ -0,0 +1,52 @@
+-- Incremental refresh (SQLite) after an incremental load: only months a new
+-- subscription is active in are recomputed, plus the months from the last
+-- stored one up to today (open subscriptions extend into them as time passes).
+-- The touched months are one contiguous dim_calendar range.
+
+DROP TABLE IF EXISTS temp.touched_months;
+
+CREATE TEMP TABLE touched_months AS
+WITH bounds AS (
+  SELECT
+    (SELECT c.month_start FROM dim_calendar c
+     WHERE c.date_key = (
+       SELECT MIN(start_date) FROM subscriptions
+       WHERE subscription_id > (SELECT previous_value FROM _pipeline_watermarks WHERE table_name = 'subscriptions'))
+    ) AS new_month,
+    (SELECT MAX(month_start) FROM mart_mrr_monthly) AS last_month,
+    (SELECT c.month_start FROM dim_calendar c
+     WHERE c.date_key = (SELECT MAX(COALESCE(end_date, date('now'))) FROM subscriptions)
+    ) AS max_month
+)
+SELECT m.date_key AS month_start
+FROM bounds b
+CROSS JOIN dim_calendar m
+  ON m.is_month_start = 1
+ AND m.date_key BETWEEN COALESCE(MIN(b.new_month, b.last_month), b.new_month, b.last_month) AND b.max_month;
+
+DELETE FROM mart_mrr_monthly
+WHERE month_start IN (SELECT month_start FROM temp.touched_months);
+
+INSERT INTO mart_mrr_monthly
+WITH touched AS (
+  SELECT MIN(month_start) AS first_month, MAX(month_start) AS last_month
+  FROM temp.touched_months
+),
+spans AS (
+  SELECT sd.month_start AS first_month, COALESCE(ed.month_start, t.last_month) AS last_month,
+         COUNT(*) AS subs, SUM(s.monthly_price) AS mrr
+  FROM subscriptions s
+  JOIN dim_calendar sd ON sd.date_key = s.start_date
+  LEFT JOIN dim_calendar ed ON ed.date_key = s.end_date
+  CROSS JOIN touched t
+  GROUP BY 1, 2
+)
+SELECT m.date_key AS month_start, SUM(sp.subs) AS active_subs, ROUND(SUM(sp.mrr),2) AS mrr
+FROM spans sp
+CROSS JOIN touched t
+CROSS JOIN dim_calendar m
+  ON m.is_month_start = 1
+ AND m.date_key BETWEEN MAX(sp.first_month, t.first_month) AND MIN(sp.last_month, t.last_month)
+GROUP BY 1;
+
+DROP TABLE temp.touched_months;
@@ -0,0 +1,76 @@
+# bench_backends.py
+"""
+rows/sec of the python (per-row random.*) and numpy (per-column) backends,
+plus the blank/dirty-value rate of every nullable column so the two can be
+compared side by side.
+
+    python bench_backends.py --scale 200
+"""
+import argparse
+import csv
+import glob
+import os
+import random
+import tempfile
+import time
+
+import generate_all as g
+
+
+def run_python(sizes, seed, root):
+    random.seed(seed)
+    g.gen_retail(sizes["customers"], sizes["products"], sizes["orders"], root=root)
+    g.gen_hr(sizes["employees"], root=root)
+    g.gen_healthcare(sizes["appointments"], root=root)
+    g.gen_saas(sizes["accounts"], sizes["subscriptions"], root=root)
+
+
+def blank_rates(root):
+    rates = {}
+    for path in sorted(glob.glob(os.path.join(root, "*", "data", "raw", "*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            blanks, n = [0] * len(header), 0
+            for row in reader:
+                n += 1
+                for i, v in enumerate(row):
+                    if not v.strip():
+                        blanks[i] += 1
+        table = os.path.basename(path)[:-4]
+        rates.update({f"{table}.{header[i]}": b / n for i, b in enumerate(blanks) if b})
+        rates[f"{table} rows"] = n
+    return rates
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--scale", type=float, default=100)
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args(argv)
+    sizes = g.default_sizes(args.scale)
+
+    results = {}
+    for backend in ("python", "numpy"):
+        with tempfile.TemporaryDirectory() as root:
+            t0 = time.perf_counter()
+            if backend == "python":
+                run_python(sizes, args.seed, root)
+            else:
+                g.gen_numpy(sizes, args.seed, root)
+            elapsed = time.perf_counter() - t0
+            rates = blank_rates(root)
+            rows = sum(v for k, v in rates.items() if k.endswith(" rows"))
+            results[backend] = (rows, elapsed, rates)
+            print(f"{backend:>7}: {rows:,} rows in {elapsed:.2f}s = {rows/elapsed:,.0f} rows/s")
+
+    py, npy = results["python"], results["numpy"]
+    print(f"speedup: {(npy[0]/npy[1]) / (py[0]/py[1]):.1f}x")
+    print(f"{'column':<36} {'python':>8} {'numpy':>8}")
+    for key in py[2]:
+        if not key.endswith(" rows"):
+            print(f"{key:<36} {py[2][key]:>8.3f} {npy[2].get(key, 0):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench_sharded.py
+"""
+Rows/sec of sharded generation at 1, 4 and 16 workers, plus a determinism
+check (same seed + shard count => byte-identical CSVs whatever the worker count).
+
+    python bench_sharded.py --scale 50
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from generate_all import SHARDED_TABLES, default_sizes, generate_sharded
+
+
+def digest_tree(root):
+    h = hashlib.sha256()
+    for table in SHARDED_TABLES:
+        for rel_path, _ in SHARDED_TABLES[table][2]:
+            with open(os.path.join(root, rel_path), "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--scale", type=float, default=50)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args(argv)
+
+    sizes = default_sizes(args.scale)
+    print(f"cpus={os.cpu_count()} scale={args.scale:g}")
+    print(f"{'workers':>8} {'rows':>12} {'seconds':>9} {'rows/s':>12}")
+    digests = {}
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as root:
+            t0 = time.perf_counter()
+            rows = generate_sharded(sizes, workers, workers, args.seed, root=root, concat=True)
+            elapsed = time.perf_counter() - t0
+            print(f"{workers:>8} {rows:>12,} {elapsed:>9.2f} {rows/elapsed:>12,.0f}")
+
+            # Fixed shard count, single worker: must match the parallel run
+            with tempfile.TemporaryDirectory() as check_root:
+                generate_sharded(sizes, workers, 1, args.seed, root=check_root, concat=True)
+                digests[workers] = digest_tree(root) == digest_tree(check_root)
+    for workers, same in digests.items():
+        print(f"shards={workers}: parallel == sequential output: {same}")
+
+
+if __name__ == "__main__":
+    main()
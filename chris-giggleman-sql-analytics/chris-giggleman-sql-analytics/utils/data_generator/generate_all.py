@@ -1,127 +1,600 @@
 from faker import Faker
-import random, csv, os
+import random, csv, os, sys, argparse, time, hashlib, shutil
 from datetime import date, timedelta
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import numpy as np  # optional: only needed for --backend numpy
+except ImportError:
+    np = None
 
 fake = Faker()
 random.seed(7)
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PIPELINE_DIR = os.path.join(ROOT, "utils", "pipeline")
 
-def write_csv(rel_path, header, rows):
-    path = os.path.join(ROOT, rel_path)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(header)
-        w.writerows(rows)
+# Rows are generated lazily and flushed to disk in chunks of this size, so
+# memory stays flat no matter how many rows are requested.
+CHUNK_SIZE = 10_000
+WRITE_BUFFER = 1 << 20  # 1 MiB file buffer per output CSV
+MAX_ITEMS_PER_ORDER = 5  # order_items per order; sharded runs size item id ranges by it
+
+def chunked(rows, size=CHUNK_SIZE):
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+class CsvSink:
+    """Buffered CSV writer that takes rows a chunk at a time."""
+    def __init__(self, rel_path, header, root=None):
+        self.path = os.path.join(root or ROOT, rel_path)
+        self.header = header
+        self.rows = 0
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._f = open(self.path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER)
+        self._w = csv.writer(self._f)
+        self._w.writerow(self.header)
+        return self
+    def write_chunk(self, rows):
+        self._w.writerows(rows)
+        self.rows += len(rows)
+    def __exit__(self, *exc):
+        self._f.close()
+
+# ---------- Output format (--format) ----------
+#
+# Parquet files get typed columns from the project's 01_create_tables.sql
+# (utils/pipeline/columnar.py) and replace each .csv with a .parquet of the
+# same name, which the pipeline's loader picks up instead. Set per process
+# by set_output(); sharded runs pass it to every worker.
+
+OUTPUT = {"format": "csv", "compression": "zstd", "row_group_size": 131_072}
+
+def set_output(fmt="csv", compression="zstd", row_group_size=131_072):
+    OUTPUT.update(format=fmt, compression=compression, row_group_size=row_group_size)
+
+def _columnar():
+    if PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, PIPELINE_DIR)
+    import columnar
+    columnar.require_pyarrow()
+    return columnar
+
+def out_path(rel_path):
+    """rel_path with the extension of the current output format."""
+    return rel_path if OUTPUT["format"] == "csv" else os.path.splitext(rel_path)[0] + ".parquet"
+
+def open_sink(rel_path, header, root=None):
+    """CsvSink, or a ParquetSink typed from the project's CREATE TABLE, for rel_path."""
+    if OUTPUT["format"] == "csv":
+        return CsvSink(rel_path, header, root)
+    columnar = _columnar()
+    # Schemas always come from this portfolio's SQL, wherever --root puts the data
+    schema = columnar.schema_for_header(os.path.join(ROOT, rel_path.split("/")[0]), header)
+    return columnar.ParquetSink(os.path.join(root or ROOT, out_path(rel_path)), schema,
+                                OUTPUT["compression"], OUTPUT["row_group_size"])
+
+def write_csv(rel_path, header, rows, chunk_size=CHUNK_SIZE, root=None):
+    """Stream any iterable of rows to CSV (or --format) in fixed-size chunks; returns the row count."""
+    with open_sink(rel_path, header, root) as sink:
+        for chunk in chunked(rows, chunk_size):
+            sink.write_chunk(chunk)
+    return sink.rows
 
 def iso(d): return d.isoformat()
 
-def gen_retail(n_customers=500, n_products=80, n_orders=2000):
-    # customers
-    customers=[]
-    for cid in range(1, n_customers+1):
-        name = fake.name() if random.random() > 0.03 else "   "
-        email = fake.email() if random.random() > 0.06 else ""
-        customers.append([cid, name, email, fake.city(), fake.state_abbr(), iso(fake.date_between(start_date="-2y", end_date="today"))])
-    # products
+# ---------- Row generators (yield one row at a time) ----------
+
+# Each iterator takes the id range to produce plus the random/Faker instances
+# to draw from (module-level ones by default; per-shard ones when sharded).
+
+def iter_customers(ids, rng=random, fk=fake):
+    for cid in ids:
+        name = fk.name() if rng.random() > 0.03 else "   "
+        email = fk.email() if rng.random() > 0.06 else ""
+        yield [cid, name, email, fk.city(), fk.state_abbr(), iso(fk.date_between(start_date="-2y", end_date="today"))]
+
+def iter_products(ids, rng=random, fk=fake):
     categories = ["Accessories","Office","Audio","Storage","Networking"]
-    products=[]
-    for pid in range(1001, 1001+n_products):
-        price = round(random.uniform(8, 220), 2)
-        if random.random() < 0.04: price = ""  # missing
-        products.append([pid, fake.word().capitalize()+" "+random.choice(["Cable","Stand","Mouse","Hub","Adapter","Drive","Router"]), random.choice(categories), price, 1])
-    # orders + items
+    for pid in ids:
+        price = round(rng.uniform(8, 220), 2)
+        if rng.random() < 0.04: price = ""  # missing
+        yield [pid, fk.word().capitalize()+" "+rng.choice(["Cable","Stand","Mouse","Hub","Adapter","Drive","Router"]), rng.choice(categories), price, 1]
+
+def iter_orders(n_customers, product_ids, ids, rng=random, fk=fake, first_item_id=1):
+    """Yields (order_row, [order_item_rows]) so both files stream together."""
     statuses = ["Shipped","Shipped","Shipped","Returned","Canceled"]
     channels = ["Web","Mobile","Partner"]
-    orders=[]
-    order_items=[]
-    order_item_id=1
+    order_item_id=first_item_id
     start = date.today() - timedelta(days=365)
-    for oid in range(50001, 50001+n_orders):
-        cid = random.randint(1, n_customers)
-        od = start + timedelta(days=random.randint(0, 364))
-        status = random.choice(statuses)
-        channel = random.choice(channels)
-        ship = round(max(0, random.gauss(6, 2)), 2)
-        if random.random() < 0.03: ship = ""  # missing
-        orders.append([oid, cid, iso(od), status, channel, ship])
+    for oid in ids:
+        cid = rng.randint(1, n_customers)
+        od = start + timedelta(days=rng.randint(0, 364))
+        status = rng.choice(statuses)
+        channel = rng.choice(channels)
+        ship = round(max(0, rng.gauss(6, 2)), 2)
+        if rng.random() < 0.03: ship = ""  # missing
+        items=[]
         # 1-5 items
-        for _ in range(random.randint(1,5)):
-            pid = random.choice(products)[0]
-            qty = random.randint(1,4)
-            unit_price = "" if random.random() < 0.03 else round(random.uniform(8, 220), 2)
-            discount = "" if random.random() < 0.20 else round(random.uniform(0, 10), 2)
-            order_items.append([order_item_id, oid, pid, qty, unit_price, discount])
+        for _ in range(rng.randint(1,MAX_ITEMS_PER_ORDER)):
+            pid = rng.choice(product_ids)
+            qty = rng.randint(1,4)
+            unit_price = "" if rng.random() < 0.03 else round(rng.uniform(8, 220), 2)
+            discount = "" if rng.random() < 0.20 else round(rng.uniform(0, 10), 2)
+            items.append([order_item_id, oid, pid, qty, unit_price, discount])
             order_item_id += 1
-    write_csv("01_retail_sales_analytics/data/raw/customers.csv",
-              ["customer_id","full_name","email","city","state","created_at"], customers)
-    write_csv("01_retail_sales_analytics/data/raw/products.csv",
-              ["product_id","product_name","category","unit_price","active"], products)
-    write_csv("01_retail_sales_analytics/data/raw/orders.csv",
-              ["order_id","customer_id","order_date","status","channel","shipping_cost"], orders)
-    write_csv("01_retail_sales_analytics/data/raw/order_items.csv",
-              ["order_item_id","order_id","product_id","quantity","unit_price","discount"], order_items)
-
-def gen_hr(n=400):
+        yield [oid, cid, iso(od), status, channel, ship], items
+
+def iter_employees(ids, rng=random, fk=fake):
     depts=["Sales","Engineering","Support","Finance","Marketing"]
     roles={"Sales":["AE","SDR"],"Engineering":["SWE","SRE","Data"],"Support":["T1","T2"],"Finance":["Analyst"],"Marketing":["Coordinator","Manager"]}
     locations=["Remote","NYC","ATL","CLT","CHI"]
-    rows=[]
-    for eid in range(1,n+1):
-        dept=random.choice(depts)
-        role=random.choice(roles[dept])
-        hire=fake.date_between(start_date="-6y", end_date="-30d")
-        terminated = random.random() < 0.22
-        term = fake.date_between(start_date=hire, end_date="today") if terminated else ""
-        salary = int(random.uniform(45000, 160000))
-        if random.random() < 0.03: salary = ""  # missing
-        rating = random.choice([1,2,3,4,5])
+    for eid in ids:
+        dept=rng.choice(depts)
+        role=rng.choice(roles[dept])
+        hire=fk.date_between(start_date="-6y", end_date="-30d")
+        terminated = rng.random() < 0.22
+        term = fk.date_between(start_date=hire, end_date="today") if terminated else ""
+        salary = int(rng.uniform(45000, 160000))
+        if rng.random() < 0.03: salary = ""  # missing
+        rating = rng.choice([1,2,3,4,5])
         # dirty categories
-        dept_dirty = dept if random.random() > 0.10 else dept.lower()+" "
-        rows.append([eid, fake.name(), dept_dirty, role, random.choice(locations), hire.isoformat(), term if term=="" else term.isoformat(), salary, rating])
-    write_csv("02_hr_attrition/data/raw/employee_roster.csv",
-              ["employee_id","full_name","department","role","location","hire_date","termination_date","salary","performance_rating"], rows)
+        dept_dirty = dept if rng.random() > 0.10 else dept.lower()+" "
+        yield [eid, fk.name(), dept_dirty, role, rng.choice(locations), hire.isoformat(), term if term=="" else term.isoformat(), salary, rating]
+
+def make_providers(fk=fake):
+    return [fk.name()[0]+". "+fk.last_name() for _ in range(12)]
 
-def gen_healthcare(n=2500):
+def iter_appointments(ids, rng=random, fk=fake, providers=None):
     clinics=["North","South","East","West"]
-    providers=[fake.name()[0]+". "+fake.last_name() for _ in range(12)]
+    providers=providers or make_providers(fk)
     insurance=["Commercial","Medicaid","Medicare","SelfPay"]
     statuses=["Completed","Completed","Completed","NoShow","Canceled"]
-    rows=[]
     base = date.today() - timedelta(days=365)
-    for aid in range(1,n+1):
-        patient_id = random.randint(2000, 6000)
-        clinic=random.choice(clinics)
-        provider=random.choice(providers)
-        booked = base + timedelta(days=random.randint(0, 360))
-        appt = booked + timedelta(days=random.randint(0, 40))
-        status=random.choice(statuses)
-        ins=random.choice(insurance)
-        if random.random()<0.02: provider="  "  # blank
-        rows.append([aid, patient_id, clinic, provider, iso(booked), iso(appt), status, ins])
-    write_csv("03_healthcare_appointments/data/raw/appointments.csv",
-              ["appointment_id","patient_id","clinic","provider","booked_at","appointment_at","status","insurance_type"], rows)
-
-def gen_saas(n_accounts=600, n_subs=800):
+    for aid in ids:
+        patient_id = rng.randint(2000, 6000)
+        clinic=rng.choice(clinics)
+        provider=rng.choice(providers)
+        booked = base + timedelta(days=rng.randint(0, 360))
+        appt = booked + timedelta(days=rng.randint(0, 40))
+        status=rng.choice(statuses)
+        ins=rng.choice(insurance)
+        if rng.random()<0.02: provider="  "  # blank
+        yield [aid, patient_id, clinic, provider, iso(booked), iso(appt), status, ins]
+
+def iter_subscriptions(n_accounts, ids, rng=random, fk=fake):
     industries=["Healthcare","Retail","Manufacturing","Tech","Education"]
     plans=[("Basic",19),("Pro",49),("Business",99)]
-    rows=[]
-    for sid in range(1, n_subs+1):
-        account = random.randint(9000, 9000+n_accounts-1)
-        plan, price = random.choice(plans)
-        start = fake.date_between(start_date="-24mo", end_date="-10d")
-        churn = random.random() < 0.28
-        end = fake.date_between(start_date=start, end_date="today") if churn else ""
-        seats = random.choice([1,2,3,5,10,15,25,50])
-        if random.random()<0.03: seats=""  # missing
-        rows.append([sid, account, plan, start.isoformat(), "" if end=="" else end.isoformat(), price, random.choice(industries), seats])
-    write_csv("04_saas_subscriptions/data/raw/subscriptions.csv",
-              ["subscription_id","account_id","plan","start_date","end_date","monthly_price","industry","seats"], rows)
+    for sid in ids:
+        account = rng.randint(9000, 9000+n_accounts-1)
+        plan, price = rng.choice(plans)
+        # "-2y" rather than "-24mo": Faker reads "mo" as minutes, giving an empty range
+        start = fk.date_between(start_date="-2y", end_date="-10d")
+        churn = rng.random() < 0.28
+        end = fk.date_between(start_date=start, end_date="today") if churn else ""
+        seats = rng.choice([1,2,3,5,10,15,25,50])
+        if rng.random()<0.03: seats=""  # missing
+        yield [sid, account, plan, start.isoformat(), "" if end=="" else end.isoformat(), price, rng.choice(industries), seats]
+
+# ---------- Table writers ----------
+
+CUSTOMERS = ("01_retail_sales_analytics/data/raw/customers.csv",
+             ["customer_id","full_name","email","city","state","created_at"])
+PRODUCTS = ("01_retail_sales_analytics/data/raw/products.csv",
+            ["product_id","product_name","category","unit_price","active"])
+ORDERS = ("01_retail_sales_analytics/data/raw/orders.csv",
+          ["order_id","customer_id","order_date","status","channel","shipping_cost"])
+ORDER_ITEMS = ("01_retail_sales_analytics/data/raw/order_items.csv",
+               ["order_item_id","order_id","product_id","quantity","unit_price","discount"])
+EMPLOYEES = ("02_hr_attrition/data/raw/employee_roster.csv",
+             ["employee_id","full_name","department","role","location","hire_date","termination_date","salary","performance_rating"])
+APPOINTMENTS = ("03_healthcare_appointments/data/raw/appointments.csv",
+                ["appointment_id","patient_id","clinic","provider","booked_at","appointment_at","status","insurance_type"])
+SUBSCRIPTIONS = ("04_saas_subscriptions/data/raw/subscriptions.csv",
+                 ["subscription_id","account_id","plan","start_date","end_date","monthly_price","industry","seats"])
+
+def write_orders(rows, chunk_size=CHUNK_SIZE, root=None, orders_path=ORDERS[0], items_path=ORDER_ITEMS[0]):
+    """Write iter_orders output: orders + items stream side by side."""
+    with open_sink(orders_path, ORDERS[1], root) as orders, open_sink(items_path, ORDER_ITEMS[1], root) as order_items:
+        for chunk in chunked(rows, chunk_size):
+            orders.write_chunk([order for order, _ in chunk])
+            order_items.write_chunk([item for _, items in chunk for item in items])
+    return orders.rows + order_items.rows
+
+def gen_retail(n_customers=500, n_products=80, n_orders=2000, chunk_size=CHUNK_SIZE, root=None):
+    write_csv(CUSTOMERS[0], CUSTOMERS[1], iter_customers(range(1, n_customers+1)), chunk_size, root)
+    # products stay small; only their ids are kept for order_items
+    product_ids=[]
+    def products():
+        for row in iter_products(range(1001, 1001+n_products)):
+            product_ids.append(row[0])
+            yield row
+    write_csv(PRODUCTS[0], PRODUCTS[1], products(), chunk_size, root)
+    write_orders(iter_orders(n_customers, product_ids, range(50001, 50001+n_orders)), chunk_size, root)
+
+def gen_hr(n=400, chunk_size=CHUNK_SIZE, root=None):
+    write_csv(EMPLOYEES[0], EMPLOYEES[1], iter_employees(range(1,n+1)), chunk_size, root)
+
+def gen_healthcare(n=2500, chunk_size=CHUNK_SIZE, root=None):
+    write_csv(APPOINTMENTS[0], APPOINTMENTS[1], iter_appointments(range(1,n+1)), chunk_size, root)
+
+def gen_saas(n_accounts=600, n_subs=800, chunk_size=CHUNK_SIZE, root=None):
+    write_csv(SUBSCRIPTIONS[0], SUBSCRIPTIONS[1], iter_subscriptions(n_accounts, range(1, n_subs+1)), chunk_size, root)
+
+def default_sizes(scale=1.0):
+    s = lambda n: max(1, int(n * scale))
+    return {"customers": s(500), "products": s(80), "orders": s(2000), "employees": s(400),
+            "appointments": s(2500), "accounts": s(600), "subscriptions": s(800)}
+
+# ---------- NumPy backend (--backend numpy) ----------
+#
+# Draws whole columns per block with a numpy Generator instead of one
+# random.* call per field. Faker is only called up front to fill a pool of
+# names/emails/cities/words that rows sample by index. Same columns, value
+# ranges and dirty-data rates as the iterators above, but not the same rows.
+
+VEC_BLOCK = 65_536  # rows drawn per block; fixed so output never depends on --chunk-size
+POOL_SIZE = 2_000
+
+class FakerPool:
+    """Pre-generated Faker values, sampled by index."""
+    def __init__(self, fk=fake, size=POOL_SIZE):
+        self.names = np.array([fk.name() for _ in range(size)], dtype=object)
+        self.emails = np.array([fk.email() for _ in range(size)], dtype=object)
+        self.cities = np.array([fk.city() for _ in range(size)], dtype=object)
+        self.states = np.array([fk.state_abbr() for _ in range(size)], dtype=object)
+        self.words = np.array([fk.word().capitalize() for _ in range(size)], dtype=object)
+    def sample(self, values, rng, n):
+        return values[rng.integers(0, len(values), n)]
+
+def _blocks(ids, size=VEC_BLOCK):
+    for lo in range(ids.start, ids.stop, size):
+        yield np.arange(lo, min(lo+size, ids.stop))
+
+def _pick(rng, choices, n):
+    return np.array(choices, dtype=object)[rng.integers(0, len(choices), n)]
+
+def _masked(values, mask, blank=""):
+    """values.tolist() with `blank` wherever mask is set."""
+    out = values.astype(object)
+    out[mask] = blank
+    return out.tolist()
+
+def _money(rng, lo, hi, n):
+    return np.round(rng.uniform(lo, hi, n), 2)
+
+def _days_ago(max_days, n, rng, min_days=0):
+    """ISO dates between max_days and min_days before today."""
+    today = np.datetime64(date.today(), "D")
+    return today - rng.integers(min_days, max_days+1, n)
+
+def _iso(dates):
+    return dates.astype(str).tolist()
+
+def vec_customers(ids, rng, pool):
+    for cid in _blocks(ids):
+        n = len(cid)
+        yield list(zip(cid.tolist(),
+                       _masked(pool.sample(pool.names, rng, n), rng.random(n) <= 0.03, "   "),
+                       _masked(pool.sample(pool.emails, rng, n), rng.random(n) <= 0.06),
+                       pool.sample(pool.cities, rng, n).tolist(),
+                       pool.sample(pool.states, rng, n).tolist(),
+                       _iso(_days_ago(730, n, rng))))
+
+def vec_products(ids, rng, pool):
+    for pid in _blocks(ids):
+        n = len(pid)
+        names = pool.sample(pool.words, rng, n) + " " + _pick(rng, ["Cable","Stand","Mouse","Hub","Adapter","Drive","Router"], n)
+        yield list(zip(pid.tolist(), names.tolist(),
+                       _pick(rng, ["Accessories","Office","Audio","Storage","Networking"], n).tolist(),
+                       _masked(_money(rng, 8, 220, n), rng.random(n) < 0.04),
+                       [1]*n))
+
+def vec_orders(n_customers, n_products, ids, rng, first_item_id=1):
+    """Yields (order_rows, order_item_rows) blocks; item ids are contiguous from first_item_id."""
+    next_item = first_item_id
+    for oid in _blocks(ids):
+        n = len(oid)
+        ship = np.round(np.maximum(0, rng.normal(6, 2, n)), 2)
+        orders = list(zip(oid.tolist(), rng.integers(1, n_customers+1, n).tolist(),
+                          _iso(_days_ago(364, n, rng)),
+                          _pick(rng, ["Shipped","Shipped","Shipped","Returned","Canceled"], n).tolist(),
+                          _pick(rng, ["Web","Mobile","Partner"], n).tolist(),
+                          _masked(ship, rng.random(n) < 0.03)))
+        # 1-5 items per order
+        counts = rng.integers(1, MAX_ITEMS_PER_ORDER+1, n)
+        m = int(counts.sum())
+        items = list(zip(range(next_item, next_item+m), np.repeat(oid, counts).tolist(),
+                         rng.integers(1001, 1001+n_products, m).tolist(),
+                         rng.integers(1, 5, m).tolist(),
+                         _masked(_money(rng, 8, 220, m), rng.random(m) < 0.03),
+                         _masked(_money(rng, 0, 10, m), rng.random(m) < 0.20)))
+        next_item += m
+        yield orders, items
+
+def vec_employees(ids, rng, pool):
+    depts = ["Sales","Engineering","Support","Finance","Marketing"]
+    roles = {"Sales":["AE","SDR"],"Engineering":["SWE","SRE","Data"],"Support":["T1","T2"],"Finance":["Analyst"],"Marketing":["Coordinator","Manager"]}
+    role_table = np.array([roles[d] + [None]*(3-len(roles[d])) for d in depts], dtype=object)
+    role_counts = np.array([len(roles[d]) for d in depts])
+    dirty = np.array([d.lower()+" " for d in depts], dtype=object)
+    today = np.datetime64(date.today(), "D")
+    for eid in _blocks(ids):
+        n = len(eid)
+        dept = rng.integers(0, len(depts), n)
+        role = role_table[dept, (rng.random(n) * role_counts[dept]).astype(int)]
+        hire = _days_ago(6*365, n, rng, min_days=30)
+        # termination: uniform between hire date and today for the 22% who left
+        tenure = (today - hire).astype(int)
+        term = hire + (rng.random(n) * (tenure+1)).astype(int)
+        salary = rng.uniform(45000, 160000, n).astype(int)
+        dept_names = np.where(rng.random(n) > 0.10, np.array(depts, dtype=object)[dept], dirty[dept])
+        yield list(zip(eid.tolist(), pool.sample(pool.names, rng, n).tolist(), dept_names.tolist(), role.tolist(),
+                       _pick(rng, ["Remote","NYC","ATL","CLT","CHI"], n).tolist(),
+                       _iso(hire),
+                       _masked(term.astype(str), rng.random(n) >= 0.22),
+                       _masked(salary, rng.random(n) < 0.03),
+                       rng.integers(1, 6, n).tolist()))
+
+def vec_appointments(ids, rng, providers):
+    base = np.datetime64(date.today() - timedelta(days=365), "D")
+    for aid in _blocks(ids):
+        n = len(aid)
+        booked = base + rng.integers(0, 361, n)
+        appt = booked + rng.integers(0, 41, n)
+        yield list(zip(aid.tolist(), rng.integers(2000, 6001, n).tolist(),
+                       _pick(rng, ["North","South","East","West"], n).tolist(),
+                       _masked(_pick(rng, providers, n), rng.random(n) < 0.02, "  "),
+                       _iso(booked), _iso(appt),
+                       _pick(rng, ["Completed","Completed","Completed","NoShow","Canceled"], n).tolist(),
+                       _pick(rng, ["Commercial","Medicaid","Medicare","SelfPay"], n).tolist()))
+
+def vec_subscriptions(n_accounts, ids, rng, pool):
+    plans = np.array(["Basic","Pro","Business"], dtype=object)
+    prices = np.array([19, 49, 99])
+    today = np.datetime64(date.today(), "D")
+    for sid in _blocks(ids):
+        n = len(sid)
+        plan = rng.integers(0, len(plans), n)
+        start = _days_ago(2*365, n, rng, min_days=10)
+        end = start + (rng.random(n) * ((today - start).astype(int)+1)).astype(int)
+        yield list(zip(sid.tolist(), rng.integers(9000, 9000+n_accounts, n).tolist(),
+                       plans[plan].tolist(), _iso(start),
+                       _masked(end.astype(str), rng.random(n) >= 0.28),
+                       prices[plan].tolist(),
+                       _pick(rng, ["Healthcare","Retail","Manufacturing","Tech","Education"], n).tolist(),
+                       _masked(_pick(rng, [1,2,3,5,10,15,25,50], n), rng.random(n) < 0.03)))
+
+def write_blocks(rel_path, header, blocks, root=None):
+    with open_sink(rel_path, header, root) as sink:
+        for block in blocks:
+            sink.write_chunk(block)
+    return sink.rows
+
+def write_order_blocks(blocks, root=None, orders_path=ORDERS[0], items_path=ORDER_ITEMS[0]):
+    with open_sink(orders_path, ORDERS[1], root) as orders, open_sink(items_path, ORDER_ITEMS[1], root) as order_items:
+        for order_rows, item_rows in blocks:
+            orders.write_chunk(order_rows)
+            order_items.write_chunk(item_rows)
+    return orders.rows + order_items.rows
+
+def require_numpy():
+    if np is None:
+        raise SystemExit("--backend numpy needs numpy: pip install numpy")
+
+def gen_numpy(sizes, seed=7, root=None, pool_size=POOL_SIZE):
+    """Single-stream numpy generation of every table; returns total rows written."""
+    require_numpy()
+    rng = np.random.default_rng(seed)
+    fk = Faker()
+    fk.seed_instance(seed)
+    pool = FakerPool(fk, pool_size)
+    rows = write_blocks(CUSTOMERS[0], CUSTOMERS[1], vec_customers(range(1, sizes["customers"]+1), rng, pool), root)
+    rows += write_blocks(PRODUCTS[0], PRODUCTS[1], vec_products(range(1001, 1001+sizes["products"]), rng, pool), root)
+    rows += write_order_blocks(vec_orders(sizes["customers"], sizes["products"], range(50001, 50001+sizes["orders"]), rng), root)
+    rows += write_blocks(EMPLOYEES[0], EMPLOYEES[1], vec_employees(range(1, sizes["employees"]+1), rng, pool), root)
+    rows += write_blocks(APPOINTMENTS[0], APPOINTMENTS[1], vec_appointments(range(1, sizes["appointments"]+1), rng, make_providers(fk)), root)
+    rows += write_blocks(SUBSCRIPTIONS[0], SUBSCRIPTIONS[1], vec_subscriptions(sizes["accounts"], range(1, sizes["subscriptions"]+1), rng, pool), root)
+    return rows
+
+# ---------- Sharded parallel generation ----------
+#
+# Each table's id range is split into contiguous shards. Every shard draws
+# from its own random.Random + Faker seeded from (seed, table, shard), so the
+# output depends only on the seed and shard count, never on worker count or
+# scheduling. Shards write <name>.part-NNNNN.csv files that can be
+# concatenated (in shard order) into the usual single CSV.
+
+# table -> (first id, size key, output files)
+SHARDED_TABLES = {
+    "customers": (1, "customers", [CUSTOMERS]),
+    "products": (1001, "products", [PRODUCTS]),
+    "orders": (50001, "orders", [ORDERS, ORDER_ITEMS]),
+    "employees": (1, "employees", [EMPLOYEES]),
+    "appointments": (1, "appointments", [APPOINTMENTS]),
+    "subscriptions": (1, "subscriptions", [SUBSCRIPTIONS]),
+}
+
+def shard_seed(seed, table, shard):
+    """Stable across processes and Python versions (unlike hash())."""
+    digest = hashlib.sha256(f"{seed}:{table}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def shard_rngs(seed, table, shard):
+    s = shard_seed(seed, table, shard)
+    fk = Faker()
+    fk.seed_instance(s)
+    return random.Random(s), fk
+
+def shard_ranges(first_id, n, shards):
+    """Split [first_id, first_id+n) into `shards` contiguous, near-equal ranges."""
+    shards = max(1, min(shards, n))
+    base, extra = divmod(n, shards)
+    ranges, lo = [], first_id
+    for i in range(shards):
+        hi = lo + base + (1 if i < extra else 0)
+        ranges.append(range(lo, hi))
+        lo = hi
+    return ranges
+
+def part_path(rel_path, shard):
+    stem, ext = os.path.splitext(rel_path)
+    return f"{stem}.part-{shard:05d}{ext}"
+
+_POOLS = {}
+
+def shared_pool(seed):
+    """One FakerPool per seed per process, shared by every numpy shard."""
+    if seed not in _POOLS:
+        _, fk = shard_rngs(seed, "pool", 0)
+        _POOLS[seed] = FakerPool(fk)
+    return _POOLS[seed]
+
+def gen_numpy_shard(table, shard, ids, sizes, seed=7, root=None):
+    require_numpy()
+    rng = np.random.default_rng(shard_seed(seed, table, shard))
+    files = SHARDED_TABLES[table][2]
+    if table == "orders":
+        first_item_id = (ids.start - 50001) * MAX_ITEMS_PER_ORDER + 1
+        blocks = vec_orders(sizes["customers"], sizes["products"], ids, rng, first_item_id)
+        return table, shard, write_order_blocks(blocks, root, part_path(ORDERS[0], shard), part_path(ORDER_ITEMS[0], shard))
+    if table == "customers": blocks = vec_customers(ids, rng, shared_pool(seed))
+    elif table == "products": blocks = vec_products(ids, rng, shared_pool(seed))
+    elif table == "employees": blocks = vec_employees(ids, rng, shared_pool(seed))
+    elif table == "appointments":
+        _, providers_fk = shard_rngs(seed, "providers", 0)
+        blocks = vec_appointments(ids, rng, make_providers(providers_fk))
+    else: blocks = vec_subscriptions(sizes["accounts"], ids, rng, shared_pool(seed))
+    rel_path, header = files[0]
+    return table, shard, write_blocks(part_path(rel_path, shard), header, blocks, root)
+
+def gen_shard(table, shard, ids, sizes, seed=7, chunk_size=CHUNK_SIZE, root=None, backend="python"):
+    """Generate one shard of one table; returns (table, shard, rows_written)."""
+    if backend == "numpy":
+        return gen_numpy_shard(table, shard, ids, sizes, seed, root)
+    rng, fk = shard_rngs(seed, table, shard)
+    files = SHARDED_TABLES[table][2]
+    if table == "orders":
+        product_ids = list(range(1001, 1001+sizes["products"]))
+        # Item ids: each order owns at most MAX_ITEMS_PER_ORDER ids, so shards never overlap
+        first_item_id = (ids.start - 50001) * MAX_ITEMS_PER_ORDER + 1
+        rows = iter_orders(sizes["customers"], product_ids, ids, rng, fk, first_item_id)
+        written = write_orders(rows, chunk_size, root, part_path(ORDERS[0], shard), part_path(ORDER_ITEMS[0], shard))
+        return table, shard, written
+    if table == "customers": rows = iter_customers(ids, rng, fk)
+    elif table == "products": rows = iter_products(ids, rng, fk)
+    elif table == "employees": rows = iter_employees(ids, rng, fk)
+    elif table == "appointments":
+        # every shard shares one provider roster
+        _, providers_fk = shard_rngs(seed, "providers", 0)
+        rows = iter_appointments(ids, rng, fk, make_providers(providers_fk))
+    else: rows = iter_subscriptions(sizes["accounts"], ids, rng, fk)
+    rel_path, header = files[0]
+    return table, shard, write_csv(part_path(rel_path, shard), header, rows, chunk_size, root)
+
+def _gen_shard_task(args):
+    return gen_shard(*args)
+
+def concat_parts(rel_path, shards, root=None):
+    """Merge part files in shard order into rel_path (one header) and remove them."""
+    root = root or ROOT
+    if OUTPUT["format"] == "parquet":
+        return concat_parquet_parts(rel_path, shards, root)
+    with open(os.path.join(root, rel_path), "wb") as out:
+        for shard in range(shards):
+            part = os.path.join(root, part_path(rel_path, shard))
+            with open(part, "rb") as f:
+                header = f.readline()
+                if shard == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out, WRITE_BUFFER)
+            os.remove(part)
+
+def concat_parquet_parts(rel_path, shards, root):
+    """Copy the parts' row groups, in shard order, into one Parquet file and remove the parts."""
+    import pyarrow.parquet as pq
+    parts = [os.path.join(root, out_path(part_path(rel_path, shard))) for shard in range(shards)]
+    writer = None
+    for part in parts:
+        pf = pq.ParquetFile(part)
+        if writer is None:
+            compression = None if OUTPUT["compression"] == "none" else OUTPUT["compression"]
+            writer = pq.ParquetWriter(os.path.join(root, out_path(rel_path)), pf.schema_arrow, compression=compression)
+        for i in range(pf.num_row_groups):
+            writer.write_table(pf.read_row_group(i), row_group_size=OUTPUT["row_group_size"])
+        pf.close()
+        os.remove(part)
+    if writer is not None:
+        writer.close()
+
+def generate_sharded(sizes, shards, workers, seed=7, chunk_size=CHUNK_SIZE, root=None, concat=False, tables=None,
+                     backend="python"):
+    """Generate every table in shards across `workers` processes; returns total rows written."""
+    tasks, shard_counts = [], {}
+    for table in tables or SHARDED_TABLES:
+        first_id, size_key, _ = SHARDED_TABLES[table]
+        ranges = shard_ranges(first_id, sizes[size_key], shards)
+        shard_counts[table] = len(ranges)
+        tasks += [(table, i, ids, sizes, seed, chunk_size, root, backend) for i, ids in enumerate(ranges)]
+    # Biggest shards first keeps the pool busy until the end
+    tasks.sort(key=lambda t: -len(t[2]))
+    if workers <= 1:
+        results = [_gen_shard_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_output,
+                                 initargs=(OUTPUT["format"], OUTPUT["compression"], OUTPUT["row_group_size"])) as pool:
+            results = list(pool.map(_gen_shard_task, tasks))
+    if concat:
+        for table, n in shard_counts.items():
+            for rel_path, _ in SHARDED_TABLES[table][2]:
+                concat_parts(rel_path, n, root)
+    return sum(rows for _, _, rows in results)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Generate synthetic CSVs (or Parquet files) for every project.")
+    p.add_argument("--scale", type=float, default=1.0,
+                   help="multiply every default table size (e.g. 1000 for ~2M retail orders)")
+    p.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per buffered write")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--root", default=ROOT, help="output root (default: the portfolio folder)")
+    p.add_argument("--workers", type=int, default=0,
+                   help="generate in parallel shards with N processes (0 = classic single-stream mode)")
+    p.add_argument("--shards", type=int, help="shards per table (default: --workers); fixes the output for a seed")
+    p.add_argument("--concat", action="store_true", help="merge shard part files into one CSV per table")
+    p.add_argument("--backend", choices=["python", "numpy"], default="python",
+                   help="numpy draws whole columns at once (same schema and dirty rates, much faster)")
+    p.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                   help="parquet writes typed <name>.parquet files instead (needs pyarrow)")
+    p.add_argument("--compression", default="zstd", help="parquet codec: zstd, snappy, gzip, lz4, brotli or none")
+    p.add_argument("--row-group-size", type=int, default=131_072, help="parquet rows per row group")
+    args = p.parse_args(argv)
+    set_output(args.format, args.compression, args.row_group_size)
+
+    sizes = default_sizes(args.scale)
+    t0 = time.perf_counter()
+    if args.workers:
+        rows = generate_sharded(sizes, args.shards or args.workers, args.workers, args.seed,
+                                args.chunk_size, args.root, args.concat, backend=args.backend)
+        elapsed = time.perf_counter() - t0
+        print(f"Generated {rows:,} rows in {elapsed:.1f}s ({rows/elapsed:,.0f} rows/s) under {args.root}.")
+        return
+    if args.backend == "numpy":
+        rows = gen_numpy(sizes, args.seed, args.root)
+        elapsed = time.perf_counter() - t0
+        print(f"Generated {rows:,} rows in {elapsed:.1f}s ({rows/elapsed:,.0f} rows/s) under {args.root}.")
+        return
+    random.seed(args.seed)
+    gen_retail(sizes["customers"], sizes["products"], sizes["orders"], args.chunk_size, args.root)
+    gen_hr(sizes["employees"], args.chunk_size, args.root)
+    gen_healthcare(sizes["appointments"], args.chunk_size, args.root)
+    gen_saas(sizes["accounts"], sizes["subscriptions"], args.chunk_size, args.root)
+    print(f"Generated all {args.format.upper()} files into each project's data/raw/ folder under {args.root} "
+          f"in {time.perf_counter()-t0:.1f}s.")
 
 if __name__ == "__main__":
-    gen_retail()
-    gen_hr()
-    gen_healthcare()
-    gen_saas()
-    print("Generated all CSVs into each project's data/raw/ folder.")
+    main()
@@ -0,0 +1,150 @@
+# bench_calendar.py
+"""
+SaaS MRR, churn-by-month and cohort-retention query times: the recursive
+month-calendar versions (kept below as they were in 04_analysis.sql) vs the
+dim_calendar interval joins now in 04_saas_subscriptions/sql/sqlite/04_analysis.sql.
+Both run on the same loaded database and must return the same rows.
+
+    python utils/data_generator/generate_all.py --backend numpy --scale 1250 --root /tmp/saas1m  # 1M subscriptions
+    python utils/pipeline/bench_calendar.py --data-root /tmp/saas1m
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from db import connect
+from run_pipeline import run_project
+from sql_stages import ROOT, discover_projects
+
+RECURSIVE = {
+    "mrr": """
+WITH RECURSIVE bounds AS (
+  SELECT
+    date(MIN(start_date), 'start of month') AS min_month,
+    date(MAX(COALESCE(end_date, date('now'))), 'start of month') AS max_month
+  FROM subscriptions
+),
+months(m) AS (
+  SELECT min_month FROM bounds
+  UNION ALL
+  SELECT date(m, '+1 month')
+  FROM months, bounds
+  WHERE m < max_month
+),
+active AS (
+  SELECT months.m AS month_start, s.subscription_id, s.monthly_price
+  FROM months
+  JOIN subscriptions s
+    ON date(s.start_date) <= date(months.m, '+1 month', '-1 day')
+   AND (s.end_date IS NULL OR date(s.end_date) >= months.m)
+)
+SELECT month_start, COUNT(DISTINCT subscription_id) AS active_subs, ROUND(SUM(monthly_price),2) AS mrr
+FROM active
+GROUP BY 1
+ORDER BY 1""",
+    "churn_by_month": """
+WITH churn AS (
+  SELECT date(end_date, 'start of month') AS churn_month, COUNT(DISTINCT account_id) AS churned_accounts
+  FROM subscriptions
+  WHERE end_date IS NOT NULL
+  GROUP BY 1
+)
+SELECT churn_month, churned_accounts
+FROM churn
+ORDER BY churn_month""",
+    "cohort_retention": """
+WITH cohorts AS (
+  SELECT account_id, date(MIN(start_date), 'start of month') AS cohort_month
+  FROM subscriptions
+  GROUP BY 1
+),
+calendar AS (
+  WITH RECURSIVE months(m) AS (
+    SELECT date((SELECT MIN(cohort_month) FROM cohorts))
+    UNION ALL
+    SELECT date(m, '+1 month') FROM months
+    WHERE m < date('now', 'start of month')
+  )
+  SELECT m FROM months
+),
+active_accounts AS (
+  SELECT c.cohort_month, cal.m AS month_start, COUNT(DISTINCT s.account_id) AS active_accounts
+  FROM cohorts c
+  JOIN calendar cal
+  LEFT JOIN subscriptions s
+    ON s.account_id = c.account_id
+   AND date(s.start_date) <= date(cal.m, '+1 month', '-1 day')
+   AND (s.end_date IS NULL OR date(s.end_date) >= cal.m)
+  WHERE cal.m >= c.cohort_month
+  GROUP BY 1,2
+),
+cohort_size AS (
+  SELECT cohort_month, COUNT(*) AS cohort_accounts
+  FROM cohorts
+  GROUP BY 1
+)
+SELECT a.cohort_month, a.month_start, a.active_accounts, cs.cohort_accounts,
+       ROUND(100.0 * a.active_accounts / cs.cohort_accounts, 2) AS retention_pct
+FROM active_accounts a
+JOIN cohort_size cs ON cs.cohort_month = a.cohort_month
+ORDER BY a.cohort_month, a.month_start""",
+}
+# position of each query among the SELECTs of 04_analysis.sql
+ANALYSIS_INDEX = {"mrr": 0, "churn_by_month": 1, "cohort_retention": 3}
+
+
+def timed(conn, sql):
+    cur = conn.cursor()
+    t0 = time.perf_counter()
+    cur.execute(sql)
+    rows = cur.fetchall()
+    return time.perf_counter() - t0, rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Recursive month calendar vs dim_calendar interval joins (SaaS, SQLite).")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read CSVs from <data-root>/<project>/data/raw")
+    p.add_argument("--db", help="SaaS database already built by run_pipeline.py (default: build a scratch one)")
+    p.add_argument("--skip-recursive", action="store_true", help="only time the dim_calendar queries")
+    args = p.parse_args()
+
+    project = discover_projects(args.root, ["saas"], args.data_root)[0]
+    scratch = None
+    target = args.db
+    if target is None:
+        scratch = tempfile.mkdtemp(prefix="bench-calendar-")
+        target = os.path.join(scratch, f"{project.name}.db")
+        conn = connect(target)
+        result = run_project(conn, project, "sqlite", target, ["01", "02", "03"], args.root)
+        conn.close()
+        if not result.ok:
+            raise SystemExit(f"building {project.name} failed")
+        load = next(s for s in result.stages if s.stage == "02_load_data")
+        built = next(t for t in load.statements if t.summary == "(dim_calendar)")
+        print(f"dim_calendar: {built.rows:,} days built in {built.seconds * 1e3:.1f} ms")
+
+    analysis = [s for s in project.stages("sqlite", ["04"])[0].statements() if s.kind in ("SELECT", "WITH")]
+    conn = connect(target)
+    try:
+        subs = conn.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+        print(f"{project.name}: {subs:,} subscriptions")
+        print(f"{'query':<18} {'recursive s':>12} {'dim_calendar s':>15} {'speedup':>8} {'rows':>6}  same rows")
+        for label, sql in RECURSIVE.items():
+            after, after_rows = timed(conn, analysis[ANALYSIS_INDEX[label]].sql)
+            if args.skip_recursive:
+                print(f"{label:<18} {'-':>12} {after:>15.3f} {'-':>8} {len(after_rows):>6}")
+                continue
+            before, before_rows = timed(conn, sql)
+            print(f"{label:<18} {before:>12.3f} {after:>15.3f} {before / after:>7.1f}x {len(after_rows):>6}  "
+                  f"{'yes' if before_rows == after_rows else 'NO'}")
+    finally:
+        conn.close()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
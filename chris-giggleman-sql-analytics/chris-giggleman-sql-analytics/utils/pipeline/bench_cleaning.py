@@ -0,0 +1,102 @@
+# bench_cleaning.py
+"""
+Per-table cleaning time: the UPDATE-based 03_cleaning.sql scripts vs the
+load-time cleaning spec (+ cleaning_post_load.sql), on SQLite, and a check
+that both leave identical tables.
+
+For the spec, a table's cleaning time is its extra load time over a plain
+load plus its post-load UPDATEs.
+
+    python utils/data_generator/generate_all.py --backend numpy --scale 100 --root /tmp/big
+    python utils/pipeline/bench_cleaning.py --data-root /tmp/big
+"""
+import argparse
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+
+from cleaning import CleaningSpec, post_load_stage
+from loader import SQLITE_LOAD_PRAGMAS, bulk_load, plan_loads, set_pragmas
+from sql_stages import ROOT, discover_projects
+
+_UPDATE_RE = re.compile(r"^\s*UPDATE\s+(\w+)", re.IGNORECASE)
+
+
+def build(path, project, spec):
+    """Create + load (optionally cleaning on the way in); returns ({table: load seconds}, conn)."""
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    for s in project.stages("sqlite", ["01"])[0].statements():
+        conn.execute(s.sql)
+    previous = set_pragmas(conn, SQLITE_LOAD_PRAGMAS)
+    conn.execute("BEGIN")
+    loads = bulk_load(conn, plan_loads(conn, project), spec=spec)
+    conn.execute("COMMIT")
+    set_pragmas(conn, previous)
+    return {r.table: r.seconds for r in loads if r.path}, conn
+
+
+def run_updates(conn, stage):
+    """Run a stage's statements in one transaction; returns {table: seconds}."""
+    per_table = defaultdict(float)
+    conn.execute("BEGIN")
+    for s in stage.statements():
+        m = _UPDATE_RE.match(s.sql)
+        t0 = time.perf_counter()
+        conn.execute(s.sql)
+        per_table[m.group(1) if m else "(other)"] += time.perf_counter() - t0
+    conn.execute("COMMIT")
+    return per_table
+
+
+def table_diff(a, b, table):
+    """Rows present in one database's table but not the other's."""
+    a.execute(f"ATTACH DATABASE '{b}' AS other")
+    n = a.execute(
+        f"SELECT (SELECT COUNT(*) FROM (SELECT * FROM main.{table} EXCEPT SELECT * FROM other.{table}))"
+        f"     + (SELECT COUNT(*) FROM (SELECT * FROM other.{table} EXCEPT SELECT * FROM main.{table}))"
+    ).fetchone()[0]
+    a.execute("DETACH DATABASE other")
+    return n
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="CSV root from generate_all.py --root")
+    p.add_argument("--project", nargs="+")
+    args = p.parse_args(argv)
+
+    print(f"{'table':<16} {'rows':>10} {'scripts s':>10} {'spec s':>9} {'speedup':>8}  identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for project in discover_projects(args.root, args.project, args.data_root):
+            spec = CleaningSpec.load(project)
+            if spec is None:
+                continue
+            scripts_db = os.path.join(tmp, "scripts.db")
+            spec_db = os.path.join(tmp, "spec.db")
+            plain_load, scripts_conn = build(scripts_db, project, None)
+            scripts = run_updates(scripts_conn, [s for s in project.stages("sqlite") if s.is_cleaning][0])
+            spec_load, spec_conn = build(spec_db, project, spec)
+            post = post_load_stage(project, "sqlite")
+            post_times = run_updates(spec_conn, post) if post else {}
+            spec_conn.close()
+
+            print(project.name)
+            for table in plain_load:
+                rows = scripts_conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                spec_secs = max(0.0, spec_load[table] - plain_load[table]) + post_times.get(table, 0.0)
+                script_secs = scripts.get(table, 0.0)
+                diff = table_diff(scripts_conn, spec_db, table)
+                speedup = f"{script_secs / spec_secs:.1f}x" if spec_secs > 0 else "-"
+                print(f"  {table:<14} {rows:>10,} {script_secs:>10.3f} {spec_secs:>9.3f} {speedup:>8}  "
+                      + ("yes" if diff == 0 else f"NO ({diff} rows differ)"))
+            scripts_conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_loader.py
+"""
+Load a project's CSVs into SQLite three ways and compare rows/sec:
+
+- row-at-a-time: one INSERT per row, default PRAGMAs (what a naive import does)
+- executemany:   batched inserts, default PRAGMAs, indexes/FKs maintained per row
+- bulk:          loader.bulk_load with SQLITE_LOAD_PRAGMAS, deferred indexes
+                 and a single foreign-key check
+
+Peak RSS is printed to show memory stays bounded whatever the file size.
+
+    python utils/data_generator/generate_all.py --backend numpy --scale 100 --root /tmp/big
+    python utils/pipeline/bench_loader.py --data-root /tmp/big --project retail
+"""
+import argparse
+import csv
+import os
+import resource
+import sqlite3
+import tempfile
+import time
+
+from loader import SQLITE_LOAD_PRAGMAS, bulk_load, insert_sql, plan_loads, set_pragmas
+from sql_stages import ROOT, discover_projects
+
+
+def fresh_db(path, project):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    for s in project.stages("sqlite", ["01"])[0].statements():
+        conn.execute(s.sql)
+    return conn
+
+
+def row_at_a_time(conn, plan):
+    conn.execute("BEGIN")
+    for d in plan:
+        sql = insert_sql(d)
+        with open(d.path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                conn.execute(sql, row)
+    conn.execute("COMMIT")
+
+
+def executemany(conn, plan):
+    conn.execute("BEGIN")
+    bulk_load(conn, plan, defer_indexes=False)
+    conn.execute("COMMIT")
+
+
+def bulk(conn, plan):
+    previous = set_pragmas(conn, SQLITE_LOAD_PRAGMAS)
+    conn.execute("BEGIN")
+    bulk_load(conn, plan, check_foreign_keys=previous.get("foreign_keys") == "1")
+    conn.execute("COMMIT")
+    set_pragmas(conn, previous)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="CSV root from generate_all.py --root")
+    p.add_argument("--project", default="retail")
+    args = p.parse_args(argv)
+    project = discover_projects(args.root, [args.project], args.data_root)[0]
+
+    print(f"{'method':<16} {'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        for name, fn in (("row-at-a-time", row_at_a_time), ("executemany", executemany), ("bulk", bulk)):
+            conn = fresh_db(db, project)
+            plan = plan_loads(conn, project)
+            t0 = time.perf_counter()
+            fn(conn, plan)
+            elapsed = time.perf_counter() - t0
+            rows = sum(conn.execute(f"SELECT COUNT(*) FROM {d.table}").fetchone()[0] for d in plan)
+            conn.close()
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{name:<16} {rows:>10,} {elapsed:>9.2f} {rows/elapsed:>10,.0f} {rss:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# bench_materialize.py
+"""
+Query times over each materialized view before (plain view) and after
+(stored, indexed rows), using the queries in the project's
+materialized_views.json, plus the refresh cost that buys the speed-up.
+
+"Before" re-creates the view's definition as a TEMP VIEW of the same name,
+which shadows the stored one for the session, so both runs execute the
+same query text and must return the same rows.
+
+    python utils/pipeline/bench_materialize.py --data-root /tmp/big --project retail
+    python utils/pipeline/bench_materialize.py --project retail --db build/01_retail_sales_analytics.db
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from db import connect, dialect_of
+from materialize import STATE_TABLE, load_config
+from run_pipeline import run_project
+from sql_stages import ROOT, discover_projects
+
+
+def best_of(conn, sql, repeat):
+    """(fastest seconds, rows) over `repeat` runs."""
+    best, rows = float("inf"), None
+    for _ in range(repeat):
+        cur = conn.cursor()
+        t0 = time.perf_counter()
+        cur.execute(sql)
+        rows = cur.fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best, rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Analysis query times over plain vs materialized views.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read CSVs from <data-root>/<project>/data/raw")
+    p.add_argument("--project", required=True, help="project number or name fragment")
+    p.add_argument("--db", help="database already built by run_pipeline.py (default: build a scratch SQLite one)")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    project = discover_projects(args.root, [args.project], args.data_root)[0]
+    config = load_config(project)
+    if not config:
+        raise SystemExit(f"{project.name} has no materialized_views.json")
+
+    scratch = None
+    target = args.db
+    if target is None:
+        scratch = tempfile.mkdtemp(prefix="bench-mv-")
+        target = os.path.join(scratch, f"{project.name}.db")
+        conn = connect(target)
+        result = run_project(conn, project, "sqlite", target, ["01", "02", "03", "05"], args.root)
+        conn.close()
+        if not result.ok:
+            raise SystemExit(f"building {project.name} failed")
+
+    conn = connect(target)
+    try:
+        cur = conn.cursor()
+        temp = "temp" if dialect_of(conn) == "sqlite" else "pg_temp"
+        print(f"{project.name}: {target}")
+        print(f"{'query':<32} {'view ms':>10} {'stored ms':>10} {'speedup':>8}  same rows")
+        for mv in config.values():
+            cur.execute(f"SELECT definition, refresh_seconds FROM {STATE_TABLE} WHERE name = '{mv.name}'")
+            definition, refresh_seconds = cur.fetchone()
+            saved = 0.0
+            for label, sql in mv.queries.items():
+                cur.execute(f"CREATE TEMP VIEW {mv.name} AS {definition}")
+                before, before_rows = best_of(conn, sql, args.repeat)
+                cur.execute(f"DROP VIEW {temp}.{mv.name}")
+                after, after_rows = best_of(conn, sql, args.repeat)
+                saved += before - after
+                speedup = before / after if after else float("inf")
+                print(f"{mv.name + '.' + label:<32} {before * 1e3:>10.2f} {after * 1e3:>10.2f} "
+                      f"{speedup:>7.1f}x  {'yes' if before_rows == after_rows else 'NO'}")
+            print(f"  refresh {mv.name}: {refresh_seconds * 1e3:.1f} ms "
+                  f"(one pass of these queries saves {saved * 1e3:.1f} ms)")
+    finally:
+        conn.close()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
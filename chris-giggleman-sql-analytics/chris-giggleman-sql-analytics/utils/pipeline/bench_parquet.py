@@ -0,0 +1,126 @@
+# bench_parquet.py
+"""
+CSV vs Parquet for a project's raw data: file size, write time, and load
+time into DuckDB (read_csv_auto vs read_parquet) and SQLite (loader.bulk_load
+from each file).
+
+Both formats are written from the same in-memory rows (CSV text, as
+generate_all.py produces them). The Parquet write time therefore includes
+converting the text to the types declared in 01_create_tables.sql.
+
+    python utils/data_generator/generate_all.py --backend numpy --scale 100 --root /tmp/big
+    python utils/pipeline/bench_parquet.py --data-root /tmp/big --project retail --compression zstd snappy none
+"""
+import argparse
+import csv
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from columnar import COMPRESSIONS, DEFAULT_ROW_GROUP_SIZE, ParquetSink, require_pyarrow, schema_for_header
+from db import connect
+from loader import SQLITE_LOAD_PRAGMAS, bulk_load, plan_loads, set_pragmas
+from sql_stages import ROOT, discover_projects
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header, list(reader)
+
+
+def write_csv(path, header, rows):
+    t0 = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+    return time.perf_counter() - t0
+
+
+def write_parquet(path, schema, rows, compression, row_group_size):
+    t0 = time.perf_counter()
+    with ParquetSink(path, schema, compression, row_group_size) as sink:
+        for i in range(0, len(rows), 10_000):
+            sink.write_chunk(rows[i:i + 10_000])
+    return time.perf_counter() - t0
+
+
+def duckdb_load(path):
+    import duckdb
+    reader = "read_parquet" if path.endswith(".parquet") else "read_csv_auto"
+    conn = duckdb.connect()
+    t0 = time.perf_counter()
+    conn.execute(f"CREATE TABLE t AS SELECT * FROM {reader}('{path}')")
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed
+
+
+def sqlite_load(root, name, data_root, db_path):
+    """Seconds for bulk_load of every file under data_root into fresh tables (indexes rebuilt included)."""
+    project = discover_projects(root, [name], data_root)[0]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = connect(db_path)
+    for s in project.stages("sqlite", ["01"])[0].statements():
+        conn.execute(s.sql)
+    previous = set_pragmas(conn, SQLITE_LOAD_PRAGMAS)
+    t0 = time.perf_counter()
+    conn.execute("BEGIN")
+    bulk_load(conn, plan_loads(conn, project))
+    conn.execute("COMMIT")
+    elapsed = time.perf_counter() - t0
+    set_pragmas(conn, previous)
+    conn.close()
+    return elapsed
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="CSV vs Parquet: size, write time, DuckDB and SQLite load time.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="CSV root from generate_all.py --root (default: the sample data)")
+    p.add_argument("--project", default="retail")
+    p.add_argument("--compression", nargs="+", choices=COMPRESSIONS, default=["zstd", "snappy"])
+    p.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    p.add_argument("--no-duckdb", action="store_true", help="skip the DuckDB loads (duckdb not installed)")
+    args = p.parse_args(argv)
+    require_pyarrow()
+
+    project = discover_projects(args.root, [args.project], args.data_root)[0]
+    tables = [(os.path.basename(path)[:-4], *read_csv(path))
+              for path in sorted(glob.glob(os.path.join(project.data_dir, "*.csv")))]
+    print(f"{project.name}: " + ", ".join(f"{name} {len(rows):,}" for name, _, rows in tables) + " rows")
+
+    scratch = tempfile.mkdtemp(prefix="bench-parquet-")
+    try:
+        formats = [("csv", None)] + [("parquet", c) for c in args.compression]
+        print(f"{'format':<16} {'MiB':>8} {'write s':>8} {'duckdb s':>9} {'sqlite s':>9}")
+        for fmt, compression in formats:
+            label = fmt if compression is None else f"{fmt}/{compression}"
+            raw = os.path.join(scratch, label.replace("/", "-"), project.name, "data", "raw")
+            os.makedirs(raw)
+            size = write_s = duck_s = 0.0
+            for name, header, rows in tables:
+                path = os.path.join(raw, f"{name}.{fmt}")
+                if fmt == "csv":
+                    write_s += write_csv(path, header, rows)
+                else:
+                    schema = schema_for_header(project.path, header)
+                    write_s += write_parquet(path, schema, rows, compression, args.row_group_size)
+                size += os.path.getsize(path)
+                if not args.no_duckdb:
+                    duck_s += duckdb_load(path)
+            data_root = os.path.join(scratch, label.replace("/", "-"))
+            sqlite_s = sqlite_load(args.root, project.name, data_root, os.path.join(scratch, "bench.db"))
+            duck = "-" if args.no_duckdb else f"{duck_s:.3f}"
+            print(f"{label:<16} {size / 2**20:>8.2f} {write_s:>8.3f} {duck:>9} {sqlite_s:>9.3f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
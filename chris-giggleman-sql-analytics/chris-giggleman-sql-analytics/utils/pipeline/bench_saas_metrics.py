@@ -0,0 +1,87 @@
+# bench_saas_metrics.py
+"""
+Scaling of the SaaS metrics: the dim_calendar SQL in 04_analysis.sql vs
+the event sweep in saas_metrics.py, on the first N rows of one
+subscriptions.csv for growing N. Both must return the same rows; the
+sweep's time per subscription should stay flat as N grows.
+
+Every prefix also gets EDGE_ROWS: dirty subscriptions that end before they
+start. They are active in no month but still put their account in a cohort,
+which the sweep has to reproduce.
+
+    python utils/data_generator/generate_all.py --backend numpy --scale 1250 --root /tmp/saas1m  # 1M subscriptions
+    python utils/pipeline/bench_saas_metrics.py --data-root /tmp/saas1m --sizes 125000 250000 500000 1000000
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+
+from db import begin, commit, connect
+from dim_calendar import CalendarConfig, ensure_calendar
+from saas_metrics import ANALYSIS_INDEX, compute, read_rows
+from sql_stages import ROOT, discover_projects
+
+# subscription_id, account_id, plan, start_date, end_date, monthly_price, industry, seats
+EDGE_ROWS = [
+    (-1, -1, "Basic", "2024-03-10", "2024-02-20", 19, "Retail", 1),   # its only subscription ends first
+    (-2, -2, "Pro", "2024-05-10", "2024-04-01", 49, "Retail", 3),     # cohort month, then active later
+    (-3, -2, "Pro", "2024-07-01", None, 49, "Retail", 3),
+]
+
+
+def load_prefix(project, csv_path, n):
+    """In-memory SaaS database holding the first `n` rows of `csv_path` and EDGE_ROWS, plus dim_calendar."""
+    conn = connect(":memory:")
+    for s in project.stages("sqlite", ["01"])[0].statements():
+        conn.execute(s.sql)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = ([v if v != "" else None for v in row] for row in itertools.islice(reader, n))
+        begin(conn)
+        conn.executemany(f"INSERT INTO subscriptions ({', '.join(header)}) VALUES ({', '.join('?' * len(header))})",
+                         rows)
+        conn.executemany("INSERT INTO subscriptions (subscription_id, account_id, plan, start_date, end_date, "
+                         "monthly_price, industry, seats) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", EDGE_ROWS)
+        ensure_calendar(conn, CalendarConfig.load(project))
+        commit(conn)
+    return conn
+
+
+def main():
+    p = argparse.ArgumentParser(description="dim_calendar SQL vs event sweep for the SaaS metrics, by size.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read subscriptions.csv from <data-root>/<project>/data/raw")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 20_000, 40_000, 80_000])
+    p.add_argument("--skip-sql", action="store_true", help="only time the sweep")
+    args = p.parse_args()
+
+    project = discover_projects(args.root, ["saas"], args.data_root)[0]
+    csv_path = os.path.join(project.data_dir, "subscriptions.csv")
+    analysis = [s for s in project.stages("sqlite", ["04"])[0].statements() if s.kind in ("SELECT", "WITH")]
+
+    print(f"{'subscriptions':>13} {'sql s':>8} {'sweep s':>8} {'sweep us/sub':>13} {'speedup':>8}  same rows")
+    for n in args.sizes:
+        conn = load_prefix(project, csv_path, n)
+        try:
+            loaded = conn.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+            t0 = time.perf_counter()
+            metrics = compute(read_rows(conn))
+            sweep = time.perf_counter() - t0
+            if args.skip_sql:
+                print(f"{loaded:>13,} {'-':>8} {sweep:>8.3f} {1e6 * sweep / loaded:>13.2f} {'-':>8}")
+                continue
+            t0 = time.perf_counter()
+            expected = {t: [tuple(r) for r in conn.execute(analysis[i].sql)] for t, i in ANALYSIS_INDEX.items()}
+            sql = time.perf_counter() - t0
+            same = all(rows == expected[t] for t, rows in metrics.tables().items())
+            print(f"{loaded:>13,} {sql:>8.3f} {sweep:>8.3f} {1e6 * sweep / loaded:>13.2f} {sql / sweep:>7.1f}x  "
+                  f"{'yes' if same else 'NO'}")
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# cleaning.py
+"""
+Declarative, load-time cleaning.
+
+Each project may ship a cleaning_spec.json next to its README describing the
+row-level fixes its 03_cleaning.sql performs with whole-table UPDATEs:
+
+    {
+      "employees": {
+        "trim":          ["full_name", "department", "role", "location"],
+        "blank_to_null": ["department", "role", "location"],
+        "normalize":     {"department": {"sales": "Sales", "engineering": "Engineering"}},
+        "defaults":      {"performance_rating": 3}
+      }
+    }
+
+Per column the rules compose in a fixed order, mirroring the scripts:
+    raw -> NULL if '' -> trim -> NULL if '' -> normalize(lower(value)) -> default if NULL
+
+compile_column() turns that into one SQL expression, which the loader puts
+straight into its INSERT (SQLite) or INSERT ... SELECT from a staging table
+(Postgres), so every row is cleaned exactly once, as it streams in.
+
+Set-based steps that need other rows (price inference, salary imputation)
+can't be done per row; they live in sql/<dialect>/cleaning_post_load.sql
+and replace 03_cleaning.sql when the pipeline runs with --cleaning spec.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from sql_stages import Project, Stage
+
+SPEC_FILE = "cleaning_spec.json"
+POST_LOAD_FILE = "cleaning_post_load.sql"
+
+_RULE_KEYS = ("trim", "blank_to_null", "normalize", "defaults")
+
+
+@dataclass
+class ColumnRules:
+    trim: bool = False
+    blank_to_null: bool = False
+    # lower(trimmed value) -> canonical value
+    normalize: Dict[str, str] = field(default_factory=dict)
+    default: Any = None
+
+
+TableRules = Dict[str, ColumnRules]
+
+
+def sql_literal(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def compile_column(ref: str, rules: Optional[ColumnRules]) -> str:
+    """SQL expression cleaning one raw value; `ref` is a placeholder or column name."""
+    expr = f"NULLIF({ref}, '')"
+    if rules is None:
+        return expr
+    if rules.trim:
+        expr = f"TRIM({expr})"
+    if rules.blank_to_null:
+        expr = f"NULLIF({expr}, '')"
+    if rules.normalize:
+        whens = " ".join(
+            f"WHEN {sql_literal(k.lower())} THEN {sql_literal(v)}" for k, v in rules.normalize.items()
+        )
+        expr = f"CASE LOWER({expr}) {whens} ELSE {expr} END"
+    if rules.default is not None:
+        expr = f"COALESCE({expr}, {sql_literal(rules.default)})"
+    return expr
+
+
+class CleaningSpec:
+    def __init__(self, tables: Dict[str, TableRules], path: Optional[str] = None):
+        self.tables = tables
+        self.path = path
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, Any]], path: Optional[str] = None) -> "CleaningSpec":
+        tables: Dict[str, TableRules] = {}
+        for table, spec in data.items():
+            unknown = set(spec) - set(_RULE_KEYS)
+            if unknown:
+                raise ValueError(f"{path or 'cleaning spec'}: unknown rule(s) {sorted(unknown)} for {table}")
+            cols: TableRules = {}
+
+            def rules(col: str) -> ColumnRules:
+                return cols.setdefault(col, ColumnRules())
+
+            for col in spec.get("trim", []):
+                rules(col).trim = True
+            for col in spec.get("blank_to_null", []):
+                rules(col).blank_to_null = True
+            for col, mapping in spec.get("normalize", {}).items():
+                rules(col).normalize = {k.lower(): v for k, v in mapping.items()}
+            for col, value in spec.get("defaults", {}).items():
+                rules(col).default = value
+            tables[table] = cols
+        return cls(tables, path)
+
+    @classmethod
+    def load(cls, project: Project) -> Optional["CleaningSpec"]:
+        """The project's spec, or None if it doesn't have one."""
+        path = os.path.join(project.path, SPEC_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), path)
+
+    def rules_for(self, table: str) -> TableRules:
+        return self.tables.get(table, {})
+
+
+def post_load_stage(project: Project, dialect: str) -> Optional[Stage]:
+    """The set-based remainder of 03_cleaning, or None if the spec covers everything."""
+    path = os.path.join(project.sql_dir(dialect), POST_LOAD_FILE)
+    if not os.path.exists(path):
+        return None
+    return Stage("03", "03_cleaning_post_load", path)
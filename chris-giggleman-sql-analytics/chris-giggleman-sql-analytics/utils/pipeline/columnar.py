@@ -0,0 +1,400 @@
+# columnar.py
+"""
+Parquet (Arrow) files for the case studies, via pyarrow.
+
+Schemas come from each project's 01_create_tables.sql. The Postgres file is
+preferred because it declares what SQLite stores as TEXT/REAL/INTEGER:
+
+    INT / INTEGER / BIGINT      int64
+    NUMERIC(p,s) / DECIMAL      decimal128(p, s)
+    REAL / DOUBLE / FLOAT       float64
+    DATE                        date32
+    TIMESTAMP                   timestamp[us]
+    BOOLEAN                     bool
+    TEXT / VARCHAR / ...        string
+
+Values are converted column by column into the declared type. Empty strings
+become nulls, as they do when the loader reads a CSV. Anything that does not
+convert raises ValueError naming the column.
+
+Writers buffer rows into row groups of --row-group-size rows (readers skip
+and parallelise by row group). --compression is any pyarrow codec.
+
+Uses:
+- ParquetSink is the Parquet counterpart of generate_all.py's CsvSink
+  (generate_all.py --format parquet).
+- loader.py loads a data/raw/<name>.parquet in place of <name>.csv, so types
+  are read from the file instead of parsed from text.
+- export_project() writes a built database's tables (cleaned) and its
+  04_analysis result sets; run_pipeline.py --export-parquet DIR calls it.
+
+    python utils/pipeline/columnar.py --project retail --db build/01_retail_sales_analytics.db --out exports
+    python utils/pipeline/columnar.py --project retail --raw     # data/raw/*.csv -> *.parquet
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import pyarrow as pa  # optional: only needed for Parquet
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+from db import connect, dialect_of
+from sql_stages import ROOT, Project, discover_projects, named_selects
+
+DEFAULT_COMPRESSION = "zstd"
+COMPRESSIONS = ("zstd", "snappy", "gzip", "lz4", "brotli", "none")
+DEFAULT_ROW_GROUP_SIZE = 131_072
+FETCH_SIZE = 10_000
+
+_CREATE_RE = re.compile(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)", re.IGNORECASE | re.DOTALL)
+_CONSTRAINT_RE = re.compile(r"^(PRIMARY|FOREIGN|UNIQUE|CHECK|CONSTRAINT)\b", re.IGNORECASE)
+_NUMERIC_RE = re.compile(r"^(?:NUMERIC|DECIMAL)\s*\(\s*(\d+)\s*(?:,\s*(\d+))?\s*\)", re.IGNORECASE)
+
+
+@dataclass
+class Column:
+    name: str
+    sql_type: str        # as declared, e.g. "NUMERIC(10,2)"
+    not_null: bool = False
+
+
+@dataclass
+class ExportResult:
+    name: str
+    path: str
+    rows: int
+    bytes: int
+    seconds: float
+
+
+def require_pyarrow():
+    if pa is None:
+        raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+
+
+# ---------- Schemas from 01_create_tables.sql ----------
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a column list on commas outside parentheses (NUMERIC(10,2), CHECK (...))."""
+    parts, depth, buf = [], 0, []
+    for c in body:
+        if c == "," and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+            continue
+        depth += (c == "(") - (c == ")")
+        buf.append(c)
+    parts.append("".join(buf).strip())
+    return [p for p in parts if p]
+
+
+def parse_tables(statements) -> Dict[str, List[Column]]:
+    """table -> columns of every CREATE TABLE among `statements`, in order."""
+    tables = {}
+    for s in statements:
+        m = _CREATE_RE.match(s.sql)
+        if not m:
+            continue
+        columns = []
+        for item in _split_top_level(m.group(2)):
+            if _CONSTRAINT_RE.match(item):
+                continue
+            name, rest = (item.split(None, 1) + [""])[:2]
+            numeric = _NUMERIC_RE.match(rest)
+            sql_type = numeric.group(0) if numeric else (rest.split() or ["TEXT"])[0]
+            not_null = bool(re.search(r"\b(NOT\s+NULL|PRIMARY\s+KEY)\b", rest, re.I))
+            columns.append(Column(name, sql_type.upper(), not_null))
+        tables[m.group(1)] = columns
+    return tables
+
+
+def project_tables(project: Project) -> Dict[str, List[Column]]:
+    """The project's tables as declared in 01_create_tables.sql (Postgres types when available)."""
+    for dialect in ("postgres", "sqlite"):
+        if os.path.isdir(project.sql_dir(dialect)):
+            stages = project.stages(dialect, ["01"])
+            if stages:
+                return parse_tables(stages[0].statements())
+    return {}
+
+
+def arrow_type(sql_type: str):
+    t = sql_type.upper()
+    numeric = _NUMERIC_RE.match(t)
+    if numeric:
+        return pa.decimal128(int(numeric.group(1)), int(numeric.group(2) or 0))
+    base = t.split("(")[0].strip()
+    if base in ("INT", "INTEGER", "BIGINT", "SMALLINT", "SERIAL", "BIGSERIAL"):
+        return pa.int64()
+    if base in ("NUMERIC", "DECIMAL", "REAL", "FLOAT", "DOUBLE", "DOUBLE PRECISION"):
+        return pa.float64()
+    if base == "DATE":
+        return pa.date32()
+    if base.startswith("TIMESTAMP"):
+        return pa.timestamp("us")
+    if base in ("BOOLEAN", "BOOL"):
+        return pa.bool_()
+    return pa.string()
+
+
+def arrow_schema(columns: Sequence[Column], order: Optional[Sequence[str]] = None, nullability: bool = True):
+    """
+    Arrow schema for `columns`, optionally reordered to `order`. Without
+    nullability every field is nullable (raw data may break NOT NULL).
+    """
+    by_name = {c.name: c for c in columns}
+    return pa.schema([pa.field(c.name, arrow_type(c.sql_type), nullable=not (nullability and c.not_null))
+                      for c in (by_name[n] for n in order or by_name)])
+
+
+def schema_for_header(project_path: str, header: Sequence[str], nullability: bool = False):
+    """Schema of the table whose columns are exactly `header` (how the loader matches CSVs), in header order."""
+    project = Project(os.path.basename(os.path.normpath(project_path)), project_path)
+    for table, columns in project_tables(project).items():
+        if {c.name for c in columns} == set(header):
+            return arrow_schema(columns, header, nullability)
+    raise ValueError(f"No table in {project.name}/01_create_tables.sql has the columns {list(header)}")
+
+
+# ---------- Rows -> Arrow ----------
+
+def _from_text(text, type_):
+    if pa.types.is_decimal(type_):
+        try:
+            return text.cast(type_)
+        except pa.ArrowInvalid:   # more decimals than the scale: round like the database would
+            return pc.round(text.cast(pa.float64()), type_.scale).cast(type_)
+    if pa.types.is_boolean(type_):
+        return text.cast(pa.int64()).cast(type_)
+    return text.cast(type_)
+
+
+def to_arrow(values: Sequence[Any], type_):
+    """One column of Python values ('' = null) as an Arrow array of type_."""
+    try:
+        # All text (CSV rows, SQLite TEXT): Arrow blanks and parses it
+        text = pa.array(values, pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        text = None
+    if text is not None:
+        text = pc.if_else(pc.equal(text, ""), pa.scalar(None, pa.string()), text)
+        return text if pa.types.is_string(type_) else _from_text(text, type_)
+    values = [None if v == "" else v for v in values]
+    try:
+        return pa.array(values, type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed values (floats for a decimal, ints in a TEXT column): go through their text form
+        return _from_text(pa.array([None if v is None else str(v) for v in values], pa.string()), type_)
+
+
+def record_batch(rows: Sequence[Sequence[Any]], schema):
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        try:
+            arrays.append(to_arrow(values, field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"column {field.name} ({field.type}): {e}") from None
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def result_table(cur):
+    """
+    An executed query's whole result as an Arrow table, types inferred from the
+    values (read whole so a column that starts with NULLs still gets a type).
+    """
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    arrays = []
+    for values in (zip(*rows) if rows else [()] * len(names)):
+        try:
+            arrays.append(pa.array(list(values)))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # SQLite columns can mix types; keep those as text
+            arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def sqlite_values(batch) -> List[tuple]:
+    """Rows of a record batch with values sqlite3 can bind (decimals as float, dates as ISO text)."""
+    columns = []
+    for column in batch.columns:
+        t = column.type
+        if pa.types.is_decimal(t):
+            # via text: Arrow's decimal -> double cast is not correctly rounded (107.99 -> 107.99000000000001)
+            column = column.cast(pa.string()).cast(pa.float64())
+        elif pa.types.is_date(t) or pa.types.is_timestamp(t):
+            column = column.cast(pa.string())
+        elif pa.types.is_boolean(t):
+            column = column.cast(pa.int64())
+        columns.append(column.to_pylist())
+    return list(zip(*columns))
+
+
+# ---------- Writing ----------
+
+class ParquetSink:
+    """Parquet writer that takes rows a chunk at a time, flushing whole row groups."""
+    def __init__(self, path, schema, compression=DEFAULT_COMPRESSION, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        require_pyarrow()
+        self.path = path
+        self.schema = schema
+        self.compression = None if compression == "none" else compression
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._pending, self._pending_rows = [], 0
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        return self
+
+    def write_chunk(self, rows):
+        if rows:
+            self.write_batch(record_batch(rows, self.schema))
+
+    def write_batch(self, batch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        self.rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def _flush(self, final):
+        table = pa.Table.from_batches(self._pending, self.schema)
+        whole = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_size
+        if whole:
+            self._writer.write_table(table.slice(0, whole), row_group_size=self.row_group_size)
+        rest = table.slice(whole)
+        self._pending, self._pending_rows = rest.to_batches(), rest.num_rows
+
+    def __exit__(self, *exc):
+        if exc[0] is None and self._pending_rows:
+            self._flush(final=True)
+        self._writer.close()
+
+
+def write_cursor(cur, path: str, schema, compression: str = DEFAULT_COMPRESSION,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """Stream an executed cursor into `path` in FETCH_SIZE batches; returns rows written."""
+    with ParquetSink(path, schema, compression, row_group_size) as sink:
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            sink.write_chunk(rows)
+    return sink.rows
+
+
+def csv_to_parquet(csv_path: str, parquet_path: str, schema, compression: str = DEFAULT_COMPRESSION,
+                   row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        with ParquetSink(parquet_path, schema, compression, row_group_size) as sink:
+            while True:
+                rows = list(islice(reader, FETCH_SIZE))
+                if not rows:
+                    break
+                sink.write_chunk(rows)
+    return sink.rows
+
+
+def convert_raw(project: Project, compression: str = DEFAULT_COMPRESSION,
+                row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> List[ExportResult]:
+    """Write a typed <name>.parquet next to every data/raw/<name>.csv of the project."""
+    results = []
+    for path in sorted(glob.glob(os.path.join(project.data_dir, "*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        out = path[:-4] + ".parquet"
+        t0 = time.perf_counter()
+        rows = csv_to_parquet(path, out, schema_for_header(project.path, header), compression, row_group_size)
+        results.append(ExportResult(os.path.basename(out)[:-8], out, rows, os.path.getsize(out),
+                                    time.perf_counter() - t0))
+    return results
+
+
+def export_project(conn, project: Project, out_dir: str, compression: str = DEFAULT_COMPRESSION,
+                   row_group_size: int = DEFAULT_ROW_GROUP_SIZE, analysis: bool = True) -> List[ExportResult]:
+    """
+    Write the project's tables to <out_dir>/<table>.parquet with their
+    declared types, and (with `analysis`) every 04_analysis SELECT to
+    <out_dir>/analysis/<name>.parquet with types inferred from the values.
+    """
+    require_pyarrow()
+    results = []
+    cur = conn.cursor()
+    for table, columns in project_tables(project).items():
+        path = os.path.join(out_dir, f"{table}.parquet")
+        t0 = time.perf_counter()
+        cur.execute(f"SELECT {', '.join(c.name for c in columns)} FROM {table}")
+        rows = write_cursor(cur, path, arrow_schema(columns), compression, row_group_size)
+        results.append(ExportResult(table, path, rows, os.path.getsize(path), time.perf_counter() - t0))
+    if analysis:
+        stages = project.stages(dialect_of(conn), ["04"])
+        for name, _, statement in named_selects(stages[0]) if stages else []:
+            path = os.path.join(out_dir, "analysis", f"{name}.parquet")
+            t0 = time.perf_counter()
+            cur.execute(statement.sql)
+            table = result_table(cur)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, path, compression=None if compression == "none" else compression,
+                           row_group_size=row_group_size)
+            results.append(ExportResult(f"analysis/{name}", path, table.num_rows, os.path.getsize(path),
+                                        time.perf_counter() - t0))
+    return results
+
+
+def format_exports(results: Sequence[ExportResult]) -> str:
+    lines = [f"{'file':<70} {'rows':>10} {'KiB':>9} {'seconds':>8}"]
+    for r in results:
+        lines.append(f"{r.name:<70} {r.rows:>10,} {r.bytes / 1024:>9,.1f} {r.seconds:>8.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Typed Parquet exports of built databases and raw CSVs.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read CSVs from <data-root>/<project>/data/raw")
+    p.add_argument("--project", nargs="+", help="project numbers or name fragments (default: all)")
+    p.add_argument("--db", help="export this built database (SQLite file or Postgres DSN; one project)")
+    p.add_argument("--out", help="--db: output directory (default: <root>/build/parquet/<project>)")
+    p.add_argument("--raw", action="store_true", help="convert each data/raw/*.csv to a typed *.parquet beside it")
+    p.add_argument("--compression", choices=COMPRESSIONS, default=DEFAULT_COMPRESSION)
+    p.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE, help="rows per row group")
+    args = p.parse_args(argv)
+
+    require_pyarrow()
+    if not args.db and not args.raw:
+        p.error("nothing to do: give --db and/or --raw")
+    projects = discover_projects(args.root, args.project, args.data_root)
+    if args.db and len(projects) != 1:
+        p.error(f"--db needs exactly one --project (matched {len(projects)})")
+    results = []
+    for project in projects:
+        if args.raw:
+            results += convert_raw(project, args.compression, args.row_group_size)
+    if args.db:
+        out = args.out or os.path.join(args.root, "build", "parquet", projects[0].name)
+        conn = connect(args.db)
+        try:
+            results += export_project(conn, projects[0], out, args.compression, args.row_group_size)
+        finally:
+            conn.close()
+    print(format_exports(results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
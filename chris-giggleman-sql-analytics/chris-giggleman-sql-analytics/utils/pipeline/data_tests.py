@@ -0,0 +1,267 @@
+# data_tests.py
+"""
+Data-quality test runner for the 06_tests.sql stages.
+
+Each stage file is a list of "expect 0 rows" SELECTs; every SELECT is a
+named check, named after the comment line right above it ("-- 1) Orphan
+order_items (by order_id)" -> orphan_order_items; check_<line> if there
+is none). A check runs as
+
+    SELECT COUNT(*) FROM (<check>) t          -- violations
+    SELECT * FROM (<check>) t LIMIT <sample>  -- only if there are any
+
+so a failing check reports how many rows are bad and shows a few, without
+fetching all of them. Checks are independent and run concurrently on
+separate read-only connections: a thread pool over SQLite (mode=ro URIs;
+sqlite3 releases the GIL while a query runs), an asyncio pool of psycopg
+AsyncConnections on Postgres (a thread pool with psycopg2). Results go to
+JUnit XML (--junit) and JSON (--json) with per-check timings, and the exit
+code is 1 if any check finds rows or fails to run.
+
+run_pipeline.py runs the 06_tests stage through this module, so violations
+fail the pipeline.
+
+    python utils/pipeline/data_tests.py --db-dir build --junit tests.xml
+    python utils/pipeline/data_tests.py --project retail --dialect postgres --dsn postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from db import connect, is_postgres_target
+from sql_stages import DIALECTS, ROOT, Stage, discover_projects, named_selects
+
+DEFAULT_WORKERS = 4
+DEFAULT_SAMPLE = 5
+
+
+@dataclass
+class Check:
+    name: str
+    title: str
+    sql: str
+    line: int
+
+
+@dataclass
+class CheckResult:
+    name: str
+    title: str
+    line: int
+    violations: int = 0
+    seconds: float = 0.0
+    columns: List[str] = field(default_factory=list)
+    sample: List[List[Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.violations == 0
+
+
+def load_checks(stage: Stage) -> List[Check]:
+    return [Check(name, title, s.sql.rstrip().rstrip(";"), s.line)
+            for name, title, s in named_selects(stage, fallback="check")]
+
+
+def _count_sql(check: Check) -> str:
+    return f"SELECT COUNT(*) FROM ({check.sql}) AS t"
+
+
+def _sample_sql(check: Check, sample: int) -> str:
+    return f"SELECT * FROM ({check.sql}) AS t LIMIT {int(sample)}"
+
+
+def run_check(conn, check: Check, sample: int) -> CheckResult:
+    """COUNT, then a sample only if there are violations (one connection, one thread)."""
+    result = CheckResult(check.name, check.title, check.line)
+    t0 = time.perf_counter()
+    try:
+        cur = conn.cursor()
+        cur.execute(_count_sql(check))
+        result.violations = cur.fetchone()[0]
+        if result.violations and sample:
+            cur.execute(_sample_sql(check, sample))
+            result.columns = [d[0] for d in cur.description]
+            result.sample = [list(r) for r in cur.fetchall()]
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - t0
+    return result
+
+
+# ---------- Connections ----------
+
+def connect_readonly(target: str):
+    """A connection that can only read: mode=ro on SQLite, default_transaction_read_only on Postgres."""
+    if not is_postgres_target(target):
+        import sqlite3
+        uri = "file:" + os.path.abspath(target) + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn = connect(target)
+    conn.autocommit = True
+    conn.cursor().execute("SET default_transaction_read_only = on")
+    return conn
+
+
+def _run_threaded(target: str, checks: Sequence[Check], workers: int, sample: int) -> List[CheckResult]:
+    local = threading.local()
+    opened, lock = [], threading.Lock()
+
+    def work(check: Check) -> CheckResult:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = connect_readonly(target)
+            with lock:
+                opened.append(conn)
+        return run_check(conn, check, sample)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return list(pool.map(work, checks))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+async def _run_async(target: str, checks: Sequence[Check], workers: int, sample: int) -> List[CheckResult]:
+    import psycopg
+
+    pool: asyncio.Queue = asyncio.Queue()
+    conns = []
+    try:
+        for _ in range(max(1, min(workers, len(checks)))):
+            conn = await psycopg.AsyncConnection.connect(target, autocommit=True)
+            await conn.execute("SET default_transaction_read_only = on")
+            conns.append(conn)
+            pool.put_nowait(conn)
+
+        async def work(check: Check) -> CheckResult:
+            conn = await pool.get()
+            result = CheckResult(check.name, check.title, check.line)
+            t0 = time.perf_counter()
+            try:
+                cur = await conn.execute(_count_sql(check))
+                result.violations = (await cur.fetchone())[0]
+                if result.violations and sample:
+                    cur = await conn.execute(_sample_sql(check, sample))
+                    result.columns = [d.name for d in cur.description]
+                    result.sample = [list(r) for r in await cur.fetchall()]
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+            finally:
+                pool.put_nowait(conn)
+            result.seconds = time.perf_counter() - t0
+            return result
+
+        return list(await asyncio.gather(*(work(c) for c in checks)))
+    finally:
+        for conn in conns:
+            await conn.close()
+
+
+def run_checks(target: str, checks: Sequence[Check], workers: int = DEFAULT_WORKERS,
+               sample: int = DEFAULT_SAMPLE, conn=None) -> List[CheckResult]:
+    """
+    Run `checks` concurrently against `target`. An in-memory SQLite database
+    can't be reopened, so there they run one by one on `conn`.
+    """
+    if target == ":memory:":
+        return [run_check(conn, c, sample) for c in checks]
+    if is_postgres_target(target):
+        try:
+            import psycopg  # noqa: F401  (async pool needs psycopg 3)
+        except ImportError:
+            return _run_threaded(target, checks, workers, sample)
+        return asyncio.run(_run_async(target, checks, workers, sample))
+    return _run_threaded(target, checks, workers, sample)
+
+
+# ---------- Reports ----------
+
+def junit_xml(suites: Dict[str, List[CheckResult]]) -> str:
+    """One <testsuite> per project, one <testcase> per check."""
+    root = ET.Element("testsuites")
+    for project, results in suites.items():
+        suite = ET.SubElement(root, "testsuite", name=project, tests=str(len(results)),
+                              failures=str(sum(1 for r in results if r.error is None and r.violations)),
+                              errors=str(sum(1 for r in results if r.error)),
+                              time=f"{sum(r.seconds for r in results):.6f}")
+        for r in results:
+            case = ET.SubElement(suite, "testcase", classname=project, name=r.name, time=f"{r.seconds:.6f}")
+            if r.error:
+                ET.SubElement(case, "error", message=r.error).text = r.error
+            elif r.violations:
+                failure = ET.SubElement(case, "failure", message=f"{r.violations} violating row(s): {r.title}")
+                rows = [", ".join(r.columns)] + [", ".join(map(str, row)) for row in r.sample]
+                failure.text = "\n".join(rows)
+    ET.indent(root)
+    return ET.tostring(root, encoding="unicode", xml_declaration=True) + "\n"
+
+
+def to_json(suites: Dict[str, List[CheckResult]]) -> str:
+    return json.dumps({p: [asdict(r) for r in results] for p, results in suites.items()},
+                      indent=2, default=str)
+
+
+def write_reports(suites: Dict[str, List[CheckResult]], junit: Optional[str] = None,
+                  json_path: Optional[str] = None) -> None:
+    if junit:
+        with open(junit, "w", encoding="utf-8") as f:
+            f.write(junit_xml(suites))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(to_json(suites))
+
+
+def format_results(project: str, results: Sequence[CheckResult]) -> str:
+    lines = [f"{project}: {sum(r.ok for r in results)}/{len(results)} checks passed"]
+    for r in results:
+        status = "ERROR" if r.error else ("FAIL" if r.violations else "ok")
+        lines.append(f"  {status:<5} {r.name:<40} {r.violations:>8,} {r.seconds:>8.3f}s"
+                     + (f"  {r.error}" if r.error else ""))
+        for row in r.sample:
+            lines.append("          " + ", ".join(map(str, row)))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Run the 06_tests.sql checks of built databases.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--dialect", choices=DIALECTS, default="sqlite")
+    p.add_argument("--project", nargs="+", help="project numbers or name fragments (default: all)")
+    p.add_argument("--db-dir", default=None, help="SQLite: directory of <project>.db files (default: <root>/build)")
+    p.add_argument("--dsn", help="Postgres connection string")
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent checks (connections)")
+    p.add_argument("--sample", type=int, default=DEFAULT_SAMPLE, help="violating rows shown per check")
+    p.add_argument("--junit", help="write JUnit XML here")
+    p.add_argument("--json", help="write JSON results here")
+    args = p.parse_args(argv)
+
+    if args.dialect == "postgres" and not args.dsn:
+        p.error("--dialect postgres needs --dsn")
+    db_dir = args.db_dir or os.path.join(args.root, "build")
+    suites = {}
+    for project in discover_projects(args.root, args.project):
+        stages = project.stages(args.dialect, ["06"])
+        if not stages:
+            continue
+        target = args.dsn if args.dialect == "postgres" else os.path.join(db_dir, f"{project.name}.db")
+        if args.dialect == "sqlite" and not os.path.exists(target):
+            print(f"{project.name}: no database at {target}, skipped")
+            continue
+        suites[project.name] = run_checks(target, load_checks(stages[0]), args.workers, args.sample)
+        print(format_results(project.name, suites[project.name]))
+    write_reports(suites, args.junit, args.json)
+    return 0 if all(r.ok for results in suites.values() for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+# db.py
+"""
+Connections and transactions for the pipeline: sqlite3 for a file path (or
+:memory:), psycopg / psycopg2 for a postgres:// connection string.
+"""
+import sqlite3
+
+
+def is_postgres_target(target: str) -> bool:
+    return target.startswith(("postgres://", "postgresql://")) or "dbname=" in target
+
+
+def connect(target: str):
+    """Open a connection in manual-transaction mode (see begin/commit)."""
+    if is_postgres_target(target):
+        try:
+            import psycopg
+            return psycopg.connect(target)
+        except ImportError:
+            pass
+        try:
+            import psycopg2
+        except ImportError:
+            raise SystemExit("Postgres targets need psycopg or psycopg2: pip install psycopg[binary]") from None
+        return psycopg2.connect(target)
+    # isolation_level=None: sqlite3 never opens transactions behind our back
+    return sqlite3.connect(target, isolation_level=None)
+
+
+def driver_of(conn) -> str:
+    module = type(conn).__module__.split(".")[0].lstrip("_")
+    return module if module in ("sqlite3", "psycopg", "psycopg2") else "generic"
+
+
+def dialect_of(conn) -> str:
+    return "sqlite" if driver_of(conn) == "sqlite3" else "postgres"
+
+
+def placeholder(conn) -> str:
+    return "?" if driver_of(conn) == "sqlite3" else "%s"
+
+
+def begin(conn) -> None:
+    if driver_of(conn) == "sqlite3":
+        conn.execute("BEGIN")
+    # psycopg / psycopg2 open a transaction implicitly on the first statement
+
+
+def commit(conn) -> None:
+    if driver_of(conn) == "sqlite3":
+        conn.execute("COMMIT")
+    else:
+        conn.commit()
+
+
+def rollback(conn) -> None:
+    if driver_of(conn) == "sqlite3":
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    else:
+        conn.rollback()
@@ -0,0 +1,196 @@
+# dim_calendar.py
+"""
+Generated calendar dimension shared by the analysis SQL.
+
+A project opts in with a calendar.json next to its README naming the date
+columns the calendar must cover:
+
+    {"date_columns": {"subscriptions": ["start_date", "end_date"]}}
+
+After every load the pipeline makes dim_calendar span whole years from the
+earliest to the latest of those dates (and today), adding only the days
+that are missing, so the table is built once and extended as data grows.
+One row per day, keyed by date_key, with month and ISO-week keys:
+
+    date_key        day ('YYYY-MM-DD' text on SQLite, DATE on Postgres)
+    month_start     first day of the month (also month_key = YYYYMM)
+    month_end       last day of the month
+    iso_week_start  Monday of the ISO week (also iso_year, iso_week and
+                    iso_week_key = iso_year * 100 + iso_week)
+    is_month_start  1 on the first of the month; the (is_month_start, date_key)
+                    index makes "months between a and b" a range scan
+
+Queries join on date_key instead of calling date() on both sides, e.g. the
+months a subscription is active in:
+
+    JOIN dim_calendar m ON m.is_month_start = 1
+     AND m.date_key BETWEEN <start month> AND <end date>
+
+It can also be built for a database loaded by hand:
+
+    python utils/pipeline/dim_calendar.py --project saas --db 04_saas_subscriptions/saas.db
+"""
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from db import begin, commit, connect, dialect_of
+from sql_stages import ROOT, Project, discover_projects
+
+CONFIG_FILE = "calendar.json"
+TABLE = "dim_calendar"
+
+_DDL = {
+    # WITHOUT ROWID: rows are stored in date_key order, so date ranges are contiguous
+    "sqlite": [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+  date_key       TEXT PRIMARY KEY,
+  year           INTEGER NOT NULL,
+  month          INTEGER NOT NULL,
+  day            INTEGER NOT NULL,
+  day_of_week    INTEGER NOT NULL,
+  month_key      INTEGER NOT NULL,
+  month_start    TEXT NOT NULL,
+  month_end      TEXT NOT NULL,
+  is_month_start INTEGER NOT NULL,
+  iso_year       INTEGER NOT NULL,
+  iso_week       INTEGER NOT NULL,
+  iso_week_key   INTEGER NOT NULL,
+  iso_week_start TEXT NOT NULL
+) WITHOUT ROWID""",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_month_starts ON {TABLE} (is_month_start, date_key)",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_month_key ON {TABLE} (month_key)",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_iso_week_key ON {TABLE} (iso_week_key)",
+    ],
+    "postgres": [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+  date_key       DATE PRIMARY KEY,
+  year           INTEGER NOT NULL,
+  month          INTEGER NOT NULL,
+  day            INTEGER NOT NULL,
+  day_of_week    INTEGER NOT NULL,
+  month_key      INTEGER NOT NULL,
+  month_start    DATE NOT NULL,
+  month_end      DATE NOT NULL,
+  is_month_start INTEGER NOT NULL,
+  iso_year       INTEGER NOT NULL,
+  iso_week       INTEGER NOT NULL,
+  iso_week_key   INTEGER NOT NULL,
+  iso_week_start DATE NOT NULL
+)""",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_month_starts ON {TABLE} (is_month_start, date_key)",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_month_key ON {TABLE} (month_key)",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_iso_week_key ON {TABLE} (iso_week_key)",
+    ],
+}
+_COLUMNS = ("date_key", "year", "month", "day", "day_of_week", "month_key", "month_start", "month_end",
+            "is_month_start", "iso_year", "iso_week", "iso_week_key", "iso_week_start")
+
+
+@dataclass
+class CalendarConfig:
+    date_columns: Dict[str, List[str]]   # table -> date columns to cover
+
+    @classmethod
+    def load(cls, project: Project) -> Optional["CalendarConfig"]:
+        path = os.path.join(project.path, CONFIG_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["date_columns"])
+
+
+def _month_end(d: date) -> date:
+    following = date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    return following - timedelta(days=1)
+
+
+def calendar_rows(first: date, last: date, as_text: bool = True) -> Iterator[tuple]:
+    """One tuple per day in [first, last], in _COLUMNS order."""
+    fmt = date.isoformat if as_text else (lambda d: d)
+    d = first
+    while d <= last:
+        iso_year, iso_week, iso_day = d.isocalendar()
+        month_start = d.replace(day=1)
+        yield (fmt(d), d.year, d.month, d.day, iso_day, d.year * 100 + d.month,
+               fmt(month_start), fmt(_month_end(d)), int(d.day == 1),
+               iso_year, iso_week, iso_year * 100 + iso_week, fmt(d - timedelta(days=iso_day - 1)))
+        d += timedelta(days=1)
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def data_range(conn, config: CalendarConfig) -> Tuple[date, date]:
+    """
+    (first, last) day the calendar must cover: the configured dates and
+    today, in whole years. Today is both the local and the UTC date, since
+    SQLite's date('now') is UTC.
+    """
+    cur = conn.cursor()
+    days = [date.today(), datetime.now(timezone.utc).date()]
+    for table, columns in config.date_columns.items():
+        for column in columns:
+            cur.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+            days += [d for d in map(_as_date, cur.fetchone()) if d is not None]
+    return date(min(days).year, 1, 1), date(max(days).year, 12, 31)
+
+
+def ensure_calendar(conn, config: CalendarConfig) -> int:
+    """
+    Create dim_calendar if needed and add the days it is missing at either
+    end; returns the rows inserted. Runs in the caller's transaction.
+    """
+    dialect = dialect_of(conn)
+    cur = conn.cursor()
+    for ddl in _DDL[dialect]:
+        cur.execute(ddl)
+    first, last = data_range(conn, config)
+    cur.execute(f"SELECT MIN(date_key), MAX(date_key) FROM {TABLE}")
+    have_first, have_last = map(_as_date, cur.fetchone())
+    if have_first is None:
+        missing = [(first, last)]
+    else:
+        missing = [(first, have_first - timedelta(days=1)), (have_last + timedelta(days=1), last)]
+    ph = ", ".join(["?" if dialect == "sqlite" else "%s"] * len(_COLUMNS))
+    insert = f"INSERT INTO {TABLE} ({', '.join(_COLUMNS)}) VALUES ({ph})"
+    added = 0
+    for lo, hi in missing:
+        if lo <= hi:
+            rows = list(calendar_rows(lo, hi, as_text=dialect == "sqlite"))
+            cur.executemany(insert, rows)
+            added += len(rows)
+    return added
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Build or extend dim_calendar in a loaded database.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--project", required=True, help="project number or name fragment (reads its calendar.json)")
+    p.add_argument("--db", required=True, help="SQLite file or Postgres DSN")
+    args = p.parse_args()
+
+    project = discover_projects(args.root, [args.project])[0]
+    config = CalendarConfig.load(project)
+    if config is None:
+        raise SystemExit(f"{project.name} has no {CONFIG_FILE}")
+    conn = connect(args.db)
+    try:
+        begin(conn)
+        added = ensure_calendar(conn, config)
+        commit(conn)
+        print(f"{TABLE}: {added:,} day(s) added")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# incremental.py
+"""
+Incremental (append-only) refresh state.
+
+A project opts in with an incremental.json next to its README naming the
+high-water-mark column of each source table:
+
+    {"watermarks": {"orders": "order_id", "order_items": "order_id"}}
+
+After every load the pipeline records, per table, the previous and new
+maximum of that column in _pipeline_watermarks. An incremental run then
+loads only CSV rows above the stored mark (and cleans just those via the
+cleaning spec), and runs sql/<dialect>/refresh_incremental.sql, which reads
+previous_value to find the new rows and recompute only the affected
+partitions of the marts that sql/<dialect>/refresh_full.sql builds.
+
+Sources are assumed append-only with a monotonic key; edits to existing
+rows need --full-refresh (run_pipeline.py --verify catches drift).
+"""
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from db import begin, commit, dialect_of
+from materialize import STATE_TABLE as MATERIALIZED_STATE_TABLE
+from sql_stages import Project, Stage
+
+CONFIG_FILE = "incremental.json"
+REFRESH_FULL_FILE = "refresh_full.sql"
+REFRESH_INCREMENTAL_FILE = "refresh_incremental.sql"
+WATERMARK_TABLE = "_pipeline_watermarks"
+
+_DDL = {
+    # No declared type on the values: SQLite keeps them as integers/text as given
+    "sqlite": f"""CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+  table_name     TEXT PRIMARY KEY,
+  key_column     TEXT NOT NULL,
+  previous_value,
+  value,
+  updated_at     TEXT NOT NULL
+)""",
+    "postgres": f"""CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+  table_name     TEXT PRIMARY KEY,
+  key_column     TEXT NOT NULL,
+  previous_value TEXT,
+  value          TEXT,
+  updated_at     TIMESTAMPTZ NOT NULL
+)""",
+}
+
+
+@dataclass
+class IncrementalConfig:
+    watermarks: Dict[str, str]   # table -> key column
+
+    @classmethod
+    def load(cls, project: Project) -> Optional["IncrementalConfig"]:
+        path = os.path.join(project.path, CONFIG_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["watermarks"])
+
+
+def as_key(value: Any) -> Any:
+    """Watermarks compare numerically when they look like integers (CSV gives text)."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _ph(conn) -> str:
+    return "?" if dialect_of(conn) == "sqlite" else "%s"
+
+
+def _table_exists(conn, table: str) -> bool:
+    cur = conn.cursor()
+    if dialect_of(conn) == "sqlite":
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    else:
+        cur.execute("SELECT 1 WHERE to_regclass(%s) IS NOT NULL", (table,))
+    return cur.fetchone() is not None
+
+
+def read_watermarks(conn) -> Dict[str, Any]:
+    """table -> current high-water mark (empty if nothing was loaded yet)."""
+    if not _table_exists(conn, WATERMARK_TABLE):
+        return {}
+    cur = conn.cursor()
+    cur.execute(f"SELECT table_name, value FROM {WATERMARK_TABLE}")
+    return {t: as_key(v) for t, v in cur.fetchall()}
+
+
+def can_refresh(conn, config: IncrementalConfig) -> bool:
+    """True if every source table exists and has a recorded watermark."""
+    marks = read_watermarks(conn)
+    return all(t in marks and _table_exists(conn, t) for t in config.watermarks)
+
+
+def clear_watermarks(conn, config: IncrementalConfig) -> None:
+    """Forget a project's marks (before a full rebuild), in its own transaction."""
+    if not _table_exists(conn, WATERMARK_TABLE):
+        return
+    begin(conn)
+    cur = conn.cursor()
+    for table in config.watermarks:
+        cur.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE table_name = {_ph(conn)}", (table,))
+    commit(conn)
+
+
+def record_watermarks(conn, config: IncrementalConfig,
+                      previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    After a load: previous_value <- the mark loaded above (`previous`; NULL
+    after a full load), value <- MAX(key column). Runs in the caller's
+    transaction, so marks only move if the load commits.
+    """
+    cur = conn.cursor()
+    cur.execute(_DDL[dialect_of(conn)])
+    ph = _ph(conn)
+    now = "datetime('now')" if dialect_of(conn) == "sqlite" else "now()"
+    marks = {}
+    for table, column in config.watermarks.items():
+        cur.execute(f"SELECT MAX({column}) FROM {table}")
+        value = cur.fetchone()[0]
+        before = (previous or {}).get(table)
+        if dialect_of(conn) != "sqlite":
+            value, before = (None if v is None else str(v) for v in (value, before))
+        cur.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE table_name = {ph}", (table,))
+        cur.execute(
+            f"INSERT INTO {WATERMARK_TABLE} (table_name, key_column, previous_value, value, updated_at) "
+            f"VALUES ({ph}, {ph}, {ph}, {ph}, {now})",
+            (table, column, before, value),
+        )
+        marks[table] = value
+    return marks
+
+
+def refresh_stage(project: Project, dialect: str, incremental: bool) -> Optional[Stage]:
+    fname = REFRESH_INCREMENTAL_FILE if incremental else REFRESH_FULL_FILE
+    path = os.path.join(project.sql_dir(dialect), fname)
+    if not os.path.exists(path):
+        return None
+    return Stage("03", "03_" + fname[:-4], path)
+
+
+# ---------- incremental == full check ----------
+
+def user_tables(conn: sqlite3.Connection, schema: str = "main") -> List[str]:
+    """Every table except the pipeline's own bookkeeping (which carries timestamps)."""
+    rows = conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%' AND name NOT IN (?, ?) ORDER BY name",
+        (WATERMARK_TABLE, MATERIALIZED_STATE_TABLE),
+    )
+    return [r[0] for r in rows]
+
+
+def compare_sqlite(a_path: str, b_path: str, tables: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Rows that differ (in either direction) per table between two SQLite
+    databases; by default every table of b, the reference (a may hold extra
+    tables, e.g. saas_metrics.py output).
+    """
+    conn = sqlite3.connect(a_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS other", (b_path,))
+        diffs = {}
+        for table in tables or user_tables(conn, "other"):
+            diffs[table] = conn.execute(
+                f"SELECT (SELECT COUNT(*) FROM (SELECT * FROM main.{table} EXCEPT SELECT * FROM other.{table}))"
+                f"     + (SELECT COUNT(*) FROM (SELECT * FROM other.{table} EXCEPT SELECT * FROM main.{table}))"
+            ).fetchone()[0]
+        return diffs
+    finally:
+        conn.close()
@@ -0,0 +1,478 @@
+# index_advisor.py
+"""
+Propose, trial and keep only the indexes that pay off for a project's queries.
+
+1. Parse the workload - every SELECT in 04_analysis, the bodies of the
+   05_views views and the 06_tests checks - for the columns it joins on
+   (ON), filters on (WHERE) and groups by (GROUP BY / PARTITION BY),
+   resolving table aliases against the live schema.
+2. Turn them into candidate indexes: one per column, plus composites for
+   columns of one table used together in a statement (join + filter
+   column, multi-column GROUP BY). Candidates already served by an existing
+   index (same leading columns) or by the primary key are dropped.
+3. Trial each candidate alone on a database loaded with real data:
+   create it, re-plan the queries that read its table (EXPLAIN QUERY PLAN
+   on SQLite, EXPLAIN on Postgres), and re-time only those whose plan
+   changed (wall clock on SQLite, EXPLAIN ANALYZE execution time on
+   Postgres). A candidate survives if some query gets at least --min-gain
+   faster without the affected queries as a whole getting slower.
+4. Add the survivors greedily, best first, keeping each only if at least
+   half of its solo saving survives next to the ones already kept
+   (re-timing the queries it affected).
+
+The result is written to sql/<dialect>/index_migration.sql for review,
+with the measured effect and plan change of every kept index (and why the
+rest were rejected). run_pipeline.py applies that file after cleaning.
+
+SQLite trials run on a scratch database loaded from the CSVs. On Postgres
+the --dsn database must already be built by run_pipeline.py; the trial
+drops the current migration's indexes and creates candidates inside one
+transaction that is rolled back, so the database is left as it was.
+
+    python utils/pipeline/index_advisor.py --data-root /tmp/big --project saas
+    python utils/pipeline/index_advisor.py --dialect postgres --dsn postgresql://... --project retail
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from db import begin, connect, dialect_of, rollback
+from loader import table_columns
+from materialize import parse_create_view
+from sql_stages import DIALECTS, ROOT, Project, Stage, discover_projects
+
+MIGRATION_FILE = "index_migration.sql"
+WORKLOAD_STAGES = ("04", "05", "06")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_CLAUSE_RE = re.compile(
+    r"\b(ON|WHERE|GROUP\s+BY|PARTITION\s+BY|ORDER\s+BY|HAVING|SELECT|FROM|JOIN|LIMIT|UNION|WINDOW)\b",
+    re.IGNORECASE,
+)
+_FROM_ITEM_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_COMMA_ITEM_RE = re.compile(r",\s*(\w+)(?:\s+(?:AS\s+)?(\w+))?")
+_QUALIFIED_RE = re.compile(r"\b(\w+)\.(\w+)\b")
+_WORD_RE = re.compile(r"\b([A-Za-z_]\w*)\b")
+_NOT_ALIAS = {
+    "on", "where", "join", "left", "right", "inner", "outer", "cross", "full", "natural", "group",
+    "order", "limit", "having", "union", "using", "as", "select", "window", "and", "or", "lateral",
+}
+_ROLE = {"ON": "join", "WHERE": "filter", "GROUP BY": "group", "PARTITION BY": "group"}
+_INDEX_NAME_RE = re.compile(r"CREATE\s+INDEX\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE)
+
+
+@dataclass
+class Query:
+    label: str      # "04_analysis:12"
+    sql: str
+    tables: Set[str] = field(default_factory=set)
+    # (table, column) -> roles ("join" / "filter" / "group")
+    columns: Dict[Tuple[str, str], Set[str]] = field(default_factory=lambda: defaultdict(set))
+    # per table, column groups used together (composite candidates)
+    groups: List[Tuple[str, Tuple[str, ...]]] = field(default_factory=list)
+
+
+@dataclass
+class Candidate:
+    table: str
+    columns: Tuple[str, ...]
+    reasons: Set[str] = field(default_factory=set)   # query labels that suggested it
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    def ddl(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+
+@dataclass
+class Trial:
+    candidate: Candidate
+    create_seconds: float = 0.0
+    # label -> (before s, after s, plan line mentioning the index)
+    effects: Dict[str, Tuple[float, float, str]] = field(default_factory=dict)
+    verdict: str = ""
+
+    @property
+    def saved(self) -> float:
+        return sum(b - a for b, a, _ in self.effects.values())
+
+
+# ---------- Parsing ----------
+
+def workload(project: Project, dialect: str) -> List[Query]:
+    """The SELECTs the project runs after loading, as Query objects (columns not yet resolved)."""
+    queries = []
+    for stage in project.stages(dialect, WORKLOAD_STAGES):
+        for s in stage.statements():
+            sql = s.sql
+            created = parse_create_view(sql)
+            if created:
+                sql = created[1]
+            elif s.kind not in ("SELECT", "WITH"):
+                continue
+            queries.append(Query(f"{stage.name}:{s.line}", sql))
+    return queries
+
+
+def _from_items(sql: str) -> List[Tuple[str, Optional[str]]]:
+    items = []
+    for m in _FROM_ITEM_RE.finditer(sql):
+        items.append((m.group(1), m.group(2)))
+        # FROM a x, b y
+        rest = sql[m.end():]
+        while True:
+            c = _COMMA_ITEM_RE.match(rest)
+            if not c or c.group(1).lower() in _NOT_ALIAS:
+                break
+            items.append((c.group(1), c.group(2)))
+            rest = rest[c.end():]
+    return [(t, a if a and a.lower() not in _NOT_ALIAS else None) for t, a in items]
+
+
+def analyze_query(q: Query, schema: Dict[str, List[str]]) -> Query:
+    """Fill q.tables/columns/groups from its SQL and the schema {table: columns}."""
+    sql = _STRING_RE.sub("''", q.sql)
+    aliases = {}
+    for table, alias in _from_items(sql):
+        if table in schema:
+            q.tables.add(table)
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    owners = defaultdict(list)
+    for t in q.tables:
+        for c in schema[t]:
+            owners[c].append(t)
+
+    marks = list(_CLAUSE_RE.finditer(sql))
+    per_table_roles: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+    for i, m in enumerate(marks):
+        role = _ROLE.get(" ".join(m.group(1).upper().split()))
+        if not role:
+            continue
+        segment = sql[m.end(): marks[i + 1].start() if i + 1 < len(marks) else len(sql)]
+        found = []
+        for qm in _QUALIFIED_RE.finditer(segment):
+            table = aliases.get(qm.group(1))
+            if table and qm.group(2) in schema[table]:
+                found.append((table, qm.group(2)))
+        bare = _QUALIFIED_RE.sub(" ", segment)
+        for wm in _WORD_RE.finditer(bare):
+            ts = owners.get(wm.group(1), [])
+            if len(ts) == 1:
+                found.append((ts[0], wm.group(1)))
+        for table, col in found:
+            q.columns[(table, col)].add(role)
+            if col not in per_table_roles[table][role]:
+                per_table_roles[table][role].append(col)
+
+    for table, roles in per_table_roles.items():
+        joins, filters, groups = roles.get("join", []), roles.get("filter", []), roles.get("group", [])
+        # equality/join column first, then a range/filter column of the same table
+        for a in joins:
+            for b in joins + filters:
+                if a != b:
+                    q.groups.append((table, (a, b)))
+        if len(groups) > 1:
+            q.groups.append((table, tuple(groups)))
+    return q
+
+
+# ---------- Schema / candidates ----------
+
+def live_schema(conn) -> Dict[str, List[str]]:
+    if dialect_of(conn) == "sqlite":
+        names = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE '\\_%' ESCAPE '\\'"
+        )]
+    else:
+        cur = conn.cursor()
+        cur.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = current_schema() "
+                    "AND table_type = 'BASE TABLE' AND table_name NOT LIKE '\\_%'")
+        names = [r[0] for r in cur.fetchall()]
+    return {t: table_columns(conn, t) for t in names}
+
+
+def existing_index_prefixes(conn, table: str) -> List[Tuple[str, ...]]:
+    """Leading-column tuples of the table's indexes (incl. primary key / unique)."""
+    if dialect_of(conn) == "sqlite":
+        out = []
+        for _, name, *_ in conn.execute(f'PRAGMA index_list("{table}")'):
+            out.append(tuple(r[2] for r in conn.execute(f'PRAGMA index_info("{name}")')))
+        pk = [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")') if r[5]]
+        if pk:
+            out.append(tuple(pk))
+        return out
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT array_agg(a.attname ORDER BY k.ord) FROM pg_index i "
+        "CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord) "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum "
+        "WHERE i.indrelid = %s::regclass GROUP BY i.indexrelid",
+        (table,),
+    )
+    return [tuple(r[0]) for r in cur.fetchall()]
+
+
+def candidates(conn, queries: Sequence[Query]) -> List[Candidate]:
+    found: Dict[Tuple[str, Tuple[str, ...]], Candidate] = {}
+
+    def add(table, cols, label):
+        key = (table, tuple(cols))
+        found.setdefault(key, Candidate(table, tuple(cols))).reasons.add(label)
+
+    for q in queries:
+        for (table, col), roles in q.columns.items():
+            add(table, (col,), q.label)
+        for table, cols in q.groups:
+            add(table, cols, q.label)
+
+    existing = {t: existing_index_prefixes(conn, t) for t, _ in found}
+    keep = []
+    for (table, cols), cand in sorted(found.items()):
+        if any(ix[:len(cols)] == cols for ix in existing[table]):
+            continue   # an existing index already leads with these columns
+        keep.append(cand)
+    return keep
+
+
+# ---------- Measuring ----------
+
+def query_plan(conn, sql: str) -> List[str]:
+    cur = conn.cursor()
+    if dialect_of(conn) == "sqlite":
+        cur.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [r[-1] for r in cur.fetchall()]
+    cur.execute(f"EXPLAIN (COSTS OFF) {sql}")
+    return [r[0].strip() for r in cur.fetchall()]
+
+
+def measure(conn, sql: str, repeat: int) -> float:
+    """Best-of-`repeat` runtime in seconds."""
+    best = float("inf")
+    cur = conn.cursor()
+    for _ in range(repeat):
+        if dialect_of(conn) == "sqlite":
+            t0 = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            best = min(best, time.perf_counter() - t0)
+        else:
+            cur.execute(f"EXPLAIN (ANALYZE, TIMING OFF, FORMAT JSON) {sql}")
+            plan = cur.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            best = min(best, plan[0]["Execution Time"] / 1000.0)
+    return best
+
+
+def _exec(conn, sql: str) -> None:
+    conn.cursor().execute(sql)
+
+
+def trial(conn, cand: Candidate, queries: Sequence[Query], baseline: Dict[str, Tuple[float, List[str]]],
+          repeat: int, min_gain: float) -> Trial:
+    """Create `cand`, measure the queries whose plan it changes, drop it again."""
+    result = Trial(cand)
+    t0 = time.perf_counter()
+    _exec(conn, cand.ddl())
+    result.create_seconds = time.perf_counter() - t0
+    try:
+        for q in queries:
+            if cand.table not in q.tables:
+                continue
+            plan = query_plan(conn, q.sql)
+            if plan == baseline[q.label][1]:
+                continue
+            used = next((line for line in plan if cand.name in line), "")
+            result.effects[q.label] = (baseline[q.label][0], measure(conn, q.sql, repeat), used)
+    finally:
+        _exec(conn, f"DROP INDEX {cand.name}")
+    if not result.effects:
+        result.verdict = "no plan change"
+    elif not any(b > 0 and (b - a) / b >= min_gain for b, a, _ in result.effects.values()):
+        result.verdict = f"no query {min_gain:.0%} faster"
+    elif result.saved <= 0:
+        result.verdict = "slower overall"
+    return result
+
+
+@dataclass
+class Advice:
+    project: str
+    dialect: str
+    queries: int
+    before: float = 0.0
+    after: float = 0.0
+    kept: List[Trial] = field(default_factory=list)
+    rejected: List[Trial] = field(default_factory=list)
+    rows: Dict[str, int] = field(default_factory=dict)   # workload table -> rows at trial time
+
+
+def advise(conn, project: Project, dialect: str, repeat: int = 3, min_gain: float = 0.10,
+           log=print) -> Advice:
+    """Run the whole advisor on a loaded database; every index it creates is dropped again."""
+    schema = live_schema(conn)
+    queries = [analyze_query(q, schema) for q in workload(project, dialect)]
+    queries = [q for q in queries if q.tables]
+    advice = Advice(project.name, dialect, len(queries))
+    for table in sorted({t for q in queries for t in q.tables}):
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        advice.rows[table] = cur.fetchone()[0]
+
+    for q in queries:   # warm the page cache so the first timings are not cold reads
+        measure(conn, q.sql, 1)
+    baseline = {q.label: (measure(conn, q.sql, repeat), query_plan(conn, q.sql)) for q in queries}
+    advice.before = sum(t for t, _ in baseline.values())
+    log(f"{project.name}: {len(queries)} queries, {advice.before:.3f}s")
+
+    trials = []
+    for cand in candidates(conn, queries):
+        t = trial(conn, cand, queries, baseline, repeat, min_gain)
+        log(f"  {cand.name:<48} {t.verdict or f'saves {t.saved:.3f}s'}")
+        (advice.rejected if t.verdict else trials).append(t)
+
+    # Greedy: best first; at least half its solo saving must survive next to the
+    # kept ones, judged on the queries it affected (whole-workload totals are noisy)
+    by_label = {q.label: q for q in queries}
+    current = {label: t for label, (t, _) in baseline.items()}
+    for t in sorted(trials, key=lambda t: -t.saved):
+        _exec(conn, t.candidate.ddl())
+        now = {label: measure(conn, by_label[label].sql, repeat) for label in t.effects}
+        if sum(current[label] - now[label] for label in now) >= 0.5 * t.saved:
+            advice.kept.append(t)
+            current.update(now)
+        else:
+            _exec(conn, f"DROP INDEX {t.candidate.name}")
+            t.verdict = "no gain next to the kept indexes"
+            advice.rejected.append(t)
+    advice.after = sum(current.values())
+    for t in advice.kept:
+        _exec(conn, f"DROP INDEX {t.candidate.name}")
+    return advice
+
+
+# ---------- Output ----------
+
+def _change(before: float, after: float) -> str:
+    """Relative effect of a timing change; absolute seconds only hold on the machine that measured them."""
+    if before <= 0:
+        return "no change"
+    pct = 100.0 * (before - after) / before
+    return f"{pct:.0f}% faster" if pct >= 0.5 else f"{-pct:.0f}% slower" if pct <= -0.5 else "no change"
+
+
+def format_migration(advice: Advice) -> str:
+    """
+    The reviewed migration file. Timings are relative and the trial data is
+    described by its table sizes, so the file states what a rerun on data of
+    the same size should reproduce.
+    """
+    label = "SQLite" if advice.dialect == "sqlite" else "PostgreSQL"
+    lines = [
+        f"-- Index migration ({label}) for {advice.project}",
+        "-- Proposed by utils/pipeline/index_advisor.py, then reviewed. Each index was trialled",
+        "-- alone and kept only if it made the 04_analysis / 05_views / 06_tests queries faster.",
+    ]
+    if advice.rows:
+        lines.append("-- Trial data: " + ", ".join(f"{t} {n:,}" for t, n in advice.rows.items()) + " rows")
+    lines.append(f"-- Workload ({advice.queries} queries): {_change(advice.before, advice.after)}")
+    lines.append("")
+    for t in advice.kept:
+        lines.append(f"-- {t.candidate.table}({', '.join(t.candidate.columns)})")
+        for q, (before, after, used) in sorted(t.effects.items()):
+            lines.append(f"--   {q}: {_change(before, after)}" + (f"  [{used}]" if used else ""))
+        lines.append(t.candidate.ddl() + ";")
+        lines.append("")
+    if not advice.kept:
+        lines.append("-- No candidate index measurably helped; nothing to apply.")
+        lines.append("")
+    if advice.rejected:
+        lines.append("-- Rejected:")
+        for t in sorted(advice.rejected, key=lambda t: t.candidate.name):
+            lines.append(f"--   {t.candidate.table}({', '.join(t.candidate.columns)}): {t.verdict}")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def migration_stage(project: Project, dialect: str) -> Optional[Stage]:
+    """The reviewed index migration, run by the pipeline after cleaning, or None."""
+    path = os.path.join(project.sql_dir(dialect), MIGRATION_FILE)
+    if not os.path.exists(path):
+        return None
+    return Stage("03", "03_index_migration", path)
+
+
+def migration_indexes(project: Project, dialect: str) -> List[str]:
+    stage = migration_stage(project, dialect)
+    if stage is None:
+        return []
+    return [m.group(1) for s in stage.statements() for m in [_INDEX_NAME_RE.match(s.sql)] if m]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from run_pipeline import run_project   # run_pipeline imports migration_stage from here
+
+    p = argparse.ArgumentParser(description="Trial candidate indexes and write sql/<dialect>/index_migration.sql.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read CSVs from <data-root>/<project>/data/raw (use realistic volumes)")
+    p.add_argument("--dialect", choices=DIALECTS, default="sqlite")
+    p.add_argument("--dsn", help="Postgres: database built by run_pipeline.py to trial in (rolled back)")
+    p.add_argument("--project", nargs="+", help="project numbers or name fragments (default: all)")
+    p.add_argument("--repeat", type=int, default=3, help="timing runs per query (best counts)")
+    p.add_argument("--min-gain", type=float, default=0.10, help="fraction a query must speed up by")
+    p.add_argument("--dry-run", action="store_true", help="print the migration instead of writing it")
+    args = p.parse_args(argv)
+    if args.dialect == "postgres" and not args.dsn:
+        p.error("--dialect postgres needs --dsn")
+
+    for project in discover_projects(args.root, args.project, args.data_root):
+        scratch = None
+        if args.dialect == "sqlite":
+            scratch = tempfile.mkdtemp(prefix="index-advisor-")
+            target = os.path.join(scratch, f"{project.name}.db")
+        else:
+            target = args.dsn
+        conn = connect(target)
+        try:
+            if args.dialect == "sqlite":
+                # Load + clean without the current migration, so every candidate is judged afresh
+                built = run_project(conn, project, "sqlite", target, ["01", "02", "03"], args.root,
+                                    full_refresh=True, materialize=False, apply_indexes=False)
+                if not built.ok:
+                    raise SystemExit(f"building {project.name} failed: "
+                                     + "; ".join(s.error for s in built.stages if s.error))
+                advice = advise(conn, project, "sqlite", args.repeat, args.min_gain)
+            else:
+                begin(conn)
+                try:
+                    for name in migration_indexes(project, "postgres"):
+                        _exec(conn, f"DROP INDEX IF EXISTS {name}")
+                    advice = advise(conn, project, "postgres", args.repeat, args.min_gain)
+                finally:
+                    rollback(conn)
+        finally:
+            conn.close()
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+        text = format_migration(advice)
+        if args.dry_run:
+            print(text)
+        else:
+            path = os.path.join(project.sql_dir(args.dialect), MIGRATION_FILE)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"wrote {path}: {len(advice.kept)} index(es), {advice.before:.3f}s -> {advice.after:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,422 @@
+# loader.py
+"""
+Bulk-load a project's data/raw CSVs into the tables created by 01_create_tables.
+
+Which CSV goes into which table:
+- Postgres stage files say so with psql \\copy directives; those are parsed
+  and followed (paths are relative to the portfolio root, as in psql).
+- SQLite stage files only carry DB Browser import notes, so each CSV is
+  matched to the table whose columns equal its header (employee_roster.csv
+  -> employees). Tables load in creation order so parents precede children.
+
+How rows get in:
+- SQLite: the csv reader is streamed through executemany in fixed-size
+  batches (memory stays bounded by batch_size; blanks become NULL via
+  NULLIF in the INSERT itself), with loader PRAGMAs
+  (journal_mode, synchronous, cache_size, foreign_keys) set for the load
+  and restored afterwards. Secondary indexes are dropped before the load and
+  rebuilt once at the end, and foreign keys are verified once per table,
+  which is much cheaper than maintaining/checking them row by row.
+- Postgres: COPY ... FROM STDIN streamed in 1 MiB blocks.
+
+Empty fields load as NULL on both engines (COPY's CSV default), so the
+cleaning stage never has to chase '' and NULL separately. Given a
+CleaningSpec (cleaning.py), each column's cleaning expression is applied in
+the same INSERT; on Postgres the CSV is COPYed into a TEXT staging table and
+moved over with one INSERT ... SELECT.
+
+A data/raw/<name>.parquet (generate_all.py --format parquet, or
+columnar.py --raw) is loaded in place of <name>.csv: its typed columns are
+read in record batches, so no text is parsed. Postgres COPY only takes
+text, so there the Parquet file is first written out as a temporary CSV.
+
+For incremental refreshes (incremental.py) a table can be given a
+high-water mark: only rows whose key column is above it are inserted.
+
+    python utils/pipeline/loader.py --project retail --db build/01_retail_sales_analytics.db
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cleaning import CleaningSpec, TableRules, compile_column
+from columnar import require_pyarrow, sqlite_values
+from db import commit, connect, begin, dialect_of, driver_of, placeholder
+from incremental import as_key
+from sql_stages import ROOT, Project, Statement, discover_projects
+
+_COPY_RE = re.compile(
+    r"\\copy\s+(\w+)\s*\(([^)]*)\)\s+FROM\s+'([^']+)'", re.IGNORECASE
+)
+
+BATCH_SIZE = 10_000
+COPY_BLOCK = 1 << 20
+
+# Applied for the duration of a SQLite load. A crash mid-load only loses the
+# load itself, which the pipeline reruns from the CSVs anyway.
+SQLITE_LOAD_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "cache_size": "-262144",   # 256 MiB
+    "temp_store": "MEMORY",
+    # checked once per table after the load instead of per row (see bulk_load)
+    "foreign_keys": "OFF",
+}
+
+# (key column, high-water mark): load only rows with key > mark
+Above = Tuple[str, Any]
+
+
+@dataclass
+class CopyDirective:
+    table: str
+    columns: List[str]
+    path: str
+
+
+@dataclass
+class LoadResult:
+    table: str
+    path: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def parse_copy(sql: str, root: str = ROOT) -> CopyDirective:
+    m = _COPY_RE.search(sql)
+    if not m:
+        raise ValueError(f"Unsupported psql meta-command: {sql[:60]}")
+    table, cols, path = m.groups()
+    if not os.path.isabs(path):
+        path = os.path.join(root, path)
+    return CopyDirective(table, [c.strip() for c in cols.split(",")], path)
+
+
+def table_columns(conn, table: str) -> List[str]:
+    if dialect_of(conn) == "sqlite":
+        return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = %s AND table_schema = current_schema() ORDER BY ordinal_position",
+        (table,),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _tables_in_creation_order(conn) -> List[str]:
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    )
+    return [r[0] for r in rows]
+
+
+def is_parquet(path: str) -> bool:
+    return path.endswith(".parquet")
+
+
+def _preferred_file(csv_path: str) -> str:
+    """<name>.parquet when it sits next to (or replaces) <name>.csv."""
+    parquet = os.path.splitext(csv_path)[0] + ".parquet"
+    return parquet if os.path.exists(parquet) else csv_path
+
+
+def _file_header(path: str) -> List[str]:
+    if is_parquet(path):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def plan_loads(conn, project: Project, statements: Sequence[Statement] = (), root: str = ROOT) -> List[CopyDirective]:
+    """CSV -> table assignments for a project's load stage."""
+    copies = [parse_copy(s.sql, root) for s in statements if s.meta]
+    if copies:
+        for c in copies:
+            if project.data_root:
+                c.path = os.path.join(project.data_dir, os.path.basename(c.path))
+            c.path = _preferred_file(c.path)
+        return copies
+
+    by_columns = {}
+    paths = glob.glob(os.path.join(project.data_dir, "*.csv")) + glob.glob(os.path.join(project.data_dir, "*.parquet"))
+    for path in sorted({_preferred_file(os.path.splitext(p)[0] + ".csv") for p in paths}):
+        by_columns[frozenset(_file_header(path))] = path
+    plan = []
+    for table in _tables_in_creation_order(conn):
+        path = by_columns.get(frozenset(table_columns(conn, table)))
+        if path:
+            # Insert in the file's column order so rows pass through untouched
+            plan.append(CopyDirective(table, _file_header(path), path))
+    return plan
+
+
+# ---------- SQLite / generic DB-API ----------
+
+def set_pragmas(conn, pragmas: Dict[str, str]) -> Dict[str, str]:
+    """Apply PRAGMAs (outside any transaction); returns the previous values."""
+    previous = {}
+    for name, value in pragmas.items():
+        previous[name] = str(conn.execute(f"PRAGMA {name}").fetchone()[0])
+        conn.execute(f"PRAGMA {name} = {value}")
+    return previous
+
+
+def _secondary_indexes(conn, table: str) -> List[tuple]:
+    """(name, CREATE INDEX sql) for explicit indexes; PK/UNIQUE autoindexes have sql NULL."""
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+
+
+def insert_sql(directive: CopyDirective, mark: str = "?", rules: Optional[TableRules] = None) -> str:
+    """
+    INSERT that turns '' into NULL (and applies any cleaning rules) inside the
+    engine, so no per-value work happens in Python. With rules, SQLite's
+    numbered ?N placeholders let an expression use its value more than once.
+    """
+    cols = ", ".join(directive.columns)
+    if rules and mark == "?":
+        values = ", ".join(compile_column(f"?{i}", rules.get(c)) for i, c in enumerate(directive.columns, 1))
+    else:
+        values = ", ".join([compile_column(mark, None)] * len(directive.columns))
+    return f"INSERT INTO {directive.table} ({cols}) VALUES ({values})"
+
+
+def _executemany_load(conn, directive: CopyDirective, batch_size: int, mark: str = "?",
+                      rules: Optional[TableRules] = None, above: Optional[Above] = None) -> int:
+    sql = insert_sql(directive, mark, rules)
+    cur = conn.cursor()
+    if is_parquet(directive.path):
+        return _parquet_load(cur, sql, directive, batch_size, above)
+    total = 0
+    with open(directive.path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        if above is not None:
+            i, hw = directive.columns.index(above[0]), as_key(above[1])
+            reader = (row for row in reader if row[i] and as_key(row[i]) > hw)
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                break
+            cur.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def _parquet_load(cur, sql: str, directive: CopyDirective, batch_size: int, above: Optional[Above] = None) -> int:
+    require_pyarrow()
+    import pyarrow.parquet as pq
+    total = 0
+    for batch in pq.ParquetFile(directive.path).iter_batches(batch_size, columns=directive.columns):
+        rows = sqlite_values(batch)
+        if above is not None:
+            i, hw = directive.columns.index(above[0]), as_key(above[1])
+            rows = [row for row in rows if row[i] is not None and as_key(row[i]) > hw]
+        cur.executemany(sql, rows)
+        total += len(rows)
+    return total
+
+
+# ---------- Postgres ----------
+
+def _copy(conn, cur, table: str, columns: Sequence[str], path: str) -> int:
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, HEADER true)"
+    with open(path, "rb") as f:
+        if driver_of(conn) == "psycopg":
+            with cur.copy(sql) as copy:
+                while True:
+                    block = f.read(COPY_BLOCK)
+                    if not block:
+                        break
+                    copy.write(block)
+        else:
+            cur.copy_expert(sql, f, size=COPY_BLOCK)
+    return cur.rowcount
+
+
+def _postgres_types(cur, table: str) -> Dict[str, str]:
+    cur.execute(
+        "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+        (table,),
+    )
+    return dict(cur.fetchall())
+
+
+def _parquet_as_csv(path: str) -> str:
+    """A temporary CSV copy of a Parquet file for COPY (nulls as empty fields); the caller removes it."""
+    require_pyarrow()
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    fd, tmp = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    with pq.ParquetFile(path) as pf, pacsv.CSVWriter(tmp, pf.schema_arrow) as writer:
+        for batch in pf.iter_batches():
+            writer.write_batch(batch)
+    return tmp
+
+
+def _postgres_load(conn, directive: CopyDirective, rules: Optional[TableRules] = None,
+                   above: Optional[Above] = None) -> int:
+    if is_parquet(directive.path):
+        tmp = _parquet_as_csv(directive.path)
+        try:
+            return _postgres_load(conn, CopyDirective(directive.table, directive.columns, tmp), rules, above)
+        finally:
+            os.remove(tmp)
+    cur = conn.cursor()
+    if not rules and above is None:
+        return _copy(conn, cur, directive.table, directive.columns, directive.path)
+    # COPY raw text into a staging table, then clean + cast (+ filter) in one INSERT ... SELECT
+    rules = rules or {}
+    staging = f"_stg_{directive.table}"
+    cols = directive.columns
+    cur.execute(f"CREATE TEMP TABLE {staging} ({', '.join(c + ' text' for c in cols)})")
+    _copy(conn, cur, staging, cols, directive.path)
+    types = _postgres_types(cur, directive.table)
+    select = ", ".join(f"CAST({compile_column(c, rules.get(c))} AS {types[c]})" for c in cols)
+    where, params = "", ()
+    if above is not None:
+        key = above[0]
+        where = f" WHERE CAST(NULLIF({key}, '') AS {types[key]}) > CAST(%s AS {types[key]})"
+        params = (str(above[1]),)
+    cur.execute(f"INSERT INTO {directive.table} ({', '.join(cols)}) SELECT {select} FROM {staging}{where}", params)
+    rows = cur.rowcount
+    cur.execute(f"DROP TABLE {staging}")
+    return rows
+
+
+# ---------- Public API ----------
+
+def load_csv(conn, directive: CopyDirective, batch_size: int = BATCH_SIZE,
+             rules: Optional[TableRules] = None, above: Optional[Above] = None) -> int:
+    """
+    Stream one CSV (or Parquet file) into directive.table inside the caller's transaction;
+    returns rows loaded. `above` skips rows at or below a high-water mark.
+    """
+    if driver_of(conn) in ("psycopg", "psycopg2"):
+        return _postgres_load(conn, directive, rules, above)
+    if rules and dialect_of(conn) != "sqlite":
+        raise ValueError("Load-time cleaning needs SQLite or Postgres (psycopg/psycopg2)")
+    # SQLite and any other DB-API driver: batched executemany
+    return _executemany_load(conn, directive, batch_size, placeholder(conn), rules, above)
+
+
+def bulk_load(conn, plan: Sequence[CopyDirective], batch_size: int = BATCH_SIZE,
+              defer_indexes: bool = True, check_foreign_keys: bool = False,
+              spec: Optional[CleaningSpec] = None,
+              above: Optional[Dict[str, Above]] = None) -> List[LoadResult]:
+    """
+    Load every directive inside the caller's transaction, cleaning rows on the
+    way in when a spec is given and, for tables in `above`, skipping rows at
+    or below their high-water mark. On SQLite, secondary
+    indexes of the loaded tables are dropped first and recreated at the end
+    (their rebuild time is reported as a separate "(indexes)" result), and
+    check_foreign_keys runs PRAGMA foreign_key_check on each loaded table,
+    raising ValueError on violations - use it when foreign_keys was ON before
+    SQLITE_LOAD_PRAGMAS switched it off.
+    """
+    sqlite = dialect_of(conn) == "sqlite"
+    deferred = []
+    if sqlite and defer_indexes:
+        for d in plan:
+            for name, sql in _secondary_indexes(conn, d.table):
+                conn.execute(f'DROP INDEX "{name}"')
+                deferred.append((d.table, sql))
+
+    results = []
+    for d in plan:
+        t0 = time.perf_counter()
+        rows = load_csv(conn, d, batch_size, spec.rules_for(d.table) if spec else None,
+                        (above or {}).get(d.table))
+        results.append(LoadResult(d.table, d.path, rows, time.perf_counter() - t0))
+
+    if deferred:
+        t0 = time.perf_counter()
+        for _, sql in deferred:
+            conn.execute(sql)
+        tables = ", ".join(sorted({t for t, _ in deferred}))
+        results.append(LoadResult(f"({tables} indexes)", "", 0, time.perf_counter() - t0))
+
+    if sqlite and check_foreign_keys:
+        t0 = time.perf_counter()
+        for d in plan:
+            violations = conn.execute(f'PRAGMA foreign_key_check("{d.table}")').fetchall()
+            if violations:
+                table, rowid, parent, _ = violations[0]
+                raise ValueError(
+                    f"{len(violations)} foreign key violation(s) in {table} "
+                    f"(first: rowid {rowid} -> {parent})"
+                )
+        results.append(LoadResult("(foreign key check)", "", 0, time.perf_counter() - t0))
+    return results
+
+
+def format_load_report(results: Sequence[LoadResult]) -> str:
+    lines = [f"{'table':<28} {'rows':>12} {'seconds':>9} {'rows/s':>12}"]
+    for r in results:
+        lines.append(f"{r.table:<28} {r.rows:>12,} {r.seconds:>9.3f} {r.rows_per_sec:>12,.0f}")
+    total_rows = sum(r.rows for r in results)
+    total_secs = sum(r.seconds for r in results)
+    lines.append(f"{'total':<28} {total_rows:>12,} {total_secs:>9.3f} "
+                 f"{(total_rows / total_secs if total_secs else 0):>12,.0f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Bulk-load a project's data/raw CSVs (tables must already exist).")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--data-root", help="read CSVs from <data-root>/<project>/data/raw")
+    p.add_argument("--project", required=True, help="project number or name fragment")
+    p.add_argument("--db", required=True, help="SQLite path or Postgres connection string")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--keep-indexes", action="store_true", help="SQLite: maintain indexes during the load")
+    p.add_argument("--check-foreign-keys", action="store_true", help="SQLite: fail on FK violations after loading")
+    p.add_argument("--truncate", action="store_true", help="empty the target tables first (reload)")
+    args = p.parse_args(argv)
+
+    projects = discover_projects(args.root, [args.project], args.data_root)
+    if len(projects) != 1:
+        p.error(f"--project {args.project!r} matches {len(projects)} projects")
+    project = projects[0]
+    conn = connect(args.db)
+    try:
+        statements = []
+        if dialect_of(conn) == "postgres":
+            load_stage = [s for s in project.stages("postgres") if s.is_load]
+            statements = load_stage[0].statements() if load_stage else []
+        previous = set_pragmas(conn, SQLITE_LOAD_PRAGMAS) if dialect_of(conn) == "sqlite" else {}
+        begin(conn)
+        plan = plan_loads(conn, project, statements, args.root)
+        if args.truncate:
+            cur = conn.cursor()
+            for d in reversed(plan):  # children before parents
+                cur.execute(f"DELETE FROM {d.table}")
+        results = bulk_load(conn, plan, args.batch_size, not args.keep_indexes, args.check_foreign_keys)
+        commit(conn)
+        if previous:
+            set_pragmas(conn, previous)
+    finally:
+        conn.close()
+    print(format_load_report(results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,374 @@
+# materialize.py
+"""
+Materialized versions of selected 05_views views.
+
+A project lists the views to materialize in materialized_views.json next to
+its README, with the indexes they should carry and a few representative
+queries (used by bench_materialize.py):
+
+    {"v_order_totals": {"key": ["order_id"],
+                        "indexes": [["customer_id"], ["order_date"]],
+                        "queries": {"kpis": "SELECT ... FROM v_order_totals ..."}}}
+
+When the views stage reaches CREATE VIEW for such a view, the runner hands
+it here instead: the view becomes a table of the same name on SQLite (a
+MATERIALIZED VIEW on Postgres) with those indexes, so every existing query
+keeps working and reads stored rows.
+
+Staleness is tracked in _materialized_views. Triggers on the view's source
+tables flag it on any INSERT/UPDATE/DELETE (row-level on SQLite,
+statement-level on Postgres); a changed definition or a missing trigger
+(e.g. 01_create_tables dropped and recreated a source table) counts as
+stale too. Later pipeline runs refresh a materialized view only when it is
+stale.
+
+    python utils/pipeline/materialize.py --db build/01_retail_sales_analytics.db           # status
+    python utils/pipeline/materialize.py --db build/01_retail_sales_analytics.db --refresh
+"""
+import argparse
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from db import begin, commit, connect, dialect_of
+from sql_stages import Project
+
+CONFIG_FILE = "materialized_views.json"
+STATE_TABLE = "_materialized_views"
+
+_CREATE_VIEW_RE = re.compile(r"^CREATE\s+VIEW\s+(\w+)\s+AS\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_DROP_VIEW_RE = re.compile(r"^DROP\s+VIEW\s+IF\s+EXISTS\s+(\w+)\s*$", re.IGNORECASE)
+_SOURCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)", re.IGNORECASE)
+
+_STATE_DDL = {
+    "sqlite": f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+  name            TEXT PRIMARY KEY,
+  definition      TEXT NOT NULL,
+  sources         TEXT NOT NULL,    -- comma-separated source tables
+  stale           INTEGER NOT NULL,
+  refreshed_at    TEXT,
+  refresh_seconds REAL
+)""",
+    "postgres": f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+  name            TEXT PRIMARY KEY,
+  definition      TEXT NOT NULL,
+  sources         TEXT NOT NULL,
+  stale           BOOLEAN NOT NULL,
+  refreshed_at    TIMESTAMPTZ,
+  refresh_seconds DOUBLE PRECISION
+)""",
+}
+
+# Postgres: one trigger function shared by every materialized view
+_PG_MARK_STALE = f"""CREATE OR REPLACE FUNCTION _mv_mark_stale() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE {STATE_TABLE} SET stale = true WHERE name = TG_ARGV[0] AND NOT stale;
+  RETURN NULL;
+END $$"""
+
+
+@dataclass
+class MaterializedView:
+    name: str
+    key: List[str] = field(default_factory=list)            # unique index
+    indexes: List[List[str]] = field(default_factory=list)  # secondary indexes
+    queries: Dict[str, str] = field(default_factory=dict)   # label -> query reading the view
+
+
+def load_config(project: Project) -> Dict[str, MaterializedView]:
+    """view name -> MaterializedView; empty if the project materializes nothing."""
+    path = os.path.join(project.path, CONFIG_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        name: MaterializedView(name, spec.get("key", []), spec.get("indexes", []), spec.get("queries", {}))
+        for name, spec in data.items()
+    }
+
+
+def parse_create_view(sql: str):
+    """(name, select) for CREATE VIEW name AS select, else None."""
+    m = _CREATE_VIEW_RE.match(sql.strip())
+    return (m.group(1), m.group(2).strip()) if m else None
+
+
+def parse_drop_view(sql: str) -> Optional[str]:
+    m = _DROP_VIEW_RE.match(sql.strip())
+    return m.group(1) if m else None
+
+
+def _ph(conn) -> str:
+    return "?" if dialect_of(conn) == "sqlite" else "%s"
+
+
+def _fetchall(conn, sql: str, params: Sequence = ()) -> List[tuple]:
+    cur = conn.cursor()
+    cur.execute(sql, tuple(params))
+    return cur.fetchall()
+
+
+def _kind(conn, name: str) -> Optional[str]:
+    """'table', 'view', 'matview' or None for what `name` currently is."""
+    if dialect_of(conn) == "sqlite":
+        rows = _fetchall(conn, "SELECT type FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (name,))
+        return rows[0][0] if rows else None
+    rows = _fetchall(
+        conn,
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+        (name,),
+    )
+    return {"r": "table", "v": "view", "m": "matview"}.get(rows[0][0]) if rows else None
+
+
+def _existing_tables(conn) -> set:
+    if dialect_of(conn) == "sqlite":
+        return {r[0] for r in _fetchall(conn, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return {r[0] for r in _fetchall(
+        conn, "SELECT table_name FROM information_schema.tables "
+              "WHERE table_schema = current_schema() AND table_type = 'BASE TABLE'")}
+
+
+def source_tables(conn, select: str, name: str) -> List[str]:
+    """Tables a view definition reads (FROM/JOIN targets that exist as tables)."""
+    existing = _existing_tables(conn)
+    found = []
+    for t in _SOURCE_RE.findall(select):
+        if t in existing and t != name and t not in found:
+            found.append(t)
+    return found
+
+
+def _trigger_names(view: str, table: str) -> List[str]:
+    return [f"_mv_{view}_{table}_{op.lower()}" for op in ("INSERT", "UPDATE", "DELETE")]
+
+
+def _triggers_present(conn, view: str, sources: Sequence[str]) -> bool:
+    if dialect_of(conn) == "sqlite":
+        expected = {n for t in sources for n in _trigger_names(view, t)}
+        rows = _fetchall(conn, "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+                         (f"_mv_{view}_%",))
+        return expected <= {r[0] for r in rows}
+    expected = {f"_mv_{view}_{t}" for t in sources}
+    rows = _fetchall(conn, "SELECT tgname FROM pg_trigger WHERE tgname LIKE %s", (f"_mv_{view}_%",))
+    return expected <= {r[0] for r in rows}
+
+
+def _create_triggers(conn, view: str, sources: Sequence[str]) -> None:
+    cur = conn.cursor()
+    if dialect_of(conn) == "sqlite":
+        for table in sources:
+            for op, trigger in zip(("INSERT", "UPDATE", "DELETE"), _trigger_names(view, table)):
+                cur.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+                cur.execute(
+                    f'CREATE TRIGGER "{trigger}" AFTER {op} ON {table} BEGIN '
+                    f"UPDATE {STATE_TABLE} SET stale = 1 WHERE name = '{view}' AND stale = 0; END"
+                )
+        return
+    cur.execute(_PG_MARK_STALE)
+    for table in sources:
+        trigger = f"_mv_{view}_{table}"
+        cur.execute(f'DROP TRIGGER IF EXISTS "{trigger}" ON {table}')
+        cur.execute(
+            f'CREATE TRIGGER "{trigger}" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+            f"FOR EACH STATEMENT EXECUTE FUNCTION _mv_mark_stale('{view}')"
+        )
+
+
+def _drop_triggers(conn, view: str, sources: Sequence[str]) -> None:
+    cur = conn.cursor()
+    existing = _existing_tables(conn)
+    for table in sources:
+        if dialect_of(conn) == "sqlite":
+            for trigger in _trigger_names(view, table):
+                cur.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+        elif table in existing:
+            cur.execute(f'DROP TRIGGER IF EXISTS "_mv_{view}_{table}" ON {table}')
+
+
+def _state(conn, name: str) -> Optional[tuple]:
+    """(definition, sources list, stale) or None."""
+    if _kind(conn, STATE_TABLE) != "table":
+        return None
+    rows = _fetchall(conn, f"SELECT definition, sources, stale FROM {STATE_TABLE} WHERE name = {_ph(conn)}", (name,))
+    if not rows:
+        return None
+    definition, sources, stale = rows[0]
+    return definition, [s for s in sources.split(",") if s], bool(stale)
+
+
+def _drop_object(conn, name: str) -> None:
+    kind = _kind(conn, name)
+    if kind == "matview":
+        conn.cursor().execute(f"DROP MATERIALIZED VIEW {name}")
+    elif kind in ("table", "view"):
+        conn.cursor().execute(f"DROP {kind.upper()} {name}")
+
+
+def _create_indexes(conn, mv: MaterializedView) -> None:
+    cur = conn.cursor()
+    if mv.key:
+        cur.execute(f"CREATE UNIQUE INDEX ux_{mv.name}_key ON {mv.name} ({', '.join(mv.key)})")
+    for cols in mv.indexes:
+        cur.execute(f"CREATE INDEX ix_{mv.name}_{'_'.join(cols)} ON {mv.name} ({', '.join(cols)})")
+
+
+def _fill(conn, mv: MaterializedView, select: str, create: bool) -> int:
+    """Create (or refresh) the stored rows; returns the row count."""
+    cur = conn.cursor()
+    if dialect_of(conn) == "sqlite":
+        if create:
+            cur.execute(f"CREATE TABLE {mv.name} AS {select}")
+            _create_indexes(conn, mv)
+        else:
+            cur.execute(f"DELETE FROM {mv.name}")
+            cur.execute(f"INSERT INTO {mv.name} {select}")
+    elif create:
+        cur.execute(f"CREATE MATERIALIZED VIEW {mv.name} AS {select} WITH DATA")
+        _create_indexes(conn, mv)
+    else:
+        cur.execute(f"REFRESH MATERIALIZED VIEW {mv.name}")
+    return _fetchall(conn, f"SELECT COUNT(*) FROM {mv.name}")[0][0]
+
+
+def _record(conn, name: str, select: str, sources: Sequence[str], seconds: float) -> None:
+    cur = conn.cursor()
+    cur.execute(_STATE_DDL[dialect_of(conn)])
+    ph = _ph(conn)
+    now = "datetime('now')" if dialect_of(conn) == "sqlite" else "now()"
+    fresh = "0" if dialect_of(conn) == "sqlite" else "false"
+    cur.execute(f"DELETE FROM {STATE_TABLE} WHERE name = {ph}", (name,))
+    cur.execute(
+        f"INSERT INTO {STATE_TABLE} (name, definition, sources, stale, refreshed_at, refresh_seconds) "
+        f"VALUES ({ph}, {ph}, {ph}, {fresh}, {now}, {ph})",
+        (name, select, ",".join(sources), seconds),
+    )
+
+
+def is_stale(conn, name: str, select: Optional[str] = None) -> bool:
+    """True unless `name` is materialized from `select` and nothing it reads changed since."""
+    state = _state(conn, name)
+    if state is None or _kind(conn, name) not in ("table", "matview"):
+        return True
+    definition, sources, stale = state
+    if select is not None and definition != select:
+        return True
+    return stale or not _triggers_present(conn, name, sources)
+
+
+def materialize(conn, mv: MaterializedView, select: str) -> tuple:
+    """
+    Make `mv` current for `select` inside the caller's transaction.
+    Returns (action, rows): 'fresh' (nothing to do), 'refreshed' or 'created'.
+    """
+    state = _state(conn, mv.name)
+    kind = _kind(conn, mv.name)
+    if state and kind in ("table", "matview") and state[0] == select:
+        if not is_stale(conn, mv.name, select):
+            return "fresh", _fetchall(conn, f"SELECT COUNT(*) FROM {mv.name}")[0][0]
+        action, create = "refreshed", False
+    else:
+        action, create = "created", True
+        if state:
+            _drop_triggers(conn, mv.name, state[1])
+        _drop_object(conn, mv.name)
+    t0 = time.perf_counter()
+    rows = _fill(conn, mv, select, create)
+    sources = source_tables(conn, select, mv.name)
+    _create_triggers(conn, mv.name, sources)
+    _record(conn, mv.name, select, sources, time.perf_counter() - t0)
+    return action, rows
+
+
+def dematerialize(conn, name: str) -> bool:
+    """Turn a materialized view back into nothing (05_views recreates it); False if it wasn't one."""
+    state = _state(conn, name)
+    if state is None:
+        return False
+    _drop_triggers(conn, name, state[1])
+    if _kind(conn, name) in ("table", "matview"):
+        _drop_object(conn, name)
+    conn.cursor().execute(f"DELETE FROM {STATE_TABLE} WHERE name = {_ph(conn)}", (name,))
+    return True
+
+
+def handle_view_statement(conn, sql: str, config: Dict[str, MaterializedView]) -> Optional[tuple]:
+    """
+    Views-stage hook: (summary, rows) if `sql` was handled here, None to let
+    the engine run it. DROP VIEW of a materialized view is skipped (materialize
+    decides whether to rebuild); DROP VIEW of one that no longer is configured
+    dematerializes it first, so the plain view can come back.
+    """
+    dropped = parse_drop_view(sql)
+    if dropped:
+        if dropped in config:
+            return f"keep materialized {dropped}", 0
+        if dematerialize(conn, dropped):
+            conn.cursor().execute(sql)
+            return f"dematerialize {dropped}", 0
+        return None
+    created = parse_create_view(sql)
+    if created and created[0] in config:
+        action, rows = materialize(conn, config[created[0]], created[1])
+        return f"materialize {created[0]}: {action}", rows
+    return None
+
+
+def status(conn) -> List[dict]:
+    if _kind(conn, STATE_TABLE) != "table":
+        return []
+    rows = _fetchall(conn, f"SELECT name, refreshed_at, refresh_seconds FROM {STATE_TABLE} ORDER BY name")
+    out = []
+    for name, refreshed_at, seconds in rows:
+        exists = _kind(conn, name) in ("table", "matview")
+        out.append({
+            "name": name,
+            "rows": _fetchall(conn, f"SELECT COUNT(*) FROM {name}")[0][0] if exists else None,
+            "stale": is_stale(conn, name),
+            "refreshed_at": str(refreshed_at),
+            "refresh_seconds": seconds,
+        })
+    return out
+
+
+def refresh_stale(conn) -> List[tuple]:
+    """Refresh every stale materialized view in one transaction; [(name, rows, seconds)]."""
+    done = []
+    begin(conn)
+    for row in status(conn):
+        if not row["stale"] or row["rows"] is None:
+            continue  # dropped ones are recreated (with their indexes) by the pipeline
+        definition, _, _ = _state(conn, row["name"])
+        t0 = time.perf_counter()
+        _, rows = materialize(conn, MaterializedView(row["name"]), definition)
+        done.append((row["name"], rows, time.perf_counter() - t0))
+    commit(conn)
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Show (or refresh) the materialized views in a pipeline database.")
+    p.add_argument("--db", required=True, help="SQLite path or Postgres connection string")
+    p.add_argument("--refresh", action="store_true", help="refresh the stale ones")
+    args = p.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        if args.refresh:
+            for name, rows, seconds in refresh_stale(conn):
+                print(f"refreshed {name}: {rows:,} rows in {seconds:.3f}s")
+        print(f"{'view':<28} {'rows':>10} {'stale':>6}  refreshed_at")
+        for row in status(conn):
+            rows = "-" if row["rows"] is None else f"{row['rows']:,}"
+            print(f"{row['name']:<28} {rows:>10} {('yes' if row['stale'] else 'no'):>6}  {row['refreshed_at']}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
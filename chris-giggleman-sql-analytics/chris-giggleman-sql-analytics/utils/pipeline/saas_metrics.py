@@ -0,0 +1,269 @@
+# saas_metrics.py
+"""
+Event-based engine for the SaaS subscription metrics.
+
+Instead of joining subscriptions to months, every subscriptions row becomes
+delta events keyed by month: +1 sub / +price at its start month and -1 /
+-price the month after its end month. Bucketing by month needs no sort,
+and one walk over the months in order then yields each month's active
+subscriptions and MRR as running sums. Churn is a per-month set of
+accounts. For retention an account's few subscriptions are first merged
+into disjoint month spans (so it counts once a month), which become +1/-1
+events of its cohort. Everything is one pass over the rows plus one pass
+over the months, so time grows linearly with the number of subscriptions.
+
+The output has the same rows and columns as the 04_saas_subscriptions
+04_analysis.sql queries (same month bounds, same ROUND(..., 2)):
+
+    metrics_mrr_monthly       month_start, active_subs, mrr
+    metrics_churn_monthly     churn_month, churned_accounts
+    metrics_cohort_retention  cohort_month, month_start, active_accounts,
+                              cohort_accounts, retention_pct
+
+MRR is summed in cents, so adding and removing prices leaves no float drift.
+
+    python utils/pipeline/saas_metrics.py --db build/04_saas_subscriptions.db --check
+    python utils/pipeline/saas_metrics.py --db build/04_saas_subscriptions.db --write
+"""
+import argparse
+import gc
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from db import begin, commit, connect, dialect_of
+from sql_stages import ROOT, discover_projects
+
+# (account_id, start_date, end_date or None, monthly_price)
+Row = Tuple[Any, Any, Any, float]
+
+TABLES = {
+    "metrics_mrr_monthly": ("month_start", "active_subs", "mrr"),
+    "metrics_churn_monthly": ("churn_month", "churned_accounts"),
+    "metrics_cohort_retention": ("cohort_month", "month_start", "active_accounts",
+                                 "cohort_accounts", "retention_pct"),
+}
+_DDL = {
+    "sqlite": {
+        "metrics_mrr_monthly": "month_start TEXT PRIMARY KEY, active_subs INTEGER NOT NULL, mrr REAL NOT NULL",
+        "metrics_churn_monthly": "churn_month TEXT PRIMARY KEY, churned_accounts INTEGER NOT NULL",
+        "metrics_cohort_retention": "cohort_month TEXT NOT NULL, month_start TEXT NOT NULL, "
+                                    "active_accounts INTEGER NOT NULL, cohort_accounts INTEGER NOT NULL, "
+                                    "retention_pct REAL NOT NULL, PRIMARY KEY (cohort_month, month_start)",
+    },
+    "postgres": {
+        "metrics_mrr_monthly": "month_start DATE PRIMARY KEY, active_subs INTEGER NOT NULL, mrr NUMERIC(14,2) NOT NULL",
+        "metrics_churn_monthly": "churn_month DATE PRIMARY KEY, churned_accounts INTEGER NOT NULL",
+        "metrics_cohort_retention": "cohort_month DATE NOT NULL, month_start DATE NOT NULL, "
+                                    "active_accounts INTEGER NOT NULL, cohort_accounts INTEGER NOT NULL, "
+                                    "retention_pct NUMERIC(6,2) NOT NULL, PRIMARY KEY (cohort_month, month_start)",
+    },
+}
+# SELECTs of 04_analysis.sql (SQLite) that the engine reproduces
+ANALYSIS_INDEX = {"metrics_mrr_monthly": 0, "metrics_churn_monthly": 1, "metrics_cohort_retention": 3}
+
+
+@dataclass
+class Metrics:
+    mrr: List[tuple] = field(default_factory=list)
+    churn: List[tuple] = field(default_factory=list)
+    retention: List[tuple] = field(default_factory=list)
+
+    def tables(self) -> Dict[str, List[tuple]]:
+        return {"metrics_mrr_monthly": self.mrr, "metrics_churn_monthly": self.churn,
+                "metrics_cohort_retention": self.retention}
+
+
+def month_key(value) -> Optional[int]:
+    """Months since year 0 for a date or 'YYYY-MM-DD...' text; None for NULL/blank."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.year * 12 + value.month - 1
+    return int(value[:4]) * 12 + int(value[5:7]) - 1
+
+
+def month_start(key: int) -> str:
+    return f"{key // 12:04d}-{key % 12 + 1:02d}-01"
+
+
+def sql_round(x: float, digits: int = 2) -> float:
+    """ROUND(x, digits) as SQLite does it: half away from zero on the shortest decimal form."""
+    return float(Decimal(repr(x)).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def today_utc() -> date:
+    """date('now') in SQLite is UTC."""
+    return datetime.now(timezone.utc).date()
+
+
+def compute(rows: Iterable[Row], today: Optional[date] = None) -> Metrics:
+    """Sweep the subscriptions once; `today` fixes the open-ended bounds (default: UTC today)."""
+    # Millions of small span lists and no reference cycles: the cyclic GC only costs time here
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _sweep(rows, today)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _sweep(rows: Iterable[Row], today: Optional[date]) -> Metrics:
+    today_key = month_key(today or today_utc())
+    subs_delta: Dict[int, int] = defaultdict(int)
+    cents_delta: Dict[int, int] = defaultdict(int)
+    churned: Dict[int, Set[Any]] = defaultdict(set)
+    spans: Dict[Any, List[Tuple[int, int]]] = defaultdict(list)
+    first_start = None
+    last_end = None       # latest end month; the MRR range ends at max(COALESCE(end_date, today))
+    any_open = False
+    keys: Dict[Any, Optional[int]] = {}   # a few thousand distinct dates, millions of rows
+
+    for account, start, end, price in rows:
+        s = keys.get(start)
+        if s is None:
+            s = keys[start] = month_key(start)
+        e = keys.get(end, -1)
+        if e == -1:
+            e = keys[end] = month_key(end)
+        if e is None:
+            any_open = True
+        else:
+            churned[e].add(account)
+            last_end = e if last_end is None else max(last_end, e)
+            if e < s:
+                # Ends before it starts: active in no month, but (like the SQL) it still
+                # puts the account in its start month's cohort
+                if s <= today_key:
+                    spans[account].append((s, e))
+                continue
+        cents = round(price * 100)
+        subs_delta[s] += 1
+        cents_delta[s] += cents
+        if e is not None:
+            subs_delta[e + 1] -= 1
+            cents_delta[e + 1] -= cents
+        first_start = s if first_start is None else min(first_start, s)
+        if s <= today_key:
+            spans[account].append((s, today_key if e is None else min(e, today_key)))
+
+    metrics = Metrics()
+    # MRR: running sums from the first start month to the last month
+    if first_start is not None:
+        candidates = [m for m in (last_end, today_key if any_open else None) if m is not None]
+        last_month = max(candidates)
+        active = cents = 0
+        for m in range(first_start, last_month + 1):
+            active += subs_delta.get(m, 0)
+            cents += cents_delta.get(m, 0)
+            if active:
+                metrics.mrr.append((month_start(m), active, sql_round(cents / 100)))
+
+    metrics.churn = [(month_start(m), len(accounts)) for m, accounts in sorted(churned.items())]
+
+    # Retention: merge each account's spans, then +1/-1 per cohort and month
+    cohort_size: Dict[int, int] = defaultdict(int)
+    cohort_delta: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    for account_spans in spans.values():
+        account_spans.sort()   # a handful per account
+        cohort = account_spans[0][0]
+        cohort_size[cohort] += 1
+        deltas = cohort_delta[cohort]
+        lo = hi = None
+        for s, e in account_spans:
+            if e < s:
+                continue   # cohort only (see above)
+            if lo is None:
+                lo, hi = s, e
+            elif s <= hi + 1:
+                hi = max(hi, e)
+            else:
+                deltas[lo] += 1
+                deltas[hi + 1] -= 1
+                lo, hi = s, e
+        if lo is not None:
+            deltas[lo] += 1
+            deltas[hi + 1] -= 1
+    for cohort in sorted(cohort_size):
+        size, deltas, active = cohort_size[cohort], cohort_delta[cohort], 0
+        for m in range(cohort, today_key + 1):
+            active += deltas.get(m, 0)
+            metrics.retention.append((month_start(cohort), month_start(m), active, size,
+                                      sql_round(100.0 * active / size)))
+    return metrics
+
+
+def read_rows(conn) -> Iterable[Row]:
+    cur = conn.cursor()
+    cur.execute("SELECT account_id, start_date, end_date, monthly_price FROM subscriptions")
+    while True:
+        batch = cur.fetchmany(10_000)
+        if not batch:
+            return
+        for account, start, end, price in batch:
+            yield account, start, end, float(price)
+
+
+def write_tables(conn, metrics: Metrics) -> None:
+    """Replace the metrics_* tables, in one transaction."""
+    dialect = dialect_of(conn)
+    ph = "?" if dialect == "sqlite" else "%s"
+    begin(conn)
+    cur = conn.cursor()
+    for table, rows in metrics.tables().items():
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"CREATE TABLE {table} ({_DDL[dialect][table]})")
+        columns = TABLES[table]
+        cur.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([ph] * len(columns))})",
+                        rows)
+    commit(conn)
+
+
+def check_against_sql(conn, metrics: Metrics, root: str = ROOT) -> Dict[str, Tuple[int, int, bool]]:
+    """Per table: (engine rows, SQL rows, identical) against 04_analysis.sql (SQLite)."""
+    project = discover_projects(root, ["saas"])[0]
+    analysis = [s for s in project.stages("sqlite", ["04"])[0].statements() if s.kind in ("SELECT", "WITH")]
+    results = {}
+    for table, rows in metrics.tables().items():
+        cur = conn.cursor()
+        cur.execute(analysis[ANALYSIS_INDEX[table]].sql)
+        expected = [tuple(r) for r in cur.fetchall()]
+        results[table] = (len(rows), len(expected), rows == expected)
+    return results
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="SaaS MRR, churn and cohort retention in one event sweep.")
+    p.add_argument("--root", default=ROOT)
+    p.add_argument("--db", required=True, help="SaaS database built by run_pipeline.py (SQLite file or Postgres DSN)")
+    p.add_argument("--write", action="store_true", help="store the results as metrics_* tables")
+    p.add_argument("--check", action="store_true", help="SQLite: compare with the 04_analysis.sql queries")
+    args = p.parse_args()
+
+    conn = connect(args.db)
+    try:
+        t0 = time.perf_counter()
+        metrics = compute(read_rows(conn))
+        print(f"sweep: {time.perf_counter() - t0:.3f}s  "
+              + ", ".join(f"{t} {len(r):,} rows" for t, r in metrics.tables().items()))
+        if args.write:
+            write_tables(conn, metrics)
+        if args.check:
+            if dialect_of(conn) != "sqlite":
+                raise SystemExit("--check compares with the SQLite analysis queries")
+            checks = check_against_sql(conn, metrics, args.root)
+            for table, (ours, theirs, same) in checks.items():
+                print(f"  {table:<26} engine {ours:>6,}  sql {theirs:>6,}  {'same' if same else 'DIFFERENT'}")
+            if not all(same for _, _, same in checks.values()):
+                return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+# sql_stages.py
+"""
+Discovery and parsing of each case study's numbered SQL stage files.
+
+Layout:
+    <root>/<NN_project>/sql/<dialect>/<NN_stage>.sql
+    <root>/<NN_project>/data/raw/*.csv
+
+split_sql() turns a stage file into statements the way psql / DB Browser
+would run them: comments are dropped, ';' inside strings, quoted identifiers
+and $$-quoted bodies doesn't end a statement, and psql meta-commands
+(\\copy ...) are kept as their own "meta" statements.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DIALECTS = ("sqlite", "postgres")
+
+_PROJECT_RE = re.compile(r"^(\d\d)_\w+$")
+_STAGE_RE = re.compile(r"^(\d\d)_(\w+)\.sql$")
+_DOLLAR_RE = re.compile(r"\$[A-Za-z_]*\$")
+_NUMBERING_RE = re.compile(r"^\d+[.)]\s*")
+_ASIDE_RE = re.compile(r"\s*\([^)]*\)")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass
+class Statement:
+    sql: str
+    line: int            # 1-based line the statement starts on
+    meta: bool = False   # psql backslash command (\copy ...)
+
+    @property
+    def kind(self) -> str:
+        word = self.sql.lstrip("\\").split(None, 1)
+        return word[0].upper() if word else ""
+
+    @property
+    def summary(self) -> str:
+        first = " ".join(self.sql.split())
+        return first if len(first) <= 60 else first[:57] + "..."
+
+
+@dataclass
+class Stage:
+    number: str     # "03"
+    name: str       # "03_cleaning"
+    path: str
+
+    def statements(self) -> List[Statement]:
+        with open(self.path, encoding="utf-8") as f:
+            return split_sql(f.read())
+
+    @property
+    def is_load(self) -> bool:
+        return self.name.endswith("load_data")
+
+    @property
+    def is_cleaning(self) -> bool:
+        return self.name.endswith("_cleaning")
+
+    @property
+    def is_tests(self) -> bool:
+        return self.name.endswith("_tests")
+
+
+@dataclass
+class Project:
+    name: str       # "01_retail_sales_analytics"
+    path: str
+    # Where data/raw lives if not under path (e.g. generate_all.py --root /tmp/big)
+    data_root: Optional[str] = None
+
+    @property
+    def number(self) -> str:
+        return self.name[:2]
+
+    @property
+    def data_dir(self) -> str:
+        base = os.path.join(self.data_root, self.name) if self.data_root else self.path
+        return os.path.join(base, "data", "raw")
+
+    def sql_dir(self, dialect: str) -> str:
+        return os.path.join(self.path, "sql", dialect)
+
+    def stages(self, dialect: str, only: Optional[Sequence[str]] = None) -> List[Stage]:
+        """Numbered stage files for a dialect, in order; `only` filters by stage number."""
+        sql_dir = self.sql_dir(dialect)
+        stages = []
+        for fname in sorted(os.listdir(sql_dir)):
+            m = _STAGE_RE.match(fname)
+            if not m or (only and m.group(1) not in only):
+                continue
+            stages.append(Stage(m.group(1), fname[:-4], os.path.join(sql_dir, fname)))
+        return stages
+
+
+def discover_projects(root: str = ROOT, select: Optional[Sequence[str]] = None,
+                      data_root: Optional[str] = None) -> List[Project]:
+    """
+    Every NN_* folder with a sql/ directory (00_setup has none).
+    `select` entries match a project number ("01") or any part of its name ("saas");
+    `data_root` reads CSVs from <data_root>/<project>/data/raw instead.
+    """
+    projects = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not _PROJECT_RE.match(name) or not os.path.isdir(os.path.join(path, "sql")):
+            continue
+        if select and not any(s == name[:2] or s in name for s in select):
+            continue
+        projects.append(Project(name, path, data_root))
+    return projects
+
+
+def _title_above(lines: List[str], line: int) -> str:
+    """The comment line directly above 1-based `line` (no blank line between), or ''."""
+    i = line - 2
+    if i >= 0 and lines[i].strip().startswith("--"):
+        return lines[i].strip()[2:].strip()
+    return ""
+
+
+def named_selects(stage: Stage, fallback: str = "select") -> List[Tuple[str, str, Statement]]:
+    """
+    (name, title, statement) for each SELECT of a stage file, named after the
+    comment line right above it ("-- 1) Orphan order_items (by order_id)" ->
+    orphan_order_items; <fallback>_<line> if there is none).
+    """
+    with open(stage.path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    named, seen = [], set()
+    for s in stage.statements():
+        if s.kind not in ("SELECT", "WITH"):
+            continue
+        title = _NUMBERING_RE.sub("", _title_above(lines, s.line))
+        name = _SLUG_RE.sub("_", _ASIDE_RE.sub("", title).lower()).strip("_")[:60] or f"{fallback}_{s.line}"
+        if name in seen:
+            name = f"{name}_{s.line}"
+        seen.add(name)
+        named.append((name, title or name, s))
+    return named
+
+
+def split_sql(text: str) -> List[Statement]:
+    statements: List[Statement] = []
+    buf: List[str] = []
+    start_line = 0
+    line = 1
+    i, n = 0, len(text)
+
+    def emit(meta: bool = False):
+        nonlocal buf, start_line
+        sql = "".join(buf).strip()
+        if sql and sql != "\\":
+            statements.append(Statement(sql, start_line, meta))
+        buf, start_line = [], 0
+
+    def take(j: int):
+        """Append text[i:j] to the current statement."""
+        nonlocal i, line, start_line
+        chunk = text[i:j]
+        if not start_line and chunk.strip():
+            start_line = line + chunk[:len(chunk) - len(chunk.lstrip())].count("\n")
+        buf.append(chunk)
+        line += chunk.count("\n")
+        i = j
+
+    while i < n:
+        c = text[i]
+        if c == "\\" and not "".join(buf).strip():
+            # psql meta-command: \copy runs to its ';', anything else to end of line
+            if text.startswith("\\copy", i):
+                end = text.find(";", i)
+                end = n if end < 0 else end
+            else:
+                end = text.find("\n", i)
+                end = n if end < 0 else end
+            take(end)
+            emit(meta=True)
+            if i < n and text[i] == ";":
+                i += 1
+        elif text.startswith("--", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            line += text.count("\n", i, end)
+            i = end
+            buf.append(" ")
+        elif c in ("'", '"'):
+            end = text.find(c, i + 1)
+            take(n if end < 0 else end + 1)
+        elif c == "$" and _DOLLAR_RE.match(text, i):
+            tag = _DOLLAR_RE.match(text, i).group(0)
+            end = text.find(tag, i + len(tag))
+            take(n if end < 0 else end + len(tag))
+        elif c == ";":
+            i += 1
+            emit()
+        else:
+            take(i + 1)
+    emit()
+    return statements
@@ -0,0 +1,124 @@
+# alias_index.py
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class AliasIndex:
+    """
+    Aho-Corasick automaton over lower-cased aliases.
+
+    Each alias is registered with an integer rank (its owner's position in
+    the config: entity index or column index). Matching a text is a single
+    left-to-right pass, no matter how many aliases are configured.
+
+    The scoring mirrors the original substring loops in SchemaConfig:
+    - longest matching alias wins
+    - on equal length, the lowest rank (first in config order) wins
+    - an empty alias is contained in every text, so matches() always
+      reports its owner, but with length 0 it never wins best()
+    """
+
+    def __init__(self, aliases: Iterable[Tuple[str, int]]):
+        # Trie: one transition dict per node, node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per node: best (length, rank) among aliases ending here (incl. via fail links)
+        self._best: List[Optional[Tuple[int, int]]] = [None]
+        # Per node: every rank whose alias ends here (incl. via fail links)
+        self._ranks: List[frozenset] = [frozenset()]
+
+        own_ranks: Dict[int, Set[int]] = {}
+        always: Set[int] = set()
+        for alias, rank in aliases:
+            alias_low = alias.lower()
+            if not alias_low:
+                always.add(rank)
+                continue
+            node = self._insert(alias_low)
+            own_ranks.setdefault(node, set()).add(rank)
+            score = (len(alias_low), rank)
+            current = self._best[node]
+            if current is None or _beats(score, current):
+                self._best[node] = score
+
+        for node, ranks in own_ranks.items():
+            self._ranks[node] = frozenset(ranks)
+        # Ranks with an empty alias: matched by any text
+        self._always = frozenset(always)
+
+        self._link()
+
+    def _insert(self, alias_low: str) -> int:
+        node = 0
+        for ch in alias_low:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+                self._ranks.append(frozenset())
+                self._goto[node][ch] = nxt
+            node = nxt
+        return node
+
+    def _link(self) -> None:
+        """
+        Breadth-first pass that sets fail links and folds each node's
+        fail-chain outputs into its precomputed best score and rank set.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            fail = self._fail[node]
+
+            inherited = self._best[fail]
+            if inherited is not None:
+                own = self._best[node]
+                if own is None or _beats(inherited, own):
+                    self._best[node] = inherited
+            if self._ranks[fail]:
+                self._ranks[node] = self._ranks[node] | self._ranks[fail]
+
+            for ch, child in self._goto[node].items():
+                state = fail
+                while state and ch not in self._goto[state]:
+                    state = self._fail[state]
+                target = self._goto[state].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                queue.append(child)
+
+    def _walk(self, text_low: str) -> Iterable[int]:
+        goto = self._goto
+        fail = self._fail
+        state = 0
+        for ch in text_low:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if state:
+                yield state
+
+    def best(self, text: str) -> Optional[int]:
+        """Rank of the winning alias owner in text, or None if nothing matches."""
+        best_score: Optional[Tuple[int, int]] = None
+        best = self._best
+        for state in self._walk(text.lower()):
+            score = best[state]
+            if score is not None and (best_score is None or _beats(score, best_score)):
+                best_score = score
+        return best_score[1] if best_score else None
+
+    def matches(self, text: str) -> Set[int]:
+        """Ranks of every owner with at least one alias contained in text."""
+        found: Set[int] = set(self._always)
+        ranks = self._ranks
+        for state in self._walk(text.lower()):
+            if ranks[state]:
+                found.update(ranks[state])
+        return found
+
+
+def _beats(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    """Longer alias wins; on a tie the earlier rank wins."""
+    return a[0] > b[0] or (a[0] == b[0] and a[1] < b[1])
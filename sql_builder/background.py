@@ -0,0 +1,202 @@
+# background.py
+"""
+Background work for the GUI: translation and query execution off the Tk
+main thread.
+
+Neither class touches Tk. Results are handed to a `deliver` callable as
+zero-argument callbacks; the GUI passes a queue.Queue's put and drains the
+queue from the main loop with after(), so every widget update still
+happens on the main thread.
+
+- LatestOnlyWorker runs one job at a time and keeps only the newest
+  waiting job. Submitting replaces a job that has not started, and the
+  result of a job that was overtaken by a newer submit (or cancel()) is
+  dropped. Typing "list all users" therefore translates the final text
+  once, not every intermediate prefix.
+- ResultPager runs a query on its own thread and connection (sqlite3
+  connections belong to the thread that opened them). It fetches one page
+  of rows at a time, when that page is first asked for, and keeps the
+  pages already seen so going back is free. The whole result set is never
+  read unless every page is visited.
+"""
+import queue
+import threading
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from executor import PreparedExecutor
+
+Deliver = Callable[[Callable[[], None]], None]
+
+
+class LatestOnlyWorker:
+    """One worker thread; a new submit supersedes everything submitted before it."""
+
+    def __init__(self, deliver: Deliver, name: str = "sql-builder-worker"):
+        self._deliver = deliver
+        self._cond = threading.Condition()
+        self._pending: Optional[Tuple[int, Callable, tuple, Callable, Callable]] = None
+        self._generation = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_result: Callable[[Any], None],
+        on_error: Callable[[BaseException], None],
+    ) -> int:
+        """Queue fn(*args), replacing any job that has not started; returns its ticket."""
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, fn, args, on_result, on_error)
+            self._cond.notify()
+            return self._generation
+
+    def cancel(self) -> None:
+        """Drop the waiting job and the result of the running one."""
+        with self._cond:
+            self._generation += 1
+            self._pending = None
+
+    def is_current(self, ticket: int) -> bool:
+        return ticket == self._generation
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                ticket, fn, args, on_result, on_error = self._pending
+                self._pending = None
+            try:
+                result = fn(*args)
+            except Exception as e:
+                callback = (lambda e=e: on_error(e))
+            else:
+                callback = (lambda r=result: on_result(r))
+            # Checked again on the main thread: a submit may land between here and there
+            self._deliver(lambda c=callback, t=ticket: c() if self.is_current(t) else None)
+
+
+class ResultPager:
+    """
+    Streams the rows of one query at a time into pages of `page_size`.
+
+    run() starts a query, page(n) asks for page n, and cancel() abandons the
+    current query. sqlite3 connections are interrupted mid-statement. Each
+    callback gets the run's ticket so the GUI can ignore a previous run's pages.
+    """
+
+    def __init__(self, connect: Callable[[], Any], deliver: Deliver, page_size: int = 100):
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self._connect = connect
+        self._deliver = deliver
+        self.page_size = page_size
+        self._commands: "queue.Queue[tuple]" = queue.Queue()
+        self._generation = 0
+        self._conn = None
+        self._thread = threading.Thread(target=self._run, name="sql-builder-pager", daemon=True)
+        self._thread.start()
+
+    def run(
+        self,
+        intent,
+        schema,
+        on_page: Callable[[int, int, List[str], List[tuple], bool], None],
+        on_error: Callable[[int, BaseException], None],
+    ) -> int:
+        """Execute `intent` (parameterized, see executor.py) and deliver page 0 to on_page(ticket, n, columns, rows, last)."""
+        self.cancel()
+        self._generation += 1
+        self._commands.put(("run", self._generation, intent, schema, on_page, on_error))
+        self._commands.put(("page", self._generation, 0))
+        return self._generation
+
+    def page(self, n: int) -> None:
+        self._commands.put(("page", self._generation, n))
+
+    def cancel(self) -> None:
+        self._generation += 1
+        conn = self._conn
+        if conn is not None and hasattr(conn, "interrupt"):
+            conn.interrupt()   # safe from another thread; the running step raises OperationalError
+
+    def close(self) -> None:
+        self.cancel()
+        self._commands.put(("close",))
+
+    def _run(self) -> None:
+        cursor = None
+        columns: List[str] = []
+        pages: List[List[tuple]] = []
+        exhausted = False
+        ticket, on_page, on_error = 0, None, None
+        executor = None
+        try:
+            while True:
+                command = self._commands.get()
+                if command[0] == "close":
+                    return
+                if command[1] != self._generation:
+                    continue   # from a cancelled run
+                try:
+                    if command[0] == "run":
+                        _, ticket, intent, schema, on_page, on_error = command
+                        if executor is None:
+                            self._conn = self._connect()
+                            executor = PreparedExecutor(self._conn)
+                        if cursor is not None:
+                            cursor.close()
+                        cursor = executor.run_intent(intent, schema)
+                        columns = [d[0] for d in cursor.description or ()]
+                        pages, exhausted = [], False
+                        continue
+                    if cursor is None:
+                        continue   # the run failed; its error was delivered
+                    n = max(0, command[2])
+                    while len(pages) <= n and not exhausted:
+                        rows = cursor.fetchmany(self.page_size)
+                        exhausted = len(rows) < self.page_size
+                        if rows or not pages:
+                            pages.append([tuple(r) for r in rows])
+                    n = min(n, len(pages) - 1)
+                    last = exhausted and n == len(pages) - 1
+                    self._deliver(self._callback(on_page, ticket, n, columns, pages[n], last))
+                except Exception as e:
+                    cursor, pages, exhausted = None, [], True
+                    self._deliver(self._callback(on_error, ticket, e))
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+
+    def _callback(self, fn: Callable, ticket: int, *args: Any) -> Callable[[], None]:
+        return lambda: fn(ticket, *args) if ticket == self._generation else None
+
+
+def drain(q: "queue.Queue[Callable[[], None]]", limit: int = 100) -> int:
+    """Run up to `limit` delivered callbacks on the calling (main) thread; returns how many ran."""
+    ran = 0
+    while ran < limit:
+        try:
+            callback = q.get_nowait()
+        except queue.Empty:
+            break
+        callback()
+        ran += 1
+    return ran
+
+
+def format_rows(rows: Sequence[tuple]) -> List[Tuple[str, ...]]:
+    """Cell text for a table view: NULL as an empty cell."""
+    return [tuple("" if v is None else str(v) for v in row) for row in rows]
@@ -0,0 +1,209 @@
+# batch.py
+"""
+Batch NL → SQL translation.
+
+translate_many() runs parse_nl_to_intent + build_sql over many prompts,
+optionally fanned out over a process pool. Each worker loads SchemaConfig
+once (via the pool initializer) instead of once per prompt. Results come
+back in input order and are streamed, so arbitrarily large inputs only keep
+a bounded window of chunks in flight.
+
+CLI (also reachable as `python main.py batch ...`):
+
+    python batch.py prompts.jsonl -o results.jsonl --workers 8
+    python batch.py prompts.csv --prompt-column question
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from schema import SchemaConfig
+from nl_parser import parse_nl_to_intent
+from sql_builder import build_sql
+from dialects import DEFAULT_DIALECT, DIALECTS
+
+# Schema loaded once per worker process by _init_worker
+_WORKER_SCHEMA: Optional[SchemaConfig] = None
+
+
+def translate_one(prompt: str, schema: SchemaConfig, dialect: str = DEFAULT_DIALECT) -> Dict[str, Any]:
+    """
+    Translate a single prompt. Never raises for bad prompts: failures are
+    reported in the "error" field so one bad row doesn't stop a batch.
+    """
+    try:
+        intent = parse_nl_to_intent(prompt, schema)
+        sql = build_sql(intent, schema, dialect)
+        return {"prompt": prompt, "intent": asdict(intent), "sql": sql, "error": None}
+    except Exception as e:
+        return {"prompt": prompt, "intent": None, "sql": None, "error": str(e)}
+
+
+def _init_worker(schema_path: str, options: Dict[str, Any], version: str) -> None:
+    global _WORKER_SCHEMA
+    _WORKER_SCHEMA = SchemaConfig(schema_path, **options)
+    if _WORKER_SCHEMA.version != version:
+        raise RuntimeError(f"{schema_path} changed since the batch started; rerun it")
+
+
+def _translate_chunk(prompts: List[str], dialect: str) -> List[Dict[str, Any]]:
+    return [translate_one(p, _WORKER_SCHEMA, dialect) for p in prompts]
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def translate_many(
+    prompts: Iterable[str],
+    schema: SchemaConfig,
+    workers: int = 1,
+    chunksize: int = 256,
+    dialect: str = DEFAULT_DIALECT,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Translate prompts in input order, yielding one result dict per prompt
+    (see translate_one).
+
+    - workers <= 1: runs in-process with the given schema.
+    - workers > 1: process pool; each worker loads the schema from
+      schema.path once, with the same options (schema.options) and checked
+      against schema.version, so it translates exactly as in-process.
+      At most 2 * workers chunks are in flight at a time.
+    """
+    if workers <= 1:
+        for prompt in prompts:
+            yield translate_one(prompt, schema, dialect)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(schema.path), schema.options, schema.version),
+    ) as pool:
+        pending = deque()
+        for chunk in _chunks(prompts, chunksize):
+            pending.append(pool.submit(_translate_chunk, chunk, dialect))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ---------- CLI ----------
+
+def _check_prompt_column(path: Path, prompt_column: str) -> None:
+    """
+    Exit with an error if the CSV header, or the first JSONL object, has no
+    prompt_column, rather than translating a whole file of empty prompts.
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            fields = next(csv.reader(f), [])
+        else:
+            first = next((line for line in f if line.strip()), None)
+            obj = json.loads(first) if first is not None else None
+            if not isinstance(obj, dict):
+                return   # empty file or bare-string lines
+            fields = list(obj)
+    if prompt_column not in fields:
+        raise SystemExit(
+            f"{path}: no '{prompt_column}' field (found: {', '.join(fields) or 'none'}); "
+            "pick the prompt field with --prompt-column"
+        )
+
+
+def _read_prompts(path: Path, prompt_column: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield input records with at least a "prompt" key.
+    JSONL lines may be objects ({"prompt": ..., "id": ...}) or bare strings.
+    CSV files must have a header containing prompt_column.
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                record = dict(row)
+                record["prompt"] = record.pop(prompt_column, "") or ""
+                yield record
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if isinstance(obj, str):
+                    yield {"prompt": obj}
+                else:
+                    record = dict(obj)
+                    record["prompt"] = record.pop(prompt_column, "") or ""
+                    yield record
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    base_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(
+        prog="sql_builder batch",
+        description="Translate saved prompts (JSONL or CSV) into JSONL of intent + SQL + error.",
+    )
+    parser.add_argument("input", type=Path, help="prompts file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", type=Path, help="output JSONL (default: stdout)")
+    parser.add_argument("--schema", type=Path, default=base_dir / "schema_config.json")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--prompt-column", default="prompt")
+    parser.add_argument("--dialect", default=DEFAULT_DIALECT, choices=sorted(DIALECTS))
+    args = parser.parse_args(argv)
+
+    _check_prompt_column(args.input, args.prompt_column)
+    schema = SchemaConfig(args.schema)
+    records = _read_prompts(args.input, args.prompt_column)
+
+    # Extra input fields (ids, tags, ...) are carried through to the output
+    extras: deque = deque()
+
+    def prompts() -> Iterator[str]:
+        for record in records:
+            prompt = record.pop("prompt")
+            extras.append(record)
+            yield prompt
+
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+    total = errors = 0
+    start = time.perf_counter()
+    try:
+        for result in translate_many(prompts(), schema, workers=args.workers,
+                                     chunksize=args.chunksize, dialect=args.dialect):
+            row = {**extras.popleft(), **result}
+            out.write(json.dumps(row) + "\n")
+            total += 1
+            if result["error"]:
+                errors += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Translated {total} prompts ({errors} errors) in {elapsed:.2f}s "
+        f"= {rate:,.0f} prompts/s with {args.workers} worker(s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# bench_alias_index.py
+"""
+Benchmark: precompiled alias index vs. the original per-call substring loops.
+
+Builds synthetic schema configs with 10 / 100 / 1000 entities, checks that the
+indexed SchemaConfig picks the same winners as the legacy scoring, and prints
+per-prompt timings for both.
+
+    python bench_alias_index.py
+"""
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from schema import SchemaConfig
+
+WORDS = [
+    "account", "order", "invoice", "member", "ticket", "shipment", "payment",
+    "customer", "product", "vendor", "region", "campaign", "session", "device",
+    "contract", "employee", "asset", "lead", "refund", "event",
+]
+COLUMNS_PER_ENTITY = 12
+ALIASES_PER_COLUMN = 3
+
+
+def _make_config(n_entities: int, rng: random.Random) -> Dict:
+    entities = {}
+    for i in range(n_entities):
+        base = f"{rng.choice(WORDS)} {i}"
+        columns = {}
+        for c in range(COLUMNS_PER_ENTITY):
+            col = f"col_{c}"
+            columns[col] = {
+                "aliases": [f"{rng.choice(WORDS)} field {c}{'x' * a}" for a in range(ALIASES_PER_COLUMN)]
+            }
+        entities[f"entity_{i}"] = {
+            "table": f"t_{i}",
+            "aliases": [base, f"{base}s", f"all {base} records"],
+            "details_bundle": ["col_0", "col_1"],
+            "columns": columns,
+        }
+    return {"entities": entities}
+
+
+def _make_prompts(config: Dict, n: int, rng: random.Random) -> List[str]:
+    names = list(config["entities"].keys())
+    prompts = []
+    for _ in range(n):
+        ent = config["entities"][rng.choice(names)]
+        col_aliases = rng.choice(list(ent["columns"].values()))["aliases"]
+        prompts.append(
+            f"show {rng.choice(ent['aliases'])} with {rng.choice(col_aliases)} "
+            f"sorted by {rng.choice(WORDS)} in descending order"
+        )
+    return prompts
+
+
+# ---------- Legacy (pre-index) resolution, kept here as the reference ----------
+
+def _legacy_resolve_entity(data: Dict, text: str) -> Optional[str]:
+    text_low = text.lower()
+    best_entity = None
+    best_score = 0
+    for entity_name, entity in data.get("entities", {}).items():
+        for alias in entity.get("aliases", []):
+            alias_low = alias.lower()
+            if alias_low in text_low:
+                score = len(alias_low)
+                if score > best_score:
+                    best_score = score
+                    best_entity = entity_name
+    return best_entity
+
+
+def _legacy_resolve_fields(data: Dict, entity: str, text: str) -> List[str]:
+    text_low = text.lower()
+    fields: List[str] = []
+    columns = data["entities"].get(entity, {}).get("columns", {})
+    for col_name, col_info in columns.items():
+        for alias in col_info.get("aliases", []):
+            if alias.lower() in text_low and col_name not in fields:
+                fields.append(col_name)
+    return fields
+
+
+def _time(fn, prompts: List[str]) -> float:
+    start = time.perf_counter()
+    for p in prompts:
+        fn(p)
+    return (time.perf_counter() - start) / len(prompts) * 1e6
+
+
+def run(sizes=(10, 100, 1000), n_prompts: int = 500) -> None:
+    rng = random.Random(7)
+    print(f"{'entities':>8} {'aliases':>8} {'legacy us':>10} {'index us':>10} {'speedup':>8}")
+    for n in sizes:
+        config = _make_config(n, rng)
+        prompts = _make_prompts(config, n_prompts, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "schema_config.json"
+            path.write_text(json.dumps(config), encoding="utf-8")
+            schema = SchemaConfig(path)
+
+        # Same winners as the legacy scoring (entity + its columns)
+        for p in prompts:
+            entity = _legacy_resolve_entity(config, p)
+            assert schema.resolve_entity(p) == entity, p
+            # "detai" never appears in these prompts, so no bundle is prepended
+            assert schema.resolve_fields_from_text(entity, p) == _legacy_resolve_fields(config, entity, p), p
+
+        def legacy(p: str) -> None:
+            entity = _legacy_resolve_entity(config, p)
+            _legacy_resolve_fields(config, entity, p)
+
+        def indexed(p: str) -> None:
+            entity = schema.resolve_entity(p)
+            schema.resolve_fields_from_text(entity, p)
+
+        n_aliases = n * (3 + COLUMNS_PER_ENTITY * ALIASES_PER_COLUMN)
+        legacy_us = _time(legacy, prompts)
+        index_us = _time(indexed, prompts)
+        print(f"{n:>8} {n_aliases:>8} {legacy_us:>10.1f} {index_us:>10.1f} {legacy_us / index_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,153 @@
+# bench_fuzzy.py
+"""
+Fuzzy alias matching at scale: build cost, per-prompt latency and recall.
+
+Builds a synthetic entity with --aliases column aliases (introspect.py
+seeding over made-up column names) and prompts that name two columns, each
+with one typo. It reports:
+
+- the FuzzyTokenIndex build time for those aliases (once per schema)
+- per-prompt parse_nl_to_intent latency with exact-only and fuzzy matching
+- the same typo correction done naively (edit distance to every alias word)
+- recall: prompts whose misspelled columns were both recovered
+
+The run fails if the fuzzy p50 is not below 1 ms.
+
+    python bench_fuzzy.py
+    python bench_fuzzy.py --aliases 50000 --prompts 2000
+"""
+import argparse
+import random
+import shutil
+import string
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from fuzzy_index import FuzzyTokenIndex, WORD_RE, allowed_distance, osa_distance
+from introspect import TableInfo, build_config, save_config
+from nl_parser import parse_nl_to_intent
+from schema import SchemaConfig
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "sa", "tor", "vel", "qui", "dan", "por", "ex", "lum",
+             "bra", "ne", "sil", "gor", "fa", "tin", "ova", "cul", "mar", "zed", "hol", "pri"]
+
+
+def made_up_word(rnd: random.Random) -> str:
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+
+
+def typo(word: str, rnd: random.Random) -> str:
+    """One random edit: drop, insert, replace or swap a letter."""
+    i = rnd.randrange(len(word))
+    op = rnd.choice("dirs")
+    if op == "d":
+        return word[:i] + word[i + 1:]
+    if op == "i":
+        return word[:i] + rnd.choice(string.ascii_lowercase) + word[i:]
+    if op == "r":
+        return word[:i] + rnd.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def build_schema(aliases: int, rnd: random.Random) -> Tuple[dict, List[str]]:
+    columns: List[str] = []
+    seen = set()
+    # seed_aliases gives ~3 aliases per column (spaced, plural, raw)
+    while len(columns) * 3 < aliases:
+        name = f"{made_up_word(rnd)}_{made_up_word(rnd)}"
+        if name not in seen:
+            seen.add(name)
+            columns.append(name)
+    table = TableInfo("events", columns, {c: "TEXT" for c in columns}, [])
+    return build_config([table]), columns
+
+
+def make_prompts(columns: List[str], n: int, rnd: random.Random) -> List[Tuple[str, Tuple[str, str]]]:
+    prompts = []
+    for _ in range(n):
+        a, b = rnd.sample(columns, 2)
+        words = [w for w in (a + "_" + b).split("_") if allowed_distance(w) > 0]
+        misspelled = {w: typo(w, rnd) for w in rnd.sample(words, 2)}
+        phrase = lambda col: " ".join(misspelled.get(w, w) for w in col.split("_"))
+        prompts.append((f"show events {phrase(a)} and {phrase(b)}", (a, b)))
+    return prompts
+
+
+def naive_correct(text: str, counts: Dict[str, int]) -> str:
+    """The brute-force baseline: edit distance from each unknown word to every alias word."""
+    words = list(counts)
+
+    def fix(match) -> str:
+        word = match.group(0)
+        limit = allowed_distance(word)
+        if word in counts or limit == 0:
+            return word
+        # Same tie-breaks as FuzzyTokenIndex.lookup
+        best = min(words, key=lambda w: (osa_distance(word, w, limit), w[0] != word[0], -counts[w], w))
+        return best if osa_distance(word, best, limit) <= limit else word
+    return WORD_RE.sub(fix, text.lower())
+
+
+def percentile(samples: List[float], p: int) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--aliases", type=int, default=10_000)
+    parser.add_argument("--prompts", type=int, default=1000)
+    parser.add_argument("--naive-prompts", type=int, default=20, help="prompts for the slow baseline")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    config, columns = build_schema(args.aliases, rnd)
+    all_aliases = [a for info in config["entities"]["events"]["columns"].values() for a in info["aliases"]]
+    prompts = make_prompts(columns, args.prompts, rnd)
+
+    t0 = time.perf_counter()
+    index = FuzzyTokenIndex(all_aliases)
+    build_s = time.perf_counter() - t0
+    print(f"{len(all_aliases):,} aliases, {len(index):,} distinct words: "
+          f"fuzzy index built in {build_s * 1000:.0f} ms")
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench-fuzzy-"))
+    try:
+        path = scratch / "schema.json"
+        save_config(config, path)
+        for fuzzy in (False, True):
+            schema = SchemaConfig(path, fuzzy=fuzzy)
+            parse_nl_to_intent(prompts[0][0], schema)   # fault the entity in (and build its indexes)
+            latencies, recovered = [], 0
+            for prompt, expected in prompts:
+                t0 = time.perf_counter()
+                intent = parse_nl_to_intent(prompt, schema)
+                latencies.append(time.perf_counter() - t0)
+                recovered += set(expected) <= set(intent.fields)
+            p50, p99 = percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+            label = "fuzzy" if fuzzy else "exact"
+            print(f"{label}: p50 {p50:.3f} ms, p99 {p99:.3f} ms, "
+                  f"recall {recovered / len(prompts):.1%} ({recovered}/{len(prompts)})")
+        if p50 >= 1.0:
+            raise SystemExit(f"fuzzy p50 {p50:.3f} ms is not sub-millisecond")
+
+        sample = [p for p, _ in prompts[:args.naive_prompts]]
+        t0 = time.perf_counter()
+        naive = [naive_correct(p, index.words) for p in sample]
+        naive_ms = (time.perf_counter() - t0) / len(sample) * 1000
+        t0 = time.perf_counter()
+        fast = [index.correct(p) for p in sample]
+        fast_ms = (time.perf_counter() - t0) / len(sample) * 1000
+        agree = sum(a == b for a, b in zip(naive, fast))
+        print(f"correction only: naive {naive_ms:.2f} ms/prompt vs deletion index {fast_ms:.3f} ms/prompt "
+              f"({naive_ms / fast_ms:,.0f}x); same output on {agree}/{len(sample)}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
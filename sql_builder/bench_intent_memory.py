@@ -0,0 +1,63 @@
+# bench_intent_memory.py
+"""
+Memory benchmark: mutable QueryIntent vs. FrozenQueryIntent.
+
+Holds N intents (default 1,000,000) of a typical shape in memory and reports
+the bytes allocated per intent for each form, measured with tracemalloc.
+Field names and values are shared strings in both runs, so the difference is
+the container overhead (dict-backed dataclasses + lists vs. slots + tuples).
+
+    python bench_intent_memory.py
+    python bench_intent_memory.py --n 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from query_intent import QueryIntent, FilterIntent, SortIntent
+
+
+def _make_intent(i: int) -> QueryIntent:
+    return QueryIntent(
+        entity="members",
+        fields=["member_id", "username", "join_date"],
+        distinct=bool(i & 1),
+        filters=[
+            FilterIntent(field="join_date", operator=">", value="2024-01-01"),
+            FilterIntent(field="username", operator="IN", value=["neo", "trinity"]),
+        ],
+        group_by=[],
+        having=[],
+        sort=[SortIntent(field="join_date", direction="desc")],
+        limit=i % 100,
+    )
+
+
+def _measure(label: str, build, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [build(i) for i in range(n)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_item = current / n
+    print(f"{label:<22} {current / 1e6:>9.1f} MB  {per_item:>7.0f} B/intent  build {elapsed:.2f}s")
+    del items
+    return per_item
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QueryIntent memory benchmark")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Holding {args.n:,} intents")
+    old = _measure("QueryIntent (mutable)", _make_intent, args.n)
+    new = _measure("FrozenQueryIntent", lambda i: _make_intent(i).freeze(), args.n)
+    print(f"Frozen form uses {100.0 * new / old:.0f}% of the mutable form's memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench_nl_parser.py
+"""
+Golden-corpus check + micro-benchmark for parse_nl_to_intent.
+
+golden_intents.jsonl holds prompts with the intent (or error) the parser is
+expected to produce. This script fails loudly on any drift, then reports the
+per-prompt parse cost over the corpus.
+
+    python bench_nl_parser.py
+    python bench_nl_parser.py --regenerate   # after an intentional change
+"""
+import argparse
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List
+
+from schema import SchemaConfig
+from nl_parser import parse_nl_to_intent
+
+BASE_DIR = Path(__file__).resolve().parent
+GOLDEN_PATH = BASE_DIR / "golden_intents.jsonl"
+
+
+def _parse(prompt: str, schema: SchemaConfig) -> Dict:
+    try:
+        # Round-trip through JSON so tuples compare equal to stored lists
+        intent = json.loads(json.dumps(asdict(parse_nl_to_intent(prompt, schema))))
+        return {"prompt": prompt, "intent": intent, "error": None}
+    except Exception as e:
+        return {"prompt": prompt, "intent": None, "error": str(e)}
+
+
+def _load_golden() -> List[Dict]:
+    with GOLDEN_PATH.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(schema: SchemaConfig) -> int:
+    mismatches = 0
+    for case in _load_golden():
+        got = _parse(case["prompt"], schema)
+        if got != case:
+            mismatches += 1
+            print(f"MISMATCH: {case['prompt']!r}\n  expected: {case}\n  got:      {got}")
+    return mismatches
+
+
+def bench(schema: SchemaConfig, rounds: int = 200) -> None:
+    prompts = [case["prompt"] for case in _load_golden()]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for p in prompts:
+            try:
+                parse_nl_to_intent(p, schema)
+            except ValueError:
+                pass
+    per_prompt = (time.perf_counter() - start) / (rounds * len(prompts)) * 1e6
+    print(f"{len(prompts)} prompts x {rounds} rounds: {per_prompt:.1f} us/prompt")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--regenerate", action="store_true", help="rewrite the golden corpus")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    schema = SchemaConfig(BASE_DIR / "schema_config.json")
+
+    if args.regenerate:
+        cases = [_parse(case["prompt"], schema) for case in _load_golden()]
+        with GOLDEN_PATH.open("w", encoding="utf-8") as f:
+            for case in cases:
+                f.write(json.dumps(case) + "\n")
+        print(f"Rewrote {len(cases)} golden cases")
+        return
+
+    mismatches = check(schema)
+    if mismatches:
+        raise SystemExit(f"{mismatches} golden mismatches")
+    print("Golden corpus: all intents match")
+    bench(schema, rounds=args.rounds)
+
+
+if __name__ == "__main__":
+    main()
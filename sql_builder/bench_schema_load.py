@@ -0,0 +1,92 @@
+# bench_schema_load.py
+"""
+Startup cost of SchemaConfig as the schema grows: JSON vs compiled.
+
+Builds synthetic configs of N entities x --columns columns (introspect.py's
+alias seeding), writes each as schema_config-style JSON and in the compiled
+format, then measures for each:
+
+- open: SchemaConfig(path), i.e. what the CLI/GUI/server pay at launch
+- first prompt: parse + build_sql of one prompt, which faults in one entity
+- memory: Python heap allocated by open + first prompt (tracemalloc)
+
+    python bench_schema_load.py
+    python bench_schema_load.py --entities 100 1000 10000 --columns 30
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Tuple
+
+from introspect import TableInfo, build_config, save_config
+from nl_parser import parse_nl_to_intent
+from schema import SchemaConfig
+from sql_builder import build_sql
+
+WORDS = ["order", "customer", "invoice", "shipment", "account", "region", "ticket", "device",
+         "payment", "vendor", "contract", "session", "campaign", "asset", "claim", "policy"]
+COLUMN_WORDS = ["status", "amount", "created_at", "updated_at", "owner", "code", "label",
+                "score", "priority", "city", "country", "total", "notes", "channel", "rating"]
+
+
+def synthetic_tables(entities: int, columns: int) -> List[TableInfo]:
+    tables = []
+    for i in range(entities):
+        name = f"{WORDS[i % len(WORDS)]}_{WORDS[(i // len(WORDS)) % len(WORDS)]}_{i}"
+        cols = [f"{name}_id"] + [f"{COLUMN_WORDS[j % len(COLUMN_WORDS)]}_{j}" for j in range(columns - 1)]
+        tables.append(TableInfo(name, cols, {c: "TEXT" for c in cols}, [cols[0]]))
+    return tables
+
+
+def measure(path: Path, prompt: str, rounds: int) -> Tuple[float, float, float]:
+    """Best-of-rounds open and first-prompt seconds, plus heap MiB for one open + prompt."""
+    open_s = first_s = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        schema = SchemaConfig(path)
+        t1 = time.perf_counter()
+        build_sql(parse_nl_to_intent(prompt, schema), schema)
+        t2 = time.perf_counter()
+        open_s, first_s = min(open_s, t1 - t0), min(first_s, t2 - t1)
+        del schema
+    tracemalloc.start()
+    schema = SchemaConfig(path)
+    build_sql(parse_nl_to_intent(prompt, schema), schema)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return open_s, first_s, current / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench-schema-"))
+    try:
+        print(f"{'entities':>8} {'format':<9} {'file KiB':>9} {'open ms':>9} {'1st prompt ms':>14} {'heap MiB':>9}")
+        for n in args.entities:
+            tables = synthetic_tables(n, args.columns)
+            config = build_config(tables)
+            # A prompt about the last entity, so nothing is found early by accident
+            last = tables[-1]
+            prompt = f"list {last.name.replace('_', ' ')} {last.columns[1].replace('_', ' ')} sorted by {last.columns[2].replace('_', ' ')}"
+            for fmt in ("json", "sqlsc"):
+                path = scratch / f"schema-{n}.{fmt}"
+                save_config(config, path)
+                open_s, first_s, heap = measure(path, prompt, args.rounds)
+                print(f"{n:>8} {fmt:<9} {path.stat().st_size / 1024:>9.0f} {open_s * 1000:>9.1f} "
+                      f"{first_s * 1000:>14.2f} {heap:>9.1f}")
+            del config, tables
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
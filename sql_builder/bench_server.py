@@ -0,0 +1,163 @@
+# bench_server.py
+"""
+Smoke test + load test for server.py, all on localhost.
+
+Starts the service in-process on a free port, on a temporary copy of
+schema_config.json. It then:
+
+- checks /translate against the golden corpus (golden_intents.jsonl);
+- hot-reloads: touches the copy and confirms /metrics counts one reload;
+- fires --requests single-prompt requests from --clients keep-alive
+  connections, then one /translate/batch of --batch prompts;
+- prints client-side throughput and the server's own /metrics percentiles.
+
+    python bench_server.py
+    python bench_server.py --workers 4 --clients 32 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from server import TranslationService, start_server
+
+BASE_DIR = Path(__file__).resolve().parent
+GOLDEN_PATH = BASE_DIR / "golden_intents.jsonl"
+
+
+class Client:
+    """Minimal keep-alive HTTP/1.1 JSON client for one connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def connect(cls, port: int) -> "Client":
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Dict]:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        length = next(int(h.split(":", 1)[1]) for h in head if h.lower().startswith("content-length:"))
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def _load_golden() -> List[Dict]:
+    with GOLDEN_PATH.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def check_golden(client: Client) -> int:
+    mismatches = 0
+    for case in _load_golden():
+        status, got = await client.request("POST", "/translate", {"prompt": case["prompt"]})
+        intent = got.get("intent")
+        if intent is not None:
+            intent = {k: intent[k] for k in case["intent"] or {}}
+        if (intent, got.get("error")) != (case["intent"], case["error"]) or status != (200 if case["error"] is None else 422):
+            mismatches += 1
+            print(f"MISMATCH: {case['prompt']!r}\n  expected: {case}\n  got:      {status} {got}")
+    return mismatches
+
+
+async def check_reload(client: Client, schema_path: Path) -> None:
+    _, before = await client.request("GET", "/metrics")
+    # Bump the mtime explicitly: some filesystems have coarse timestamps
+    st = os.stat(schema_path)
+    os.utime(schema_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    status, _ = await client.request("POST", "/translate", {"prompt": "list all members"})
+    _, after = await client.request("GET", "/metrics")
+    if status != 200 or after["schema_reloads"] != before["schema_reloads"] + 1:
+        raise SystemExit(f"hot reload not observed: {before['schema_reloads']} -> {after['schema_reloads']}")
+    print("Hot reload: schema re-read after mtime change")
+
+
+async def load(port: int, prompts: List[str], clients: int, requests: int) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    for prompt in islice(cycle(prompts), requests):
+        queue.put_nowait(prompt)
+
+    async def run_client() -> None:
+        client = await Client.connect(port)
+        try:
+            while not queue.empty():
+                prompt = queue.get_nowait()
+                status, _ = await client.request("POST", "/translate", {"prompt": prompt})
+                if status >= 500:
+                    raise RuntimeError(f"server error for {prompt!r}")
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client() for _ in range(clients)))
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    scratch = Path(tempfile.mkdtemp(prefix="bench-server-"))
+    schema_path = scratch / "schema_config.json"
+    shutil.copyfile(BASE_DIR / "schema_config.json", schema_path)
+    service = TranslationService(schema_path, workers=args.workers)
+    server = await start_server(service, port=0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        client = await Client.connect(port)
+        # The first request pays for pool start-up; keep it out of the numbers
+        await client.request("POST", "/translate/batch", {"prompts": ["list all members"] * service.workers})
+
+        mismatches = await check_golden(client)
+        if mismatches:
+            raise SystemExit(f"{mismatches} golden mismatches")
+        print("Golden corpus: /translate matches")
+        await check_reload(client, schema_path)
+
+        prompts = [case["prompt"] for case in _load_golden()]
+        service.metrics.clear()
+        elapsed = await load(port, prompts, args.clients, args.requests)
+        print(f"/translate: {args.requests} requests from {args.clients} connections in {elapsed:.2f}s "
+              f"= {args.requests / elapsed:,.0f} req/s with {service.workers} worker(s)")
+
+        batch = list(islice(cycle(prompts), args.batch))
+        start = time.perf_counter()
+        status, body = await client.request("POST", "/translate/batch", {"prompts": batch})
+        elapsed = time.perf_counter() - start
+        print(f"/translate/batch: {len(body['results'])} prompts in {elapsed * 1000:.1f} ms "
+              f"= {len(batch) / elapsed:,.0f} prompts/s (status {status})")
+
+        _, metrics = await client.request("GET", "/metrics")
+        print(json.dumps(metrics["endpoints"], indent=2))
+        await client.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# dialects.py
+"""
+SQL dialect backends for the compiler in sql_builder.py.
+
+A Dialect only describes how a dialect spells things (identifier quoting,
+LIMIT, default placeholder style); the clause structure lives in
+SQLCompiler. Add a dialect by subclassing Dialect and registering it in
+DIALECTS.
+"""
+from typing import Dict
+
+
+class Dialect:
+    name = "generic"
+    # Placeholder style used by build_sql_params when none is given
+    paramstyle = "qmark"
+    # Render COUNT(*) comparison values as bare integers instead of strings
+    numeric_count_literals = False
+
+    def quote_ident(self, name: str) -> str:
+        """Standard SQL double-quoted identifier, with embedded quotes doubled."""
+        return '"' + name.replace('"', '""') + '"'
+
+    def limit_clause(self, limit_sql: str) -> str:
+        """limit_sql is either an integer literal or a placeholder."""
+        return f"LIMIT {limit_sql}"
+
+
+class SQLiteDialect(Dialect):
+    name = "sqlite"
+    paramstyle = "qmark"
+    # SQLite never converts '3' for COUNT(*) > '3' (an integer always sorts
+    # before text), so the comparison must use an integer.
+    numeric_count_literals = True
+
+
+class PostgresDialect(Dialect):
+    name = "postgres"
+    paramstyle = "format"
+
+
+class DuckDBDialect(Dialect):
+    name = "duckdb"
+    paramstyle = "qmark"
+
+
+DIALECTS: Dict[str, Dialect] = {
+    "sqlite": SQLiteDialect(),
+    "postgres": PostgresDialect(),
+    "postgresql": PostgresDialect(),
+    "duckdb": DuckDBDialect(),
+}
+
+DEFAULT_DIALECT = "postgres"
+
+
+def get_dialect(dialect: "str | Dialect") -> Dialect:
+    if isinstance(dialect, Dialect):
+        return dialect
+    try:
+        return DIALECTS[dialect.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown SQL dialect '{dialect}'; expected one of {', '.join(sorted(DIALECTS))}"
+        ) from None
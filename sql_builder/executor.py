@@ -0,0 +1,151 @@
+# executor.py
+"""
+Execute parameterized SQL from build_sql_params with prepared-statement reuse.
+
+PreparedExecutor keeps an LRU of statement templates it has seen on a
+connection and reuses the driver's prepared form for repeat templates:
+
+- sqlite3: statements are prepared by sqlite3's own per-connection cache,
+  which is keyed by SQL text; identical templates hit it. We size that cache
+  via connect_sqlite() and track template reuse here.
+- psycopg (v3): execute(..., prepare=True) keeps a server-side statement.
+- psycopg2: explicit PREPARE name AS <template> / EXECUTE name (...);
+  templates must be built with paramstyle="dollar". Evicted templates are
+  DEALLOCATEd.
+- duckdb: plain execute; DuckDB caches plans per statement text.
+- anything else: plain cursor.execute(template, params).
+
+Templates are compiled in the dialect matching the driver (DRIVER_DIALECT).
+"""
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence, Tuple
+
+from query_intent import QueryIntent
+from schema import SchemaConfig
+from sql_builder import build_sql_params
+
+
+def connect_sqlite(path: str, cached_statements: int = 256) -> sqlite3.Connection:
+    """sqlite3 connection whose internal prepared-statement cache matches our LRU."""
+    return sqlite3.connect(path, cached_statements=cached_statements)
+
+
+def _driver_of(conn) -> str:
+    module = type(conn).__module__.split(".")[0].lstrip("_")
+    if module in ("sqlite3", "psycopg", "psycopg2", "duckdb"):
+        return module
+    return "generic"
+
+
+# Template placeholder style each driver expects
+DRIVER_PARAMSTYLE = {
+    "sqlite3": "qmark",
+    "psycopg": "format",
+    "psycopg2": "dollar",
+    "duckdb": "qmark",
+    "generic": "qmark",
+}
+
+# SQL dialect each driver speaks
+DRIVER_DIALECT = {
+    "sqlite3": "sqlite",
+    "psycopg": "postgres",
+    "psycopg2": "postgres",
+    "duckdb": "duckdb",
+    "generic": "postgres",
+}
+
+
+@dataclass
+class StatementCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class PreparedExecutor:
+    """
+    Runs (template, params) pairs on one DB-API connection, preparing each
+    distinct template once and reusing it while it stays in the LRU.
+    """
+
+    def __init__(
+        self,
+        conn,
+        maxsize: int = 256,
+        paramstyle: Optional[str] = None,
+        dialect: Optional[str] = None,
+    ):
+        self.conn = conn
+        self.driver = _driver_of(conn)
+        self.paramstyle = paramstyle or DRIVER_PARAMSTYLE[self.driver]
+        self.dialect = dialect or DRIVER_DIALECT[self.driver]
+        self.maxsize = maxsize
+        # template -> prepared statement name (psycopg2) or None
+        self._statements: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._next_id = 0
+        self._stats = StatementCacheStats()
+
+    def stats(self) -> StatementCacheStats:
+        self._stats.size = len(self._statements)
+        return self._stats
+
+    def _lookup(self, template: str) -> Tuple[bool, Optional[str]]:
+        """Return (is_hit, prepared_name); a miss gets a fresh name but isn't cached yet."""
+        if template in self._statements:
+            self._statements.move_to_end(template)
+            self._stats.hits += 1
+            return True, self._statements[template]
+
+        self._stats.misses += 1
+        name = None
+        if self.driver == "psycopg2":
+            name = f"sb_stmt_{self._next_id}"
+            self._next_id += 1
+        return False, name
+
+    def _remember(self, template: str, name: Optional[str]) -> None:
+        """Cache a template whose statement now exists, evicting the least recently used."""
+        self._statements[template] = name
+        if len(self._statements) > self.maxsize:
+            _, old_name = self._statements.popitem(last=False)
+            self._stats.evictions += 1
+            if old_name is not None:
+                with self.conn.cursor() as cur:
+                    cur.execute(f"DEALLOCATE {old_name}")
+
+    def execute(self, template: str, params: Sequence[Any] = ()):
+        """Execute a template with params and return the cursor."""
+        is_hit, name = self._lookup(template)
+
+        if self.driver == "psycopg2":
+            cur = self.conn.cursor()
+            if not is_hit:
+                # Cached only once PREPARE succeeded, so a failed PREPARE is retried next time
+                cur.execute(f"PREPARE {name} AS {template.rstrip(';')}")
+                self._remember(template, name)
+            if params:
+                placeholders = ", ".join(["%s"] * len(params))
+                cur.execute(f"EXECUTE {name} ({placeholders})", list(params))
+            else:
+                cur.execute(f"EXECUTE {name}")
+            return cur
+
+        cur = self.conn.cursor()
+        if self.driver == "psycopg":
+            cur.execute(template, params, prepare=True)
+        else:
+            cur.execute(template, params)
+        if not is_hit:
+            self._remember(template, name)
+        return cur
+
+    def run_intent(self, intent: QueryIntent, schema: SchemaConfig):
+        """Build a parameterized statement for an intent and execute it."""
+        template, params = build_sql_params(
+            intent, schema, paramstyle=self.paramstyle, dialect=self.dialect
+        )
+        return self.execute(template, params)
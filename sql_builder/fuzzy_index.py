@@ -0,0 +1,170 @@
+# fuzzy_index.py
+"""
+Typo-tolerant lookup of alias words ("usrname" -> "username",
+"dtae" -> "date").
+
+FuzzyTokenIndex is a SymSpell-style deletion dictionary over the words
+that appear in a set of aliases. At build time every word is stored under
+each string reachable from it by deleting as many characters as a query may
+be corrected by. A lookup generates the same deletes for the misspelled word. Only words
+that share a delete key are candidates, and only those are checked with a
+real edit distance (optimal string alignment, so a swapped pair of letters
+counts as one edit). Lookup cost depends on the length of the word, not on
+how many aliases there are.
+
+correct() rewrites only words that are not alias words already, are not in
+`known` and are not in KEEP_WORDS. Such a word is replaced by its closest
+alias word. The result is meant to be fed back into the exact AliasIndex,
+so a correctly spelled alias always matches as before.
+
+How far a word may be corrected depends on its length: words shorter than
+MIN_LENGTH are never touched, words shorter than 8 characters allow one
+edit, and longer words allow two.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+MIN_LENGTH = 4
+
+WORD_RE = re.compile(r"[a-z]+")
+# Quoted filter values are data, not aliases
+QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+# Prompt words the parser relies on, or that are just English; never "corrected"
+KEEP_WORDS = frozenset("""
+    list show give find get fetch display return select want need please
+    all every each the their them with without and or not only also any
+    of by in on for from to into per where which who whose what that this these those
+    sorted sort order ordered ascending descending asc desc
+    distinct unique duplicates duplicate deduplicated
+    group grouped having count top first last limit
+    joined after before between since until
+    is are was were equal equals than more less greater fewer least most
+""".split())
+
+
+def allowed_distance(word: str, max_distance: int = 2) -> int:
+    return _allowed_for_length(len(word), max_distance)
+
+
+def _allowed_for_length(n: int, max_distance: int) -> int:
+    if n < MIN_LENGTH:
+        return 0
+    return min(max_distance, 1 if n < 8 else 2)
+
+
+def _index_depth(n: int, max_distance: int) -> int:
+    """Deletes to store for an alias word of length n: enough for any query allowed to reach it."""
+    return max((_allowed_for_length(q, max_distance)
+                for q in range(max(0, n - max_distance), n + max_distance + 1)
+                if abs(q - n) <= _allowed_for_length(q, max_distance)), default=0)
+
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance, or limit + 1 once it is certain to
+    exceed limit. Only the diagonal band |i - j| <= limit is computed.
+    """
+    la, lb = len(a), len(b)
+    if abs(la - lb) > limit:
+        return limit + 1
+    big = limit + 1
+    prev2: List[int] = []
+    prev = [j if j <= limit else big for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        cur = [big] * (lb + 1)
+        if i <= limit:
+            cur[0] = i
+        row_min = cur[0]
+        for j in range(max(1, i - limit), min(lb, i + limit) + 1):
+            ca = a[i - 1]
+            value = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < value:
+                value = prev2[j - 2] + 1
+            cur[j] = value if value < big else big
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return big
+        prev2, prev = prev, cur
+    return prev[lb]
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """Every string made by removing 1..distance characters from word."""
+    out: Set[str] = set()
+    level = {word}
+    for _ in range(distance):
+        level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+        out |= level
+    out.discard("")
+    return out
+
+
+class FuzzyTokenIndex:
+    """Deletion dictionary over alias words; build once per schema (or per entity)."""
+
+    def __init__(self, aliases: Iterable[str], max_distance: int = 2):
+        self.max_distance = max_distance
+        # word -> how many aliases use it (more common words win ties)
+        self.words: Dict[str, int] = {}
+        for alias in aliases:
+            for word in WORD_RE.findall(alias.lower()):
+                self.words[word] = self.words.get(word, 0) + 1
+        self._by_delete: Dict[str, List[str]] = {}
+        for word in self.words:
+            depth = _index_depth(len(word), max_distance)
+            if depth == 0:
+                continue
+            self._by_delete.setdefault(word, []).append(word)
+            for key in _deletes(word, depth):
+                self._by_delete.setdefault(key, []).append(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def lookup(self, word: str) -> Optional[str]:
+        """The alias word closest to `word` within its allowed distance (itself if exact), else None."""
+        if word in self.words:
+            return word
+        limit = allowed_distance(word, self.max_distance)
+        if limit == 0:
+            return None
+        candidates: Set[str] = set()
+        for key in _deletes(word, limit) | {word}:
+            candidates.update(self._by_delete.get(key, ()))
+        best = None
+        best_key = None
+        for candidate in candidates:
+            distance = osa_distance(word, candidate, limit)
+            if distance > limit:
+                continue
+            # Closest first; then a matching first letter; then the more common word
+            key = (distance, candidate[0] != word[0], -self.words[candidate], candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct(self, text: str, known: Iterable[str] = ()) -> str:
+        """Lower-cased text with unknown words replaced by their closest alias word."""
+        text_low = text.lower()
+        keep = set(known)
+
+        def fix(match: "re.Match[str]") -> str:
+            word = match.group(0)
+            if word in self.words or word in keep or word in KEEP_WORDS:
+                return word
+            return self.lookup(word) or word
+
+        # Leave quoted values alone: split around them and fix only the rest
+        parts, last = [], 0
+        for quoted in QUOTED_RE.finditer(text_low):
+            parts.append(WORD_RE.sub(fix, text_low[last:quoted.start()]))
+            parts.append(quoted.group(0))
+            last = quoted.end()
+        parts.append(WORD_RE.sub(fix, text_low[last:]))
+        return "".join(parts)
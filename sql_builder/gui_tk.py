@@ -1,11 +1,27 @@
 # gui_tk.py
+"""
+Tk front end. Translation runs on a background worker (background.py) so the
+window never freezes; the SQL is regenerated as you type, a short pause after
+the last keystroke. The optional Run pane executes the current intent
+against a SQLite database and shows the result one page at a time.
+"""
+import os
+import queue
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 from pathlib import Path
 
+from background import LatestOnlyWorker, ResultPager, drain, format_rows
+from executor import connect_sqlite
 from schema import SchemaConfig
-from nl_parser import parse_nl_to_intent
-from sql_builder import build_sql
+from intent_cache import TranslationCache
+
+# Milliseconds of typing pause before the SQL is regenerated
+DEBOUNCE_MS = 300
+# How often the main loop picks up results from the background threads
+POLL_MS = 30
+PAGE_SIZE = 100
 
 
 class SQLBuilderGUI(tk.Tk):
@@ -16,13 +32,35 @@ class SQLBuilderGUI(tk.Tk):
         self.geometry("900x600")
 
         self._init_schema()
+        self._init_workers()
         self._build_layout()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def _init_schema(self):
         # Assume this file lives inside sql_builder/ and schema_config.json is next to it
         base_dir = Path(__file__).resolve().parent
         schema_path = base_dir / "schema_config.json"
         self.schema = SchemaConfig(schema_path)
+        # Set SQL_BUILDER_CACHE_DB to a file path to keep the cache across restarts
+        self.cache = TranslationCache(
+            self.schema, persist_path=os.environ.get("SQL_BUILDER_CACHE_DB")
+        )
+
+    def _init_workers(self):
+        # Background threads hand callbacks to this queue; _poll runs them on the Tk thread
+        self._ui_queue: "queue.Queue" = queue.Queue()
+        self._translator = LatestOnlyWorker(self._ui_queue.put)
+        self._pager = None
+        self._pager_db = None
+        self._run_ticket = 0
+        self._page = 0
+        self._debounce_id = None
+        self._current_intent = None
+        self.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        drain(self._ui_queue)
+        self.after(POLL_MS, self._poll)
 
     def _build_layout(self):
         # Main layout: top = input, middle = buttons + parsed intent, bottom = SQL
@@ -39,6 +77,7 @@ class SQLBuilderGUI(tk.Tk):
 
         self.input_text = tk.Text(input_frame, height=5, wrap="word")
         self.input_text.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.input_text.bind("<KeyRelease>", self.on_input_changed)
 
         # --- Buttons + Parsed Intent frame ---
         middle_frame = ttk.Frame(self)
@@ -55,7 +94,15 @@ class SQLBuilderGUI(tk.Tk):
         generate_btn.pack(fill="x", pady=(0, 5))
 
         clear_btn = ttk.Button(button_col, text="Clear", command=self.on_clear)
-        clear_btn.pack(fill="x")
+        clear_btn.pack(fill="x", pady=(0, 5))
+
+        self.live_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(button_col, text="Live", variable=self.live_var).pack(anchor="w")
+
+        self.run_pane_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_col, text="Run pane", variable=self.run_pane_var, command=self.on_toggle_run_pane
+        ).pack(anchor="w")
 
         # Parsed intent view
         intent_frame = ttk.LabelFrame(middle_frame, text="Parsed Intent")
@@ -80,10 +127,58 @@ class SQLBuilderGUI(tk.Tk):
         x_scroll.grid(row=1, column=0, sticky="ew")
         self.sql_text.configure(xscrollcommand=x_scroll.set)
 
+        self._build_run_pane()
+
+        # --- Status bar ---
+        self.status_var = tk.StringVar(value="Ready")
+        status = ttk.Label(self, textvariable=self.status_var, anchor="w", relief="sunken")
+        status.grid(row=4, column=0, sticky="ew")
+
+    def _build_run_pane(self):
+        # Hidden until the "Run pane" box is ticked
+        self.run_frame = ttk.LabelFrame(self, text="Results")
+        self.run_frame.columnconfigure(1, weight=1)
+        self.run_frame.rowconfigure(1, weight=1)
+
+        ttk.Label(self.run_frame, text="SQLite DB:").grid(row=0, column=0, padx=5, pady=5)
+        self.db_var = tk.StringVar(value=os.environ.get("SQL_BUILDER_DB", ""))
+        ttk.Entry(self.run_frame, textvariable=self.db_var).grid(row=0, column=1, sticky="ew", pady=5)
+        ttk.Button(self.run_frame, text="Run", command=self.on_run).grid(row=0, column=2, padx=5)
+        ttk.Button(self.run_frame, text="Cancel", command=self.on_cancel_run).grid(row=0, column=3, padx=(0, 5))
+
+        self.result_tree = ttk.Treeview(self.run_frame, show="headings", height=8)
+        self.result_tree.grid(row=1, column=0, columnspan=4, sticky="nsew", padx=5)
+        y_scroll = ttk.Scrollbar(self.run_frame, orient="vertical", command=self.result_tree.yview)
+        y_scroll.grid(row=1, column=4, sticky="ns")
+        self.result_tree.configure(yscrollcommand=y_scroll.set)
+
+        nav = ttk.Frame(self.run_frame)
+        nav.grid(row=2, column=0, columnspan=4, sticky="ew", padx=5, pady=5)
+        self.prev_btn = ttk.Button(nav, text="< Prev", command=lambda: self._request_page(self._page - 1))
+        self.prev_btn.pack(side="left")
+        self.next_btn = ttk.Button(nav, text="Next >", command=lambda: self._request_page(self._page + 1))
+        self.next_btn.pack(side="left", padx=5)
+        self.page_var = tk.StringVar(value="")
+        ttk.Label(nav, textvariable=self.page_var).pack(side="left", padx=10)
+        self._set_nav(prev=False, next_=False)
+
+    def on_toggle_run_pane(self):
+        if self.run_pane_var.get():
+            self.rowconfigure(3, weight=1)
+            self.run_frame.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        else:
+            self.on_cancel_run()
+            self.rowconfigure(3, weight=0)
+            self.run_frame.grid_remove()
+
     def on_clear(self):
+        self._cancel_debounce()
+        self._translator.cancel()
         self.input_text.delete("1.0", tk.END)
+        self._current_intent = None
         self._set_intent_text("")
         self.sql_text.delete("1.0", tk.END)
+        self.status_var.set("Ready")
 
     def _set_intent_text(self, content: str):
         self.intent_text.config(state="normal")
@@ -91,42 +186,152 @@ class SQLBuilderGUI(tk.Tk):
         self.intent_text.insert("1.0", content)
         self.intent_text.config(state="disabled")
 
+    def on_input_changed(self, event=None):
+        if not self.live_var.get():
+            return
+        self._cancel_debounce()
+        self._debounce_id = self.after(DEBOUNCE_MS, self._translate_async, False)
+
+    def _cancel_debounce(self):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
+
     def on_generate_sql(self):
+        self._cancel_debounce()
         prompt = self.input_text.get("1.0", tk.END).strip()
         if not prompt:
             messagebox.showwarning("No input", "Please enter a natural language request.")
             return
+        self._translate_async(True)
+
+    def _translate_async(self, explicit: bool):
+        """Hand the prompt to the worker; a newer call makes this one's result stale."""
+        self._debounce_id = None
+        prompt = self.input_text.get("1.0", tk.END).strip()
+        if not prompt:
+            self._translator.cancel()
+            self.status_var.set("Ready")
+            return
+        self.status_var.set("Translating…")
+        started = time.perf_counter()
+        self._translator.submit(
+            self.cache.translate,
+            prompt,
+            on_result=lambda result: self._show_translation(*result, started=started),
+            on_error=lambda e: self._show_translation_error(e, explicit),
+        )
+
+    def _show_translation(self, intent, sql, started: float):
+        self._current_intent = intent
 
-        try:
-            intent = parse_nl_to_intent(prompt, self.schema)
-            sql = build_sql(intent, self.schema)
-
-            # Show intent in a human-friendly way
-            intent_lines = [
-                f"Entity:   {intent.entity}",
-                f"Fields:   {intent.fields}",
-                f"Distinct: {intent.distinct}",
-            ]
-            if intent.filters:
-                intent_lines.append("Filters:")
-                for f in intent.filters:
-                    intent_lines.append(f"  - {f.field} {f.operator} {f.value}")
-            if intent.sort:
-                intent_lines.append("Sort:")
-                for s in intent.sort:
-                    intent_lines.append(f"  - {s.field} {s.direction}")
-            if intent.limit is not None:
-                intent_lines.append(f"Limit:   {intent.limit}")
-
-            self._set_intent_text("\n".join(intent_lines))
-
-            # Show SQL
-            self.sql_text.delete("1.0", tk.END)
-            self.sql_text.insert("1.0", sql)
-
-        except Exception as e:
+        # Show intent in a human-friendly way
+        intent_lines = [
+            f"Entity:   {intent.entity}",
+            f"Fields:   {intent.fields}",
+            f"Distinct: {intent.distinct}",
+        ]
+        if intent.filters:
+            intent_lines.append("Filters:")
+            for f in intent.filters:
+                intent_lines.append(f"  - {f.field} {f.operator} {f.value}")
+        if intent.sort:
+            intent_lines.append("Sort:")
+            for s in intent.sort:
+                intent_lines.append(f"  - {s.field} {s.direction}")
+        if intent.limit is not None:
+            intent_lines.append(f"Limit:   {intent.limit}")
+
+        self._set_intent_text("\n".join(intent_lines))
+
+        # Show SQL
+        self.sql_text.delete("1.0", tk.END)
+        self.sql_text.insert("1.0", sql)
+        self.status_var.set(f"Ready ({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def _show_translation_error(self, e: BaseException, explicit: bool):
+        # Half-typed prompts fail all the time; only a button press deserves a dialog
+        self.status_var.set(f"Cannot translate: {e}")
+        if explicit:
             messagebox.showerror("Error", f"Failed to generate SQL:\n\n{e}")
 
+    # --- Run pane ---
+
+    def _pager_for(self, db_path: str) -> ResultPager:
+        if self._pager is None or self._pager_db != db_path:
+            if self._pager is not None:
+                self._pager.close()
+            self._pager = ResultPager(lambda: connect_sqlite(db_path), self._ui_queue.put, PAGE_SIZE)
+            self._pager_db = db_path
+        return self._pager
+
+    def on_run(self):
+        db_path = self.db_var.get().strip()
+        if not db_path or not os.path.exists(db_path):
+            messagebox.showwarning("No database", "Enter the path of an existing SQLite database.")
+            return
+        if self._current_intent is None:
+            messagebox.showwarning("No query", "Generate SQL before running it.")
+            return
+        self._clear_results()
+        self.page_var.set("Running…")
+        self._run_ticket = self._pager_for(db_path).run(
+            self._current_intent, self.schema, on_page=self._show_page, on_error=self._show_run_error
+        )
+
+    def on_cancel_run(self):
+        if self._pager is not None:
+            self._pager.cancel()
+        self._set_nav(prev=False, next_=False)
+        if self.page_var.get() == "Running…":
+            self.page_var.set("Cancelled")
+
+    def _request_page(self, n: int):
+        if self._pager is None or n < 0:
+            return
+        self._set_nav(prev=False, next_=False)
+        self._pager.page(n)
+
+    def _show_page(self, ticket: int, n: int, columns, rows, last: bool):
+        if ticket != self._run_ticket:
+            return
+        self._page = n
+        if tuple(self.result_tree["columns"]) != tuple(columns):
+            self.result_tree["columns"] = columns
+            for col in columns:
+                self.result_tree.heading(col, text=col)
+                self.result_tree.column(col, width=120, stretch=True)
+        self.result_tree.delete(*self.result_tree.get_children())
+        for row in format_rows(rows):
+            self.result_tree.insert("", tk.END, values=row)
+        first = n * PAGE_SIZE + 1 if rows else 0
+        self.page_var.set(f"Page {n + 1}: rows {first}–{n * PAGE_SIZE + len(rows)}" + ("" if last else "+"))
+        self._set_nav(prev=n > 0, next_=not last)
+
+    def _show_run_error(self, ticket: int, e: BaseException):
+        if ticket != self._run_ticket:
+            return
+        self.page_var.set("")
+        self._set_nav(prev=False, next_=False)
+        messagebox.showerror("Query failed", str(e))
+
+    def _clear_results(self):
+        self.result_tree.delete(*self.result_tree.get_children())
+        self._page = 0
+        self._set_nav(prev=False, next_=False)
+
+    def _set_nav(self, prev: bool, next_: bool):
+        self.prev_btn.state(["!disabled"] if prev else ["disabled"])
+        self.next_btn.state(["!disabled"] if next_ else ["disabled"])
+
+    def on_close(self):
+        self._cancel_debounce()
+        self._translator.close()
+        if self._pager is not None:
+            self._pager.close()
+        self.cache.close()
+        self.destroy()
+
 
 def main():
     app = SQLBuilderGUI()
@@ -0,0 +1,231 @@
+# intent_cache.py
+"""
+Bounded LRU cache in front of parse_nl_to_intent + build_sql.
+
+Keys are the normalized prompt plus the schema's content hash
+(SchemaConfig.version), so editing schema_config.json invalidates every old
+entry automatically. An optional SQLite file mirrors the in-memory LRU so a
+warm cache survives restarts. Hits only bump an in-memory recency clock;
+their last_used updates are written in batches (with the next new entry,
+every TOUCH_FLUSH_SIZE hits, or on flush()/close()).
+
+On a miss the *normalized* prompt is translated, so a cached result depends
+only on its key: prompts that differ only in spacing always get identical
+SQL, and that SQL is what parse_nl_to_intent gives for the prompt itself.
+fold_case=True also shares entries across letter case, but then the
+lower-cased prompt is parsed, which lower-cases filter values such as
+IN-list items ('Bob' -> 'bob'); it is off by default because the cache must
+not change the SQL.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from query_intent import QueryIntent, intent_to_dict, intent_from_dict
+from schema import SchemaConfig
+from nl_parser import parse_nl_to_intent
+from sql_builder import build_sql
+
+# Pending cache hits written to the persistence file in one batch
+TOUCH_FLUSH_SIZE = 256
+
+
+def normalize_prompt(prompt: str, fold_case: bool = False) -> str:
+    """
+    Collapse runs of spaces/tabs and drop blank lines. Line breaks are kept
+    because the parser treats them as phrase terminators (e.g. 'per <phrase>').
+    """
+    lines = (" ".join(line.split()) for line in prompt.strip().splitlines())
+    text = "\n".join(line for line in lines if line)
+    return text.lower() if fold_case else text
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TranslationCache:
+    """
+    LRU cache of (QueryIntent, SQL) per normalized prompt and schema version.
+
+    Thread-safe; cached intents are rebuilt on every hit so callers can mutate
+    what they get back without corrupting the cache.
+    """
+
+    def __init__(
+        self,
+        schema: SchemaConfig,
+        maxsize: int = 1024,
+        persist_path: Optional[str | Path] = None,
+        fold_case: bool = False,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.schema = schema
+        self.maxsize = maxsize
+        self.fold_case = fold_case
+        self._entries: "OrderedDict[str, Tuple[dict, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        # key -> tick of hits not yet written to the file (see _db_touch)
+        self._touched: Dict[str, int] = {}
+        if persist_path:
+            self._open_db(Path(persist_path))
+
+    # ---------- Persistence ----------
+
+    def _open_db(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        # It's a cache: trade durability of the last few writes for speed
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+              key            TEXT PRIMARY KEY,
+              schema_version TEXT NOT NULL,
+              intent_json    TEXT NOT NULL,
+              sql            TEXT NOT NULL,
+              last_used      INTEGER NOT NULL
+            )
+            """
+        )
+        # Entries from older schema versions can never hit again
+        self._db.execute(
+            "DELETE FROM translations WHERE schema_version != ?", (self.schema.version,)
+        )
+        rows = self._db.execute(
+            "SELECT key, intent_json, sql FROM translations ORDER BY last_used DESC LIMIT ?",
+            (self.maxsize,),
+        ).fetchall()
+        # Oldest first so the most recently used ends up at the MRU end
+        for key, intent_json, sql in reversed(rows):
+            self._entries[key] = (json.loads(intent_json), sql)
+        self._db.execute(
+            "DELETE FROM translations WHERE key NOT IN (SELECT key FROM translations "
+            "ORDER BY last_used DESC LIMIT ?)",
+            (self.maxsize,),
+        )
+        self._db.commit()
+        # Continue the recency clock past every persisted entry, so entries
+        # used after this restart always rank as newer than the ones loaded
+        (self._tick,) = self._db.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM translations"
+        ).fetchone()
+
+    def _db_touch(self, key: str) -> None:
+        """Record a hit in memory; hits reach the file with the next put, flush or close."""
+        self._tick += 1
+        self._touched[key] = self._tick
+        if len(self._touched) >= TOUCH_FLUSH_SIZE:
+            self._db_flush_touches()
+            self._db.commit()
+
+    def _db_flush_touches(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                [(tick, key) for key, tick in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _db_put(self, key: str, intent_dict: dict, sql: str, evicted: Optional[str]) -> None:
+        self._db_flush_touches()
+        self._tick += 1
+        self._touched.pop(key, None)
+        self._db.execute(
+            "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+            (key, self.schema.version, json.dumps(intent_dict), sql, self._tick),
+        )
+        if evicted is not None:
+            self._db.execute("DELETE FROM translations WHERE key = ?", (evicted,))
+        self._db.commit()
+
+    def flush(self) -> None:
+        """Write pending last_used updates to the persistence file."""
+        with self._lock:
+            if self._db is not None and self._touched:
+                self._db_flush_touches()
+                self._db.commit()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---------- Lookup ----------
+
+    def key_for(self, prompt: str) -> str:
+        return f"{self.schema.version}:{normalize_prompt(prompt, self.fold_case)}"
+
+    def translate(self, prompt: str) -> Tuple[QueryIntent, str]:
+        """
+        Return (intent, sql) for the prompt, from cache when possible.
+        Parse errors propagate and are not cached.
+        """
+        key = self.key_for(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                if self._db is not None:
+                    self._db_touch(key)
+                intent_dict, sql = entry
+                return intent_from_dict(intent_dict), sql
+            self._misses += 1
+
+        # Translate outside the lock; a concurrent miss on the same key is harmless
+        intent = parse_nl_to_intent(normalize_prompt(prompt, self.fold_case), self.schema)
+        sql = build_sql(intent, self.schema)
+        intent_dict = intent_to_dict(intent)
+
+        with self._lock:
+            evicted = None
+            self._entries[key] = (intent_dict, sql)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._evictions += 1
+            if self._db is not None:
+                self._db_put(key, intent_dict, sql, evicted)
+        return intent, sql
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
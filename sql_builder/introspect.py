@@ -0,0 +1,295 @@
+# introspect.py
+"""
+Generate a schema config from a live database catalog instead of writing
+schema_config.json by hand.
+
+Sources (pick one):
+- --sqlite DB: sqlite_master + PRAGMA table_info
+- --ddl FILE.sql ...: runs the DDL in an in-memory SQLite database first,
+  e.g. the analytics projects' sql/sqlite/01_create_tables.sql
+- --postgres DSN: information_schema (needs psycopg or psycopg2)
+- --json CONFIG: an existing schema_config.json, to compile it as is
+
+For every table it seeds:
+- an entity keyed by the table name, aliased by its words and their
+  singular/plural forms ("order_items" -> "order items", "order item"),
+  plus the name without a dim_/fact_/stg_ prefix;
+- one column per table column, aliased the same way ("order_date" ->
+  "order date", "order dates", "order_date");
+- a details bundle of the first DEFAULT_BUNDLE_SIZE columns, skipping
+  columns that look like secrets (password, hash, token, ...).
+
+--base merges a hand-edited config on top: its aliases are kept ahead of
+the seeded ones, and its bundles, tables and extra columns win. Regenerating
+therefore never loses curation.
+
+The output format follows the extension: .json writes schema_config.json
+style; anything else writes the compiled format from schema_store.py,
+which SchemaConfig opens directly.
+
+    python introspect.py --ddl ../chris-giggleman-sql-analytics/chris-giggleman-sql-analytics/01_retail_sales_analytics/sql/sqlite/01_create_tables.sql -o retail.json
+    python introspect.py --sqlite analytics.db --base schema_config.json -o schema.sqlsc
+    python introspect.py --json schema_config.json -o schema.sqlsc
+"""
+import argparse
+import fnmatch
+import json
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from schema_store import CompiledSchemaFile, is_compiled, write_compiled
+
+DEFAULT_BUNDLE_SIZE = 8
+# Columns left out of default details bundles
+SENSITIVE = re.compile(r"password|passwd|secret|token|hash|salt|ssn")
+# Warehouse naming prefixes that users don't say out loud
+TABLE_PREFIXES = ("dim_", "fact_", "fct_", "stg_", "raw_")
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[str] = field(default_factory=list)
+    types: Dict[str, str] = field(default_factory=dict)
+    primary_key: List[str] = field(default_factory=list)
+
+
+# ---------- Catalog readers ----------
+
+def read_sqlite(conn: sqlite3.Connection, include_views: bool = False) -> List[TableInfo]:
+    kinds = ("table", "view") if include_views else ("table",)
+    names = [row[0] for row in conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type IN ({','.join('?' * len(kinds))}) "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY rowid", kinds)]
+    tables = []
+    for name in names:
+        info = TableInfo(name)
+        # cid, name, type, notnull, dflt_value, pk (1-based position in the key, 0 if not)
+        rows = conn.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        for _, column, col_type, _, _, pk in rows:
+            info.columns.append(column)
+            info.types[column] = col_type or ""
+        info.primary_key = [r[1] for r in sorted((r for r in rows if r[5]), key=lambda r: r[5])]
+        tables.append(info)
+    return tables
+
+
+def read_ddl(paths: Iterable[Path], include_views: bool = False) -> List[TableInfo]:
+    conn = sqlite3.connect(":memory:")
+    try:
+        for path in paths:
+            conn.executescript(Path(path).read_text(encoding="utf-8"))
+        return read_sqlite(conn, include_views)
+    finally:
+        conn.close()
+
+
+def _connect_postgres(dsn: str):
+    try:
+        import psycopg
+        return psycopg.connect(dsn)
+    except ImportError:
+        pass
+    try:
+        import psycopg2
+        return psycopg2.connect(dsn)
+    except ImportError:
+        raise SystemExit("--postgres needs a driver: pip install 'psycopg[binary]' (or psycopg2-binary)")
+
+
+def read_postgres(conn, schema: str = "public", include_views: bool = False) -> List[TableInfo]:
+    kinds = ["BASE TABLE", "VIEW"] if include_views else ["BASE TABLE"]
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_schema = %s AND table_type = ANY(%s) ORDER BY table_name",
+        (schema, kinds),
+    )
+    tables = {name: TableInfo(name) for (name,) in cur.fetchall()}
+    cur.execute(
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = %s ORDER BY table_name, ordinal_position",
+        (schema,),
+    )
+    for table, column, data_type in cur.fetchall():
+        if table in tables:
+            tables[table].columns.append(column)
+            tables[table].types[column] = data_type
+    cur.execute(
+        "SELECT kcu.table_name, kcu.column_name FROM information_schema.table_constraints tc "
+        "JOIN information_schema.key_column_usage kcu "
+        "  ON kcu.constraint_name = tc.constraint_name AND kcu.table_schema = tc.table_schema "
+        "WHERE tc.table_schema = %s AND tc.constraint_type = 'PRIMARY KEY' "
+        "ORDER BY kcu.table_name, kcu.ordinal_position",
+        (schema,),
+    )
+    for table, column in cur.fetchall():
+        if table in tables:
+            tables[table].primary_key.append(column)
+    cur.close()
+    return list(tables.values())
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+# ---------- Alias seeding ----------
+
+def pluralize(word: str) -> str:
+    if re.search(r"[^aeiou]y$", word):
+        return word[:-1] + "ies"
+    if re.search(r"(s|x|z|ch|sh)$", word):
+        return word + "es"
+    return word + "s"
+
+
+def singularize(word: str) -> str:
+    if word.endswith("ies") and len(word) > 3:
+        return word[:-3] + "y"
+    if re.search(r"(s|x|z|ch|sh)es$", word) and not word.endswith(("ses", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def seed_aliases(name: str) -> List[str]:
+    """'order_items' -> ['order items', 'order item', 'order_items']: words, number variants, raw name."""
+    words = [w for w in re.split(r"[_\s]+", name.lower()) if w]
+    if not words:
+        return []
+    head, last = words[:-1], words[-1]
+    aliases = [" ".join(words)]
+    for variant in (singularize(last), pluralize(singularize(last))):
+        aliases.append(" ".join(head + [variant]))
+    aliases.append(name.lower())
+    return _unique(aliases)
+
+
+def entity_aliases(table: str) -> List[str]:
+    aliases = seed_aliases(table)
+    for prefix in TABLE_PREFIXES:
+        if table.lower().startswith(prefix) and len(table) > len(prefix):
+            aliases.extend(seed_aliases(table[len(prefix):]))
+    return _unique(aliases)
+
+
+def default_bundle(columns: List[str], size: int = DEFAULT_BUNDLE_SIZE) -> List[str]:
+    return [c for c in columns if not SENSITIVE.search(c.lower())][:size]
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+# ---------- Config ----------
+
+def build_config(
+    tables: List[TableInfo],
+    base: Optional[Dict[str, Any]] = None,
+    bundle_size: int = DEFAULT_BUNDLE_SIZE,
+) -> Dict[str, Any]:
+    """schema_config.json structure for `tables`, with `base` (a hand-edited config) merged on top."""
+    base_entities: Dict[str, Dict] = (base or {}).get("entities", {})
+    entities: Dict[str, Dict] = {}
+    for table in tables:
+        columns = {}
+        for column in table.columns:
+            info: Dict[str, Any] = {"aliases": seed_aliases(column)}
+            if table.types.get(column):
+                info["type"] = table.types[column]
+            if column in table.primary_key:
+                info["primary_key"] = True
+            columns[column] = info
+        entities[table.name] = {
+            "table": table.name,
+            "aliases": entity_aliases(table.name),
+            "details_bundle": default_bundle(table.columns, bundle_size),
+            "columns": columns,
+        }
+
+    for name, curated in base_entities.items():
+        entity = entities.setdefault(name, {"aliases": [], "columns": {}})
+        entity["aliases"] = _unique(curated.get("aliases", []) + entity["aliases"])
+        for key in ("table", "details_bundle"):
+            if key in curated:
+                entity[key] = curated[key]
+        for column, curated_info in curated.get("columns", {}).items():
+            info = entity["columns"].setdefault(column, {"aliases": []})
+            info.update({k: v for k, v in curated_info.items() if k != "aliases"})
+            info["aliases"] = _unique(curated_info.get("aliases", []) + info["aliases"])
+    return {"entities": entities}
+
+
+def load_config(path: Path) -> Dict[str, Any]:
+    """A config from either format."""
+    if is_compiled(path):
+        with CompiledSchemaFile(path) as f:
+            return f.to_config()
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def save_config(config: Dict[str, Any], path: Path) -> int:
+    """Write .json as schema_config.json style, anything else compiled; returns the file size."""
+    if path.suffix.lower() == ".json":
+        path.write_text(json.dumps(config, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        return path.stat().st_size
+    return write_compiled(config, path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="sql_builder introspect",
+        description="Generate a schema config (JSON or compiled) from a database catalog.",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sqlite", type=Path, help="SQLite database file")
+    source.add_argument("--ddl", type=Path, nargs="+", help="CREATE TABLE scripts, run in in-memory SQLite")
+    source.add_argument("--postgres", metavar="DSN", help="Postgres connection string")
+    source.add_argument("--json", type=Path, help="existing config to convert (e.g. compile schema_config.json)")
+    parser.add_argument("--pg-schema", default="public", help="Postgres schema to read (default: public)")
+    parser.add_argument("--include-views", action="store_true")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="skip tables matching this pattern (repeatable)")
+    parser.add_argument("--base", type=Path, help="hand-edited config whose aliases and bundles are kept")
+    parser.add_argument("--bundle-size", type=int, default=DEFAULT_BUNDLE_SIZE)
+    parser.add_argument("-o", "--output", type=Path, required=True, help=".json or compiled (any other suffix)")
+    args = parser.parse_args(argv)
+
+    if args.json:
+        config = load_config(args.json)
+    else:
+        if args.sqlite:
+            if not args.sqlite.exists():
+                raise SystemExit(f"No such database: {args.sqlite}")
+            conn = sqlite3.connect(args.sqlite)
+            try:
+                tables = read_sqlite(conn, args.include_views)
+            finally:
+                conn.close()
+        elif args.ddl:
+            tables = read_ddl(args.ddl, args.include_views)
+        else:
+            conn = _connect_postgres(args.postgres)
+            try:
+                tables = read_postgres(conn, args.pg_schema, args.include_views)
+            finally:
+                conn.close()
+        tables = [t for t in tables if not any(fnmatch.fnmatch(t.name, p) for p in args.exclude)]
+        base = load_config(args.base) if args.base else None
+        config = build_config(tables, base, args.bundle_size)
+
+    size = save_config(config, args.output)
+    entities = config.get("entities", {})
+    columns = sum(len(e.get("columns", {})) for e in entities.values())
+    print(f"Wrote {args.output}: {len(entities)} entities, {columns} columns, {size:,} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
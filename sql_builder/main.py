@@ -1,15 +1,29 @@
 # main.py
+import os
+import sys
 from pathlib import Path
 
 from schema import SchemaConfig
-from nl_parser import parse_nl_to_intent
-from sql_builder import build_sql
+from intent_cache import TranslationCache
 
 
 def main():
+    # Non-interactive subcommands
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "introspect":
+        from introspect import main as introspect_main
+        sys.exit(introspect_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+
     base_dir = Path(__file__).resolve().parent
     schema_path = base_dir / "schema_config.json"
     schema = SchemaConfig(schema_path)
+    # Set SQL_BUILDER_CACHE_DB to a file path to keep the cache across restarts
+    cache = TranslationCache(schema, persist_path=os.environ.get("SQL_BUILDER_CACHE_DB"))
 
     print("Natural Language → SQL Builder")
     print("Type your data request (blank line to exit).")
@@ -29,12 +43,17 @@ def main():
 
         prompt = "\n".join(user_input_lines).strip()
         if not prompt:
+            stats = cache.stats()
+            print(
+                f"Cache: {stats.hits} hits, {stats.misses} misses, "
+                f"{stats.evictions} evictions"
+            )
             print("Goodbye.")
+            cache.close()
             break
 
         try:
-            intent = parse_nl_to_intent(prompt, schema)
-            sql = build_sql(intent, schema)
+            intent, sql = cache.translate(prompt)
 
             print("\n--- Parsed intent ---")
             print(f"Entity:   {intent.entity}")
@@ -1,15 +1,236 @@
 # nl_parser.py
 import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
 
 from query_intent import QueryIntent, FilterIntent, SortIntent
 from schema import SchemaConfig
 
 
-def _contains_any(text: str, phrases: list[str]) -> bool:
+def _contains_any(text: str, phrases: Iterable[str]) -> bool:
     text_low = text.lower()
     return any(p.lower() in text_low for p in phrases)
 
 
+# ---------- Rule table ----------
+#
+# Every pattern is compiled once at import time. Each rule registers (in
+# application order) with trigger substrings; a rule's regex only runs when
+# one of its triggers occurs in the lower-cased prompt, which is computed once
+# and shared by all rules.
+
+DATE_RE = r"\d{4}-\d{2}-\d{2}"
+
+WHERE_RE = re.compile(r"where\s+([\w\.]+)\s+(is|=)\s+([^\s,]+)")
+JOINED_AFTER_RE = re.compile(r"joined\s+after\s+(" + DATE_RE + ")")
+JOINED_BEFORE_RE = re.compile(r"joined\s+before\s+(" + DATE_RE + ")")
+JOINED_BETWEEN_RE = re.compile(
+    r"joined\s+between\s+(" + DATE_RE + r")\s+and\s+(" + DATE_RE + ")"
+)
+IN_RE = re.compile(
+    r"([A-Za-z_ ]+?)\s+in\s+([A-Za-z0-9_,\s'\"-]+)",
+    flags=re.IGNORECASE,
+)
+TOP_RE = re.compile(r"\btop\s+(\d+)")
+GROUP_RE = re.compile(
+    r"\bgroup(?:ed)? by\s+([A-Za-z_ ]+?)(?:[,\.\n]|$)",
+    flags=re.IGNORECASE,
+)
+PER_RE = re.compile(
+    r"\bper\s+([A-Za-z_ ]+?)(?:[,\.\n]|$)",
+    flags=re.IGNORECASE,
+)
+HAVING_RE = re.compile(
+    r"\bhaving\s+count\s*(=|!=|>=|<=|>|<)\s*(\d+)",
+    flags=re.IGNORECASE,
+)
+SORTED_BY_RE = re.compile(
+    r"\bsorted by\s+(.+?)\s+in\s+(ascending|descending)\s+order",
+    flags=re.IGNORECASE,
+)
+ORDER_BY_RE = re.compile(
+    r"\border by\s+(.+?)\s+(asc|desc)\b",
+    flags=re.IGNORECASE,
+)
+
+DISTINCT_PHRASES = ("no duplicates", "no duplicate", "distinct", "unique", "deduplicated")
+
+
+@dataclass
+class _ParseState:
+    """Shared state threaded through every rule for one prompt."""
+    prompt: str
+    text_low: str
+    entity: str
+    schema: SchemaConfig
+    date_field: Optional[str] = None
+    filters: list[FilterIntent] = field(default_factory=list)
+    group_by: list[str] = field(default_factory=list)
+    having: list[FilterIntent] = field(default_factory=list)
+    sort: list[SortIntent] = field(default_factory=list)
+    limit: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class _Rule:
+    name: str
+    triggers: tuple[str, ...]
+    apply: Callable[[_ParseState], None]
+
+
+_RULES: list[_Rule] = []
+
+
+def _rule(name: str, *triggers: str):
+    """Register a parsing rule; rules run in registration order."""
+    def register(fn: Callable[[_ParseState], None]) -> Callable[[_ParseState], None]:
+        _RULES.append(_Rule(name=name, triggers=triggers, apply=fn))
+        return fn
+    return register
+
+
+# --- WHERE-like filters ---
+
+@_rule("darknet_forum", "darknet forum")
+def _darknet_forum(st: _ParseState) -> None:
+    # Special 'darknet forum' rule
+    if st.schema.field_exists(st.entity, "breach_source"):
+        st.filters.append(
+            FilterIntent(field="breach_source", operator="=", value="darknet_forum")
+        )
+
+
+@_rule("where", "where")
+def _where(st: _ParseState) -> None:
+    # Generic "where X is Y" or "where X = Y" pattern (very naive)
+    m = WHERE_RE.search(st.text_low)
+    if m:
+        field_name, _, value = m.groups()
+        st.filters.append(FilterIntent(field=field_name, operator="=", value=value))
+
+
+@_rule("joined_after", "joined")
+def _joined_after(st: _ParseState) -> None:
+    m = JOINED_AFTER_RE.search(st.text_low)
+    if m and st.date_field:
+        st.filters.append(FilterIntent(field=st.date_field, operator=">", value=m.group(1)))
+
+
+@_rule("joined_before", "joined")
+def _joined_before(st: _ParseState) -> None:
+    m = JOINED_BEFORE_RE.search(st.text_low)
+    if m and st.date_field:
+        st.filters.append(FilterIntent(field=st.date_field, operator="<", value=m.group(1)))
+
+
+@_rule("joined_between", "joined")
+def _joined_between(st: _ParseState) -> None:
+    m = JOINED_BETWEEN_RE.search(st.text_low)
+    if m and st.date_field:
+        d1, d2 = m.groups()
+        st.filters.append(
+            FilterIntent(field=st.date_field, operator="BETWEEN", value=(d1, d2))
+        )
+
+
+@_rule("in_list", "in")
+def _in_list(st: _ParseState) -> None:
+    # "<phrase> in a, b, c", e.g. "status in active, pending, blocked"
+    m = IN_RE.search(st.prompt)
+    if not m:
+        return
+    field_phrase_raw, values_raw = m.groups()
+    field_phrase = field_phrase_raw.strip(" .,")
+
+    # Avoid matching things like "sorted by"
+    if "sorted by" in field_phrase.lower():
+        return
+    field_col = st.schema.resolve_field_from_phrase(st.entity, field_phrase)
+    if not field_col:
+        return
+    values = []
+    for item in values_raw.split(","):
+        val = item.strip(" '\".")
+        if val:
+            values.append(val)
+    if values:
+        st.filters.append(FilterIntent(field=field_col, operator="IN", value=values))
+
+
+# --- LIMIT ---
+
+@_rule("top_n", "top")
+def _top_n(st: _ParseState) -> None:
+    m = TOP_RE.search(st.text_low)
+    if m:
+        st.limit = int(m.group(1))
+
+
+# --- GROUP BY ---
+
+def _add_group_by(st: _ParseState, pattern: re.Pattern) -> None:
+    for m in pattern.finditer(st.prompt):
+        phrase = m.group(1).strip(" .,")
+        field_col = st.schema.resolve_field_from_phrase(st.entity, phrase)
+        if field_col and field_col not in st.group_by:
+            st.group_by.append(field_col)
+
+
+@_rule("group_by", "group")
+def _group_by(st: _ParseState) -> None:
+    # "group by <phrase>" or "grouped by <phrase>"
+    _add_group_by(st, GROUP_RE)
+
+
+@_rule("per", "per")
+def _per(st: _ParseState) -> None:
+    # "per <phrase>" (e.g., "count of members per breach source")
+    _add_group_by(st, PER_RE)
+
+
+# --- HAVING ---
+
+@_rule("having_count", "having")
+def _having_count(st: _ParseState) -> None:
+    m = HAVING_RE.search(st.text_low)
+    if m:
+        op, num_str = m.groups()
+        # Use special field "__count__" which sql_builder renders as COUNT(*)
+        st.having.append(
+            FilterIntent(field="__count__", operator=op, value=num_str)  # type: ignore
+        )
+
+
+# --- ORDER BY ---
+
+@_rule("sort", "sorted by", "order by")
+def _sort(st: _ParseState) -> None:
+    field_phrase = None
+    direction = "asc"
+
+    # "sorted by <something> in ascending/descending order" takes precedence
+    m1 = SORTED_BY_RE.search(st.prompt)
+    if m1:
+        field_phrase = m1.group(1).strip(" .,")
+        if m1.group(2).lower().startswith("desc"):
+            direction = "desc"
+    else:
+        # "order by <something> asc/desc"
+        m2 = ORDER_BY_RE.search(st.prompt)
+        if m2:
+            field_phrase = m2.group(1).strip(" .,")
+            if m2.group(2).lower() == "desc":
+                direction = "desc"
+
+    if field_phrase:
+        # Map phrase like "join dates" or "usernames" → actual column name
+        field_col = st.schema.resolve_field_from_phrase(st.entity, field_phrase)
+        if field_col:
+            st.sort.append(SortIntent(field=field_col, direction=direction))
+
+
+# ---------- Entry point ----------
+
 def parse_nl_to_intent(prompt: str, schema: SchemaConfig) -> QueryIntent:
     """
     Rule-based natural language → QueryIntent parser.
@@ -31,6 +252,9 @@ def parse_nl_to_intent(prompt: str, schema: SchemaConfig) -> QueryIntent:
         'having count > N', 'having count >= N', etc.
     - 'top N' → LIMIT N
     - 'sorted by X in ascending/descending order' or 'order by X desc' → ORDER BY
+
+    Filters, LIMIT, GROUP BY, HAVING and ORDER BY come from the module-level
+    rule table (_RULES), applied in order over the shared lower-cased prompt.
     """
     text_low = prompt.lower()
 
@@ -51,10 +275,7 @@ def parse_nl_to_intent(prompt: str, schema: SchemaConfig) -> QueryIntent:
         )
 
     # 2. DISTINCT / no duplicates
-    distinct = _contains_any(
-        text_low,
-        ["no duplicates", "no duplicate", "distinct", "unique", "deduplicated"],
-    )
+    distinct = _contains_any(text_low, DISTINCT_PHRASES)
 
     # 3. Fields
     fields = schema.resolve_fields_from_text(entity, prompt)
@@ -62,190 +283,25 @@ def parse_nl_to_intent(prompt: str, schema: SchemaConfig) -> QueryIntent:
     if not fields:
         fields = schema.bundle_for_entity(entity)
 
-    # 4. WHERE-like filters
-    filters: list[FilterIntent] = []
-
-    # Special 'darknet forum' rule
-    if "darknet forum" in text_low and schema.field_exists(entity, "breach_source"):
-        filters.append(
-            FilterIntent(field="breach_source", operator="=", value="darknet_forum")
-        )
-
-    # Generic "where X is Y" or "where X = Y" pattern (very naive)
-    where_pattern = r"where\s+([\w\.]+)\s+(is|=)\s+([^\s,]+)"
-    m = re.search(where_pattern, text_low)
-    if m:
-        field, _, value = m.groups()
-        filters.append(FilterIntent(field=field, operator="=", value=value))
-
-    # --- Date filters around join_date (or equivalent) ---
-
-    # Determine the appropriate date field if present
-    date_field = None
+    # 4. Rule table: filters, LIMIT, GROUP BY, HAVING, ORDER BY
+    state = _ParseState(prompt=prompt, text_low=text_low, entity=entity, schema=schema)
     # Simple rule: if entity has 'join_date', we prefer that for "joined" style phrases
     if schema.field_exists(entity, "join_date"):
-        date_field = "join_date"
-
-    # joined after YYYY-MM-DD
-    after_match = re.search(r"joined\s+after\s+(\d{4}-\d{2}-\d{2})", text_low)
-    if after_match and date_field:
-        date_val = after_match.group(1)
-        filters.append(
-            FilterIntent(field=date_field, operator=">", value=date_val)
-        )
-
-    # joined before YYYY-MM-DD
-    before_match = re.search(r"joined\s+before\s+(\d{4}-\d{2}-\d{2})", text_low)
-    if before_match and date_field:
-        date_val = before_match.group(1)
-        filters.append(
-            FilterIntent(field=date_field, operator="<", value=date_val)
-        )
-
-    # joined between YYYY-MM-DD and YYYY-MM-DD
-    between_match = re.search(
-        r"joined\s+between\s+(\d{4}-\d{2}-\d{2})\s+and\s+(\d{4}-\d{2}-\d{2})",
-        text_low,
-    )
-    if between_match and date_field:
-        d1, d2 = between_match.groups()
-        filters.append(
-            FilterIntent(
-                field=date_field,
-                operator="BETWEEN",
-                value=(d1, d2),
-            )
-        )
-
-    # --- IN filters: "<phrase> in a, b, c" ---
-    # Example: "status in active, pending, blocked"
-    # We'll map <phrase> to a column using resolve_field_from_phrase.
-    in_pattern = re.compile(
-        r"([A-Za-z_ ]+?)\s+in\s+([A-Za-z0-9_,\s'\"-]+)",
-        flags=re.IGNORECASE,
-    )
-    in_match = in_pattern.search(prompt)
-    if in_match:
-        field_phrase_raw, values_raw = in_match.groups()
-        field_phrase = field_phrase_raw.strip(" .,")
-
-        # Avoid matching things like "sorted by"
-        if "sorted by" not in field_phrase.lower():
-            field_col = schema.resolve_field_from_phrase(entity, field_phrase)
-            if field_col:
-                # split values on commas
-                raw_items = values_raw.split(",")
-                values = []
-                for item in raw_items:
-                    val = item.strip(" '\".")
-                    if val:
-                        values.append(val)
-                if values:
-                    filters.append(
-                        FilterIntent(
-                            field=field_col,
-                            operator="IN",
-                            value=values,
-                        )
-                    )
-
-    # 5. LIMIT: 'top N'
-    limit = None
-    top_match = re.search(r"\btop\s+(\d+)", text_low)
-    if top_match:
-        limit = int(top_match.group(1))
-
-    # 6. GROUP BY detection
-    group_by: list[str] = []
-
-    # Pattern 1: "group by <phrase>" or "grouped by <phrase>"
-    group_pattern = re.compile(
-        r"\bgroup(?:ed)? by\s+([A-Za-z_ ]+?)(?:[,\.\n]|$)",
-        flags=re.IGNORECASE,
-    )
-    for gm in group_pattern.finditer(prompt):
-        phrase = gm.group(1).strip(" .,")
-
-        field_col = schema.resolve_field_from_phrase(entity, phrase)
-        if field_col and field_col not in group_by:
-            group_by.append(field_col)
-
-    # Pattern 2: "per <phrase>"  (e.g., "count of members per breach source")
-    per_pattern = re.compile(
-        r"\bper\s+([A-Za-z_ ]+?)(?:[,\.\n]|$)",
-        flags=re.IGNORECASE,
-    )
-    for pm in per_pattern.finditer(prompt):
-        phrase = pm.group(1).strip(" .,")
-
-        field_col = schema.resolve_field_from_phrase(entity, phrase)
-        if field_col and field_col not in group_by:
-            group_by.append(field_col)
-
-    # 7. HAVING (COUNT) detection: "having count > N", etc.
-    having: list[FilterIntent] = []
-
-    having_pattern = re.compile(
-        r"\bhaving\s+count\s*(=|!=|>=|<=|>|<)\s*(\d+)",
-        flags=re.IGNORECASE,
-    )
-    hm = having_pattern.search(text_low)
-    if hm:
-        op, num_str = hm.groups()
-        # Use special field "__count__" which sql_builder renders as COUNT(*)
-        having.append(
-            FilterIntent(
-                field="__count__",
-                operator=op,  # type: ignore
-                value=num_str,
-            )
-        )
-
-    # 8. Sorting
-    sort: list[SortIntent] = []
-
-    field_phrase = None
-    direction = "asc"
-
-    # Pattern 1: "sorted by <something> in ascending/descending order"
-    m1 = re.search(
-        r"\bsorted by\s+(.+?)\s+in\s+(ascending|descending)\s+order",
-        prompt,
-        flags=re.IGNORECASE,
-    )
-    if m1:
-        field_phrase = m1.group(1).strip(" .,")
-        asc_desc_word = m1.group(2).lower()
-        if asc_desc_word.startswith("desc"):
-            direction = "desc"
-    else:
-        # Pattern 2: "order by <something> asc/desc"
-        m2 = re.search(
-            r"\border by\s+(.+?)\s+(asc|desc)\b",
-            prompt,
-            flags=re.IGNORECASE,
-        )
-        if m2:
-            field_phrase = m2.group(1).strip(" .,")
-            asc_desc_short = m2.group(2).lower()
-            if asc_desc_short == "desc":
-                direction = "desc"
+        state.date_field = "join_date"
 
-    if field_phrase:
-        # Map phrase like "join dates" or "usernames" → actual column name
-        field_col = schema.resolve_field_from_phrase(entity, field_phrase)
-        if field_col:
-            sort.append(SortIntent(field=field_col, direction=direction))
+    for rule in _RULES:
+        if any(t in text_low for t in rule.triggers):
+            rule.apply(state)
 
-    # 9. Build QueryIntent
+    # 5. Build QueryIntent
     intent = QueryIntent(
         entity=entity,
         fields=fields,
         distinct=distinct,
-        filters=filters,
-        group_by=group_by,
-        having=having,
-        sort=sort,
-        limit=limit,
+        filters=state.filters,
+        group_by=state.group_by,
+        having=state.having,
+        sort=state.sort,
+        limit=state.limit,
     )
     return intent
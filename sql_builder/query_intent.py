@@ -1,6 +1,9 @@
 # query_intent.py
-from dataclasses import dataclass, field
-from typing import List, Optional, Literal, Any
+import hashlib
+import json
+import marshal
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional, Literal, Any, Tuple
 
 # Supported comparison operators
 Operator = Literal["=", ">", "<", ">=", "<=", "!=", "LIKE", "IN", "BETWEEN"]
@@ -45,3 +48,163 @@ class QueryIntent:
     having: List[FilterIntent] = field(default_factory=list)    # HAVING
     sort: List[SortIntent] = field(default_factory=list)        # ORDER BY
     limit: Optional[int] = None                                 # LIMIT
+
+    def freeze(self) -> "FrozenQueryIntent":
+        """Immutable, hashable copy (lists become tuples)."""
+        return FrozenQueryIntent(
+            entity=self.entity,
+            fields=tuple(self.fields),
+            distinct=self.distinct,
+            filters=tuple(FrozenFilterIntent.from_filter(f) for f in self.filters),
+            group_by=tuple(self.group_by),
+            having=tuple(FrozenFilterIntent.from_filter(f) for f in self.having),
+            sort=tuple(FrozenSortIntent(field=s.field, direction=s.direction) for s in self.sort),
+            limit=self.limit,
+        )
+
+
+# ---------- Frozen (hashable, slotted) variants ----------
+#
+# Same shape as the classes above, but immutable, tuple-based and __slots__
+# backed: usable as dict/cache keys and much cheaper to hold in bulk.
+# build_sql accepts either form.
+
+@dataclass(frozen=True, slots=True)
+class FrozenFilterIntent:
+    field: str
+    operator: Operator
+    value: Any                  # str, or tuple[str, ...] for IN / BETWEEN
+    logical: LogicalOp = "AND"
+
+    @classmethod
+    def from_filter(cls, f: FilterIntent) -> "FrozenFilterIntent":
+        value = tuple(f.value) if isinstance(f.value, list) else f.value
+        return cls(field=f.field, operator=f.operator, value=value, logical=f.logical)
+
+    def thaw(self) -> FilterIntent:
+        # The parser produces IN values as lists and BETWEEN ranges as tuples
+        value = self.value
+        if self.operator == "IN" and isinstance(value, tuple):
+            value = list(value)
+        return FilterIntent(field=self.field, operator=self.operator, value=value, logical=self.logical)
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenSortIntent:
+    field: str
+    direction: Literal["asc", "desc"] = "asc"
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenQueryIntent:
+    entity: str
+    fields: Tuple[str, ...] = ()
+    distinct: bool = False
+    filters: Tuple[FrozenFilterIntent, ...] = ()
+    group_by: Tuple[str, ...] = ()
+    having: Tuple[FrozenFilterIntent, ...] = ()
+    sort: Tuple[FrozenSortIntent, ...] = ()
+    limit: Optional[int] = None
+
+    def thaw(self) -> QueryIntent:
+        """Mutable QueryIntent equal to the one this was frozen from."""
+        return QueryIntent(
+            entity=self.entity,
+            fields=list(self.fields),
+            distinct=self.distinct,
+            filters=[f.thaw() for f in self.filters],
+            group_by=list(self.group_by),
+            having=[f.thaw() for f in self.having],
+            sort=[SortIntent(field=s.field, direction=s.direction) for s in self.sort],
+            limit=self.limit,
+        )
+
+    # --- Compact serialization ---
+    #
+    # Positional nested tuples:
+    #   (entity, fields, distinct, filters, group_by, having, sort, limit)
+    #   filter = (field, operator, value, logical), sort = (field, direction)
+
+    def to_compact(self) -> tuple:
+        return (
+            self.entity,
+            self.fields,
+            self.distinct,
+            tuple((f.field, f.operator, f.value, f.logical) for f in self.filters),
+            self.group_by,
+            tuple((f.field, f.operator, f.value, f.logical) for f in self.having),
+            tuple((s.field, s.direction) for s in self.sort),
+            self.limit,
+        )
+
+    @classmethod
+    def from_compact(cls, data) -> "FrozenQueryIntent":
+        def _value(v):
+            return tuple(v) if isinstance(v, list) else v
+
+        entity, fields, distinct, filters, group_by, having, sort, limit = data
+        return cls(
+            entity=entity,
+            fields=tuple(fields),
+            distinct=bool(distinct),
+            filters=tuple(FrozenFilterIntent(f[0], f[1], _value(f[2]), f[3]) for f in filters),
+            group_by=tuple(group_by),
+            having=tuple(FrozenFilterIntent(f[0], f[1], _value(f[2]), f[3]) for f in having),
+            sort=tuple(FrozenSortIntent(s[0], s[1]) for s in sort),
+            limit=limit,
+        )
+
+    def to_json(self) -> str:
+        """Portable compact JSON (arrays, no keys)."""
+        return json.dumps(self.to_compact(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "FrozenQueryIntent":
+        return cls.from_compact(json.loads(text))
+
+    def to_bytes(self) -> bytes:
+        """
+        Fast binary form (marshal). Only readable by the same Python version;
+        use to_json() for anything stored long-term or shared.
+        """
+        return marshal.dumps(self.to_compact())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FrozenQueryIntent":
+        return cls.from_compact(marshal.loads(data))
+
+    def digest(self) -> str:
+        """Hash that is stable across processes (unlike hash(), which is salted)."""
+        return hashlib.sha1(self.to_json().encode("utf-8")).hexdigest()
+
+
+# ---------- (De)serialization ----------
+
+def intent_to_dict(intent: QueryIntent) -> dict:
+    """Plain JSON-compatible dict for a QueryIntent (BETWEEN tuples become lists)."""
+    return asdict(intent)
+
+
+def intent_from_dict(data: dict) -> QueryIntent:
+    """Inverse of intent_to_dict."""
+    def _filter(f: dict) -> FilterIntent:
+        value = f["value"]
+        if f["operator"] == "BETWEEN" and isinstance(value, list):
+            value = tuple(value)
+        return FilterIntent(
+            field=f["field"],
+            operator=f["operator"],
+            value=value,
+            logical=f.get("logical", "AND"),
+        )
+
+    return QueryIntent(
+        entity=data["entity"],
+        fields=list(data.get("fields", [])),
+        distinct=data.get("distinct", False),
+        filters=[_filter(f) for f in data.get("filters", [])],
+        group_by=list(data.get("group_by", [])),
+        having=[_filter(f) for f in data.get("having", [])],
+        sort=[SortIntent(field=s["field"], direction=s.get("direction", "asc")) for s in data.get("sort", [])],
+        limit=data.get("limit"),
+    )
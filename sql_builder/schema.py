@@ -1,147 +1,153 @@
 # schema.py
+import os
 import re
 import json
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+from alias_index import AliasIndex
+from fuzzy_index import FuzzyTokenIndex
+from schema_store import CompiledSchemaFile, is_compiled
 
-class SchemaConfig:
-    """
-    Loads and manages the schema & business alias configuration from JSON.
-    This is how we map natural-language phrases to entities & columns.
-    """
-
-    def __init__(self, config_path: str | Path):
-        self._path = Path(config_path)
-        with self._path.open("r", encoding="utf-8") as f:
-            self._data: Dict = json.load(f)
-
-    # ---------- Entity resolution ----------
-
-    def resolve_entity(self, text: str) -> Optional[str]:
-        """
-        Return the entity key (e.g. 'members') that best matches the text,
-        based on configured aliases. Uses a simple longest-alias scoring.
-        """
-        text_low = text.lower()
-        best_entity = None
-        best_score = 0
-
-        for entity_name, entity in self._data.get("entities", {}).items():
-            aliases = entity.get("aliases", [])
-            for alias in aliases:
-                alias_low = alias.lower()
-                if alias_low in text_low:
-                    score = len(alias_low)
-                    if score > best_score:
-                        best_score = score
-                        best_entity = entity_name
-
-        return best_entity
-
-    def get_table_for_entity(self, entity: str) -> Optional[str]:
-        entity_data = self._data.get("entities", {}).get(entity)
-        if not entity_data:
-            return None
-        return entity_data.get("table")
-
-    def entities(self) -> List[str]:
-        """Return a list of all configured entity keys."""
-        return list(self._data.get("entities", {}).keys())
-
-    # ---------- Field & bundle resolution ----------
-
-    def bundle_for_entity(self, entity: str) -> List[str]:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        return entity_data.get("details_bundle", [])
-
-    def resolve_fields_from_text(self, entity: str, text: str) -> List[str]:
-        """
-        Try to detect which fields/columns are mentioned in the text.
-
-        - If the text mentions 'details' (even misspelled), we use the entity's bundle.
-          We do a fuzzy match: any word containing 'detai' (covers 'details',
-          'deatils', 'detials', etc.) will trigger the bundle.
-        - We also scan column aliases and include any that match.
-        """
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-
-        text_low = text.lower()
-        fields: List[str] = []
 
-        # Fuzzy match for "details" to catch typos like "deatils", "detials", etc.
-        if re.search(r"detai\w*", text_low):
-            bundle = self.bundle_for_entity(entity)
-            fields.extend(bundle)
-
-        # Look for explicit column aliases in text
-        for col_name, col_info in columns.items():
-            aliases = col_info.get("aliases", [])
-            for alias in aliases:
-                if alias.lower() in text_low and col_name not in fields:
-                    fields.append(col_name)
-
-        # Deduplicate while preserving order
-        seen = set()
-        unique_fields: List[str] = []
-        for f in fields:
-            if f not in seen:
-                seen.add(f)
-                unique_fields.append(f)
-
-        return unique_fields
-
-    def field_exists(self, entity: str, field: str) -> bool:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        return field in entity_data.get("columns", {})
-
-    def get_column_aliases(self, entity: str) -> Dict[str, List[str]]:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-        return {name: info.get("aliases", []) for name, info in columns.items()}
-
-    def resolve_field_from_phrase(self, entity: str, phrase: str) -> Optional[str]:
-        """
-        Given a short phrase like 'join dates' or 'signup date',
-        try to resolve it to a single column for the given entity,
-        using alias matching and a simple longest-match scoring.
-        """
-        phrase_low = phrase.lower()
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-
-        best_field = None
-        best_score = 0
-
-        for col_name, col_info in columns.items():
-            aliases = col_info.get("aliases", [])
-            for alias in aliases:
-                alias_low = alias.lower()
-                if alias_low in phrase_low:
-                    score = len(alias_low)
-                    if score > best_score:
-                        best_score = score
-                        best_field = col_name
-
-        return best_field
-# schema.py
-import re
-import json
-from pathlib import Path
-from typing import Dict, List, Optional
+class _ColumnBlock(NamedTuple):
+    """One entity's faulted-in columns."""
+    columns: Dict[str, Dict]
+    names: List[str]              # config order; AliasIndex ranks index into this
+    index: AliasIndex
+    fuzzy: Optional[FuzzyTokenIndex]
 
 
 class SchemaConfig:
     """
     Loads and manages the schema & business alias configuration from JSON.
     This is how we map natural-language phrases to entities & columns.
+
+    Only the entity header (names, tables, aliases, bundles) is held up
+    front. An entity's columns and their alias index are faulted in the
+    first time a field lookup touches that entity and then stay loaded.
+    Pass `max_resident` to cap how many entities keep them (least recently
+    used are dropped and rebuilt on demand); the cap trades memory for
+    re-faults, so leave it unset unless memory is the constraint. With a compiled config (introspect.py) the column
+    blocks stay on disk until then, so startup time and memory don't grow
+    with the number of columns.
+
+    With fuzzy=True (default: the SQL_BUILDER_FUZZY environment variable),
+    misspelled alias words are corrected with a FuzzyTokenIndex when the
+    exact aliases find nothing ("usrname" -> username). Exact matches
+    always win. Results can differ from exact-only matching, so `version`
+    records the mode and caches keep the two apart.
     """
 
-    def __init__(self, config_path: str | Path):
+    def __init__(self, config_path: str | Path, max_resident: Optional[int] = None, fuzzy: Optional[bool] = None):
+        if max_resident is not None and max_resident < 1:
+            raise ValueError("max_resident must be at least 1")
         self._path = Path(config_path)
-        with self._path.open("r", encoding="utf-8") as f:
-            self._data: Dict = json.load(f)
+        self._max_resident = max_resident
+        if fuzzy is None:
+            fuzzy = os.environ.get("SQL_BUILDER_FUZZY", "").lower() in ("1", "true", "yes", "on")
+        self._fuzzy = fuzzy
+        self._compiled: Optional[CompiledSchemaFile] = None
+        self._json_entities: Dict[str, Dict] = {}
+        if is_compiled(self._path):
+            # Generated by introspect.py; see schema_store.py for the layout
+            self._compiled = CompiledSchemaFile(self._path)
+            self._version = self._compiled.version
+            header = [(e.name, e.table, e.aliases, e.details_bundle) for e in self._compiled.entities]
+        else:
+            raw = self._path.read_bytes()
+            # Content hash: changes whenever the config file is edited
+            self._version = hashlib.sha256(raw).hexdigest()
+            self._json_entities = json.loads(raw.decode("utf-8")).get("entities", {})
+            header = [
+                (name, entity.get("table"), entity.get("aliases", []), entity.get("details_bundle", []))
+                for name, entity in self._json_entities.items()
+            ]
+        if self._fuzzy:
+            self._version += "+fuzzy"
+        self._build_header(header)
+
+    def _build_header(self, header: List[Tuple[str, Optional[str], List[str], List[str]]]) -> None:
+        """
+        Compile every entity alias into one Aho-Corasick index, so entity
+        resolution is a single pass over the prompt instead of a scan over
+        every alias.
+        """
+        self._entity_names: List[str] = [name for name, _, _, _ in header]
+        self._tables: Dict[str, Optional[str]] = {name: table for name, table, _, _ in header}
+        self._bundles: Dict[str, List[str]] = {name: bundle for name, _, _, bundle in header}
+        self._entity_index = AliasIndex(
+            (alias, rank) for rank, (_, _, aliases, _) in enumerate(header) for alias in aliases
+        )
+        self._entity_aliases: List[List[str]] = [aliases for _, _, aliases, _ in header]
+        self._entity_fuzzy: Optional[FuzzyTokenIndex] = None
+        self._resident: "OrderedDict[str, _ColumnBlock]" = OrderedDict()
+        self._fault_lock = threading.Lock()
+        self.faults = 0
+
+    def _entity_fuzzy_index(self) -> FuzzyTokenIndex:
+        """Fuzzy index over every entity alias word, built on first use."""
+        with self._fault_lock:
+            if self._entity_fuzzy is None:
+                self._entity_fuzzy = FuzzyTokenIndex(a for aliases in self._entity_aliases for a in aliases)
+            return self._entity_fuzzy
+
+    def _entity_columns(self, entity: str) -> Optional[_ColumnBlock]:
+        """The entity's columns, names and column alias index; None for an unknown entity."""
+        if self._max_resident is None:
+            # Nothing is ever evicted, so a hit needs neither the lock nor an LRU touch
+            block = self._resident.get(entity)
+            if block is not None:
+                return block
+        with self._fault_lock:
+            block = self._resident.get(entity)
+            if block is not None:
+                self._resident.move_to_end(entity)
+                return block
+            if entity not in self._tables:
+                return None
+            if self._compiled is not None:
+                columns = self._compiled.columns(entity)
+            else:
+                columns = self._json_entities[entity].get("columns", {})
+            index = AliasIndex(
+                (alias, rank)
+                for rank, col_info in enumerate(columns.values())
+                for alias in col_info.get("aliases", [])
+            )
+            fuzzy = None
+            if self._fuzzy:
+                fuzzy = FuzzyTokenIndex(a for info in columns.values() for a in info.get("aliases", []))
+            block = _ColumnBlock(columns, list(columns.keys()), index, fuzzy)
+            self._resident[entity] = block
+            self.faults += 1
+            if self._max_resident is not None and len(self._resident) > self._max_resident:
+                self._resident.popitem(last=False)
+            return block
+
+    @property
+    def path(self) -> Path:
+        """Path of the config this schema was loaded from."""
+        return self._path
+
+    @property
+    def version(self) -> str:
+        """SHA-256 of the config (file contents, or the compiled header's hash), used to key caches."""
+        return self._version
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Constructor options besides the path, to open an equivalent schema elsewhere (e.g. a worker process)."""
+        return {"max_resident": self._max_resident, "fuzzy": self._fuzzy}
+
+    @property
+    def resident_entities(self) -> List[str]:
+        """Entities whose columns are currently loaded, least recently used first."""
+        with self._fault_lock:
+            return list(self._resident)
 
     # ---------- Entity resolution ----------
 
@@ -150,37 +156,24 @@ class SchemaConfig:
         Return the entity key (e.g. 'members') that best matches the text,
         based on configured aliases. Uses a simple longest-alias scoring.
         """
-        text_low = text.lower()
-        best_entity = None
-        best_score = 0
-
-        for entity_name, entity in self._data.get("entities", {}).items():
-            aliases = entity.get("aliases", [])
-            for alias in aliases:
-                alias_low = alias.lower()
-                if alias_low in text_low:
-                    score = len(alias_low)
-                    if score > best_score:
-                        best_score = score
-                        best_entity = entity_name
-
-        return best_entity
+        rank = self._entity_index.best(text)
+        if rank is None and self._fuzzy:
+            rank = self._entity_index.best(self._entity_fuzzy_index().correct(text))
+        if rank is None:
+            return None
+        return self._entity_names[rank]
 
     def get_table_for_entity(self, entity: str) -> Optional[str]:
-        entity_data = self._data.get("entities", {}).get(entity)
-        if not entity_data:
-            return None
-        return entity_data.get("table")
+        return self._tables.get(entity)
 
     def entities(self) -> List[str]:
         """Return a list of all configured entity keys."""
-        return list(self._data.get("entities", {}).keys())
+        return list(self._entity_names)
 
     # ---------- Field & bundle resolution ----------
 
     def bundle_for_entity(self, entity: str) -> List[str]:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        return entity_data.get("details_bundle", [])
+        return self._bundles.get(entity, [])
 
     def resolve_fields_from_text(self, entity: str, text: str) -> List[str]:
         """
@@ -191,9 +184,6 @@ class SchemaConfig:
           'deatils', 'detials', etc.) will trigger the bundle.
         - We also scan column aliases and include any that match.
         """
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-
         text_low = text.lower()
         fields: List[str] = []
 
@@ -202,12 +192,18 @@ class SchemaConfig:
             bundle = self.bundle_for_entity(entity)
             fields.extend(bundle)
 
-        # Look for explicit column aliases in text
-        for col_name, col_info in columns.items():
-            aliases = col_info.get("aliases", [])
-            for alias in aliases:
-                if alias.lower() in text_low and col_name not in fields:
-                    fields.append(col_name)
+        # Look for explicit column aliases in text (kept in config column order)
+        block = self._entity_columns(entity)
+        if block is not None:
+            ranks = block.index.matches(text_low)
+            if block.fuzzy is not None:
+                # Entity words ("members") are known words, not misspelled columns
+                corrected = block.fuzzy.correct(text_low, known=self._entity_fuzzy_index().words)
+                if corrected != text_low:
+                    ranks |= block.index.matches(corrected)
+            for rank in sorted(ranks):
+                if block.names[rank] not in fields:
+                    fields.append(block.names[rank])
 
         # Deduplicate while preserving order
         seen = set()
@@ -220,13 +216,14 @@ class SchemaConfig:
         return unique_fields
 
     def field_exists(self, entity: str, field: str) -> bool:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        return field in entity_data.get("columns", {})
+        block = self._entity_columns(entity)
+        return block is not None and field in block.columns
 
     def get_column_aliases(self, entity: str) -> Dict[str, List[str]]:
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-        return {name: info.get("aliases", []) for name, info in columns.items()}
+        block = self._entity_columns(entity)
+        if block is None:
+            return {}
+        return {name: info.get("aliases", []) for name, info in block.columns.items()}
 
     def resolve_field_from_phrase(self, entity: str, phrase: str) -> Optional[str]:
         """
@@ -234,21 +231,12 @@ class SchemaConfig:
         try to resolve it to a single column for the given entity,
         using alias matching and a simple longest-match scoring.
         """
-        phrase_low = phrase.lower()
-        entity_data = self._data.get("entities", {}).get(entity, {})
-        columns: Dict[str, Dict] = entity_data.get("columns", {})
-
-        best_field = None
-        best_score = 0
-
-        for col_name, col_info in columns.items():
-            aliases = col_info.get("aliases", [])
-            for alias in aliases:
-                alias_low = alias.lower()
-                if alias_low in phrase_low:
-                    score = len(alias_low)
-                    if score > best_score:
-                        best_score = score
-                        best_field = col_name
-
-        return best_field
+        block = self._entity_columns(entity)
+        if block is None:
+            return None
+        rank = block.index.best(phrase)
+        if rank is None and block.fuzzy is not None:
+            rank = block.index.best(block.fuzzy.correct(phrase, known=self._entity_fuzzy_index().words))
+        if rank is None:
+            return None
+        return block.names[rank]
@@ -0,0 +1,143 @@
+# schema_store.py
+"""
+Compiled schema file: the schema_config.json content in a form that can be
+opened without reading all of it.
+
+Layout (all integers little-endian):
+
+    magic    8 bytes  b"SQLSCHM1"
+    length   u32      size of the header that follows
+    header   zlib(JSON) {"format": 1, "version": <sha256>, "entities": [
+                 [name, table, aliases, details_bundle, offset, length], ...]}
+    blocks   one zlib(JSON) block per entity: [[column, {column info}], ...]
+
+The header is all that is needed to resolve an entity and build its bundle;
+an entity's columns are one slice + decompress away (offsets count from the
+first block). The file is memory-mapped, so untouched blocks are never read
+from disk. `version` is the SHA-256 of the config's canonical JSON, so
+recompiling an unchanged config keeps the version (and warm caches) intact.
+
+    write_compiled(config, "schema.sqlsc")
+    with CompiledSchemaFile("schema.sqlsc") as f:
+        f.entities[0].name, f.columns("members")
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAGIC = b"SQLSCHM1"
+FORMAT = 1
+_PREFIX = struct.Struct("<8sI")
+
+
+@dataclass(frozen=True)
+class EntityHeader:
+    name: str
+    table: Optional[str]
+    aliases: List[str]
+    details_bundle: List[str]
+    offset: int
+    length: int
+
+
+def config_version(config: Dict[str, Any]) -> str:
+    """SHA-256 of the config's canonical JSON (key order and whitespace don't matter)."""
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_compiled(path: str | Path) -> bool:
+    """True if the file starts with the compiled-schema magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _pack(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 6)
+
+
+def _unpack(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def write_compiled(config: Dict[str, Any], path: str | Path) -> int:
+    """
+    Write `config` (schema_config.json structure) to `path`; returns the
+    file size. The file is replaced atomically, so a running service that
+    hot-reloads on mtime never reads a half-written schema.
+    """
+    entities: Dict[str, Dict] = config.get("entities", {})
+    blocks = [_pack([[name, info] for name, info in entity.get("columns", {}).items()])
+              for entity in entities.values()]
+
+    rows, offset = [], 0
+    for (name, entity), block in zip(entities.items(), blocks):
+        rows.append([name, entity.get("table"), entity.get("aliases", []),
+                     entity.get("details_bundle", []), offset, len(block)])
+        offset += len(block)
+    header = _pack({"format": FORMAT, "version": config_version(config), "entities": rows})
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+class CompiledSchemaFile:
+    """Read side of the compiled format: the header eagerly, column blocks on demand."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a compiled schema file")
+        header = _unpack(self._map[_PREFIX.size:_PREFIX.size + header_len])
+        if header.get("format") != FORMAT:
+            self._map.close()
+            raise ValueError(f"{self.path}: unsupported compiled schema format {header.get('format')!r}")
+        self._blocks = _PREFIX.size + header_len
+        self.version: str = header["version"]
+        self.entities: List[EntityHeader] = [EntityHeader(*row) for row in header["entities"]]
+        self._by_name = {e.name: e for e in self.entities}
+
+    def columns(self, entity: str) -> Dict[str, Dict[str, Any]]:
+        """Column name -> column info for one entity, in config order ({} if unknown)."""
+        head = self._by_name.get(entity)
+        if head is None:
+            return {}
+        start = self._blocks + head.offset
+        return {name: info for name, info in _unpack(self._map[start:start + head.length])}
+
+    def to_config(self) -> Dict[str, Any]:
+        """Expand the whole file back into the schema_config.json structure."""
+        return {"entities": {
+            e.name: {"table": e.table, "aliases": e.aliases, "details_bundle": e.details_bundle,
+                     "columns": self.columns(e.name)}
+            for e in self.entities
+        }}
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "CompiledSchemaFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,413 @@
+# server.py
+"""
+Long-lived HTTP translation service (asyncio, standard library only).
+
+One process holds a warm SchemaConfig and answers many requests, instead of
+every analyst paying for an import and a schema load per launch:
+
+    POST /translate        {"prompt": "...", "dialect": "sqlite"}   -> translate_one() result
+    GET  /translate?prompt=...&dialect=sqlite
+    POST /translate/batch  {"prompts": ["...", ...], "dialect": "postgres"}
+                                                                    -> {"results": [...]}
+    GET  /metrics          request counts and latency percentiles per endpoint
+    GET  /health           schema version and entities
+
+Parsing and SQL generation are CPU-bound, so they run in a process pool
+(--workers, default: one per CPU) while the event loop only does I/O. A
+batch is split into chunks that are translated in parallel. With
+--workers 0 everything runs on a single background thread, which is handy
+under a debugger.
+
+schema_config.json is re-read when its mtime changes. Each request carries
+the schema stamp (path, mtime) to the pool, and a worker reloads its copy
+when the stamp moves, so an edit is picked up without restarting the pool.
+If the edited file does not load (e.g. half-saved JSON), the previous
+schema stays in use and the error is shown on /health and /metrics.
+
+    python server.py --port 8765
+    python main.py serve --port 8765 --workers 4
+    curl -s localhost:8765/translate -d '{"prompt": "list all users"}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from batch import translate_one
+from dialects import DEFAULT_DIALECT, DIALECTS
+from schema import SchemaConfig
+
+BASE_DIR = Path(__file__).resolve().parent
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH = 10_000
+# Latency samples kept per endpoint for the percentiles on /metrics
+LATENCY_WINDOW = 10_000
+PERCENTILES = (50, 90, 95, 99)
+
+Stamp = Tuple[str, int]
+
+
+# ---------- Schema (main process and pool workers) ----------
+
+def schema_stamp(path: str | Path) -> Stamp:
+    return str(path), os.stat(path).st_mtime_ns
+
+
+class WarmSchema:
+    """A SchemaConfig that reloads itself when its file's mtime changes."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.stamp = schema_stamp(self.path)
+        self.schema = SchemaConfig(self.path)
+        self.reloads = 0
+        self.reload_error: Optional[str] = None
+
+    def current(self) -> Tuple[SchemaConfig, Stamp]:
+        """The live schema and its stamp, reloading first if the file changed."""
+        try:
+            stamp = schema_stamp(self.path)
+        except OSError as e:
+            self.reload_error = str(e)
+            return self.schema, self.stamp
+        if stamp != self.stamp:
+            try:
+                self.schema = SchemaConfig(self.path)
+            except Exception as e:
+                # Keep serving the last good schema; try again on the next mtime change
+                self.reload_error = f"{type(e).__name__}: {e}"
+                print(f"[server] schema reload failed, keeping previous: {self.reload_error}", file=sys.stderr)
+            else:
+                self.reloads += 1
+                self.reload_error = None
+                print(f"[server] reloaded {self.path}", file=sys.stderr)
+            self.stamp = stamp
+        return self.schema, self.stamp
+
+
+# Per worker process: the stamp and schema it last loaded
+_WORKER: Dict[str, Any] = {"stamp": None, "schema": None}
+
+
+def _init_worker(stamp: Stamp) -> None:
+    _WORKER["stamp"], _WORKER["schema"] = stamp, SchemaConfig(stamp[0])
+
+
+def _worker_schema(stamp: Stamp) -> SchemaConfig:
+    if _WORKER["stamp"] != stamp:
+        try:
+            _WORKER["schema"] = SchemaConfig(stamp[0])
+        except Exception:
+            if _WORKER["schema"] is None:
+                raise
+            # Same fallback as WarmSchema: the file is mid-edit, keep the old one
+        _WORKER["stamp"] = stamp
+    return _WORKER["schema"]
+
+
+def _translate_chunk(prompts: List[str], dialect: str, stamp: Stamp) -> List[Dict[str, Any]]:
+    schema = _worker_schema(stamp)
+    return [translate_one(p, schema, dialect) for p in prompts]
+
+
+# ---------- Metrics ----------
+
+class LatencyStats:
+    """Request count, error count and a sliding window of latencies for one endpoint."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.count = 0
+        self.errors = 0
+        self.items = 0
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool, items: int = 1) -> None:
+        self.count += 1
+        self.items += items
+        if not ok:
+            self.errors += 1
+        self._samples.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        out: Dict[str, Any] = {"count": self.count, "errors": self.errors, "items": self.items}
+        if samples:
+            for p in PERCENTILES:
+                # Nearest-rank percentile
+                rank = max(0, -(-p * len(samples) // 100) - 1)
+                out[f"p{p}_ms"] = round(samples[rank] * 1000, 3)
+            out["max_ms"] = round(samples[-1] * 1000, 3)
+            out["mean_ms"] = round(sum(samples) / len(samples) * 1000, 3)
+        return out
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- Service ----------
+
+class TranslationService:
+    """
+    The request handlers, independent of the socket layer: handle() takes a
+    parsed request and returns (status, JSON payload), so it can be driven
+    directly from a test or a notebook.
+    """
+
+    def __init__(self, schema_path: str | Path, workers: Optional[int] = None, chunksize: int = 64):
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+        self.warm = WarmSchema(schema_path)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunksize = chunksize
+        self.started = time.time()
+        self.metrics: Dict[str, LatencyStats] = {}
+        self._pool: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.warm.stamp,)
+            )
+        else:
+            # Worker state lives in this process; the main thread's WarmSchema is separate
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-builder-translate")
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        url = urlsplit(target)
+        route = url.path.rstrip("/") or "/"
+        started = time.perf_counter()
+        status, payload, items = HTTPStatus.OK, {}, 1
+        try:
+            if route == "/translate":
+                status, payload = await self._translate(method, url.query, body)
+            elif route == "/translate/batch":
+                status, payload = await self._translate_batch(method, body)
+                items = len(payload["results"])
+            elif route == "/metrics":
+                _require(method, "GET")
+                payload = self.metrics_snapshot()
+            elif route == "/health":
+                _require(method, "GET")
+                payload = self.health()
+            else:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"no route {url.path!r}")
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        if route in ("/translate", "/translate/batch"):
+            stats = self.metrics.setdefault(route, LatencyStats())
+            stats.record(time.perf_counter() - started, status == HTTPStatus.OK, items)
+        return status, payload
+
+    async def _translate(self, method: str, query: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        if method == "GET":
+            params = {k: v[-1] for k, v in parse_qs(query).items()}
+        else:
+            _require(method, "POST")
+            params = _json_object(body)
+        prompt = params.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'prompt' must be a non-empty string")
+        [result] = await self._run([prompt], _dialect(params))
+        # A prompt the parser rejects is the client's problem, not the server's
+        return (HTTPStatus.OK if result["error"] is None else HTTPStatus.UNPROCESSABLE_ENTITY), result
+
+    async def _translate_batch(self, method: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        _require(method, "POST")
+        params = _json_object(body)
+        prompts = params.get("prompts")
+        if not isinstance(prompts, list) or not all(isinstance(p, str) for p in prompts):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'prompts' must be a list of strings")
+        if len(prompts) > MAX_BATCH:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_BATCH} prompts per batch")
+        results = await self._run(prompts, _dialect(params))
+        errors = sum(1 for r in results if r["error"] is not None)
+        return HTTPStatus.OK, {"results": results, "errors": errors}
+
+    async def _run(self, prompts: List[str], dialect: str) -> List[Dict[str, Any]]:
+        """Translate in the pool, one task per chunk so a batch spreads over every worker."""
+        if not prompts:
+            return []
+        if self._pool is None:
+            raise RuntimeError("service not started")
+        _, stamp = self.warm.current()
+        loop = asyncio.get_running_loop()
+        chunks = [prompts[i:i + self.chunksize] for i in range(0, len(prompts), self.chunksize)]
+        done = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _translate_chunk, chunk, dialect, stamp) for chunk in chunks
+        ))
+        return [result for chunk in done for result in chunk]
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "workers": self.workers,
+            "schema_reloads": self.warm.reloads,
+            "schema_reload_error": self.warm.reload_error,
+            "endpoints": {route: stats.snapshot() for route, stats in sorted(self.metrics.items())},
+        }
+
+    def health(self) -> Dict[str, Any]:
+        schema, _ = self.warm.current()
+        return {
+            "status": "ok",
+            "schema": str(schema.path),
+            "schema_version": schema.version,
+            "schema_reload_error": self.warm.reload_error,
+            "entities": schema.entities(),
+            "dialects": sorted(DIALECTS),
+        }
+
+
+def _require(method: str, allowed: str) -> None:
+    if method != allowed:
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"use {allowed}")
+
+
+def _json_object(body: bytes) -> Dict[str, Any]:
+    try:
+        obj = json.loads(body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON body: {e}")
+    if not isinstance(obj, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "JSON body must be an object")
+    return obj
+
+
+def _dialect(params: Dict[str, Any]) -> str:
+    dialect = params.get("dialect") or DEFAULT_DIALECT
+    if dialect not in DIALECTS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"unknown dialect {dialect!r}; choose from {sorted(DIALECTS)}")
+    return dialect
+
+
+# ---------- HTTP/1.1 over asyncio streams ----------
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """One request from a keep-alive connection; None when the client has gone."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "send a Content-Length body")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status: HTTPStatus, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _serve_connection(service: TranslationService, reader, writer) -> None:
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except HTTPError as e:
+                writer.write(_response(e.status, {"error": str(e)}, keep_alive=False))
+                await writer.drain()
+                return
+            except asyncio.IncompleteReadError:
+                return
+            if request is None:
+                return
+            method, target, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            status, payload = await service.handle(method, target, body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.CancelledError):
+        pass   # client went away, or the server is shutting down
+    finally:
+        writer.close()
+
+
+async def start_server(service: TranslationService, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+    """Start the pool and listen; port=0 picks a free port (see server.sockets)."""
+    service.start()
+    return await asyncio.start_server(
+        lambda r, w: _serve_connection(service, r, w), host, port, limit=64 * 1024
+    )
+
+
+async def _serve_forever(service: TranslationService, host: str, port: int) -> None:
+    server = await start_server(service, host, port)
+    bound = server.sockets[0].getsockname()
+    print(f"Serving {service.warm.path.name} on http://{bound[0]}:{bound[1]} "
+          f"with {service.workers} worker(s)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="sql_builder serve",
+        description="HTTP service for NL -> SQL translation with a warm, hot-reloaded schema.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--schema", type=Path, default=BASE_DIR / "schema_config.json")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="translation processes (default: CPU count; 0 = one thread in this process)")
+    parser.add_argument("--chunksize", type=int, default=64, help="prompts per pool task in a batch")
+    args = parser.parse_args(argv)
+
+    service = TranslationService(args.schema, workers=args.workers, chunksize=args.chunksize)
+    try:
+        asyncio.run(_serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
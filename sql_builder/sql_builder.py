@@ -1,15 +1,11 @@
 # sql_builder.py
-from typing import List
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from query_intent import QueryIntent, FilterIntent, SortIntent
 from schema import SchemaConfig
-
-
-def _quote_ident(name: str) -> str:
-    """
-    Simple identifier quoting. Works for many SQL dialects (Postgres-style).
-    """
-    return f'"{name}"'
+from dialects import Dialect, DEFAULT_DIALECT, get_dialect
 
 
 def _escape_literal(value: str) -> str:
@@ -24,137 +20,344 @@ def _format_literal(value: str) -> str:
     return f"'{_escape_literal(value)}'"
 
 
-def _field_expr(field: str) -> str:
-    """
-    Build the SQL expression for a "field":
-    - "__count__" => COUNT(*)
-    - "expr:..."  => raw SQL expression after "expr:"
-    - anything else => quoted identifier
-    """
-    if field == "__count__":
-        return "COUNT(*)"
-    if field.startswith("expr:"):
-        return field[len("expr:") :]
-    return _quote_ident(field)
+# ---------- Parameter binding ----------
 
+# Placeholder styles for parameterized output:
+#   "qmark"  → ?        (sqlite3, duckdb)
+#   "format" → %s       (psycopg2 / psycopg)
+#   "dollar" → $1, $2   (asyncpg, server-side PREPARE)
+PARAMSTYLES = ("qmark", "format", "dollar")
+# build_sql_params's placeholder style when neither it nor a dialect is given
+DEFAULT_PARAMSTYLE = "qmark"
 
-def _build_condition(f: FilterIntent) -> str:
-    """
-    Build a single condition string from a FilterIntent.
-    Supports:
-      =, !=, >, <, >=, <=, LIKE,
-      IN (list),
-      BETWEEN (range).
-    """
-    op = f.operator.upper()
-    expr = _field_expr(f.field)
-
-    # BETWEEN
-    if op == "BETWEEN":
-        # value can be a tuple (start, end) or list of length 2
-        if isinstance(f.value, (tuple, list)) and len(f.value) == 2:
-            v1, v2 = f.value
-            return (
-                f"{expr} BETWEEN "
-                f"{_format_literal(str(v1))} AND {_format_literal(str(v2))}"
+# IN lists are padded up to the next bucket size so prompts with 3 or 4
+# values share one template. Padding repeats the last value, which doesn't
+# change the result of an IN test.
+IN_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _ParamBinder:
+    """Collects bound values and hands out placeholders in a driver's style."""
+
+    def __init__(self, paramstyle: str):
+        if paramstyle not in PARAMSTYLES:
+            raise ValueError(
+                f"Unknown paramstyle '{paramstyle}'; expected one of {', '.join(PARAMSTYLES)}"
             )
-        else:
-            # fallback: treat as raw text after BETWEEN
-            return f"{expr} BETWEEN {str(f.value)}"
-
-    # IN
-    if op == "IN":
-        # value can be list/tuple or comma-separated string
-        if isinstance(f.value, (list, tuple)):
-            items = ", ".join(_format_literal(str(v)) for v in f.value)
-        else:
-            parts = [p.strip() for p in str(f.value).split(",") if p.strip()]
-            items = ", ".join(_format_literal(p) for p in parts)
-        return f"{expr} IN ({items})"
+        self.paramstyle = paramstyle
+        self.params: List[Any] = []
 
-    # Simple comparison operators and LIKE
-    return f"{expr} {op} {_format_literal(str(f.value))}"
+    def bind(self, value: Any) -> str:
+        self.params.append(value)
+        if self.paramstyle == "qmark":
+            return "?"
+        if self.paramstyle == "format":
+            return "%s"
+        return f"${len(self.params)}"
 
 
-def _build_filter_clause(
-    filters: List[FilterIntent],
-    clause_name: str,
-) -> str:
-    """
-    Build a WHERE or HAVING clause from a list of FilterIntent objects.
-    Respects each filter's logical operator (AND/OR).
-    clause_name: "WHERE" or "HAVING"
-    """
-    if not filters:
-        return ""
-    parts: List[str] = []
-
-    for idx, f in enumerate(filters):
-        cond = _build_condition(f)
-        if idx == 0:
-            parts.append(cond)
-        else:
-            parts.append(f"{f.logical} {cond}")
+def _bucketed(values: List[str]) -> List[str]:
+    for size in IN_BUCKETS:
+        if len(values) <= size:
+            return values + [values[-1]] * (size - len(values))
+    return values
 
-    return f"{clause_name} " + " ".join(parts)
 
+def _literal(value: str, binder: Optional[_ParamBinder]) -> str:
+    """Inline a quoted literal, or bind it as a parameter when a binder is given."""
+    if binder is None:
+        return _format_literal(value)
+    return binder.bind(value)
 
-def _build_group_by(group_by: List[str]) -> str:
-    if not group_by:
-        return ""
-    cols = ", ".join(_quote_ident(c) for c in group_by)
-    return f"GROUP BY {cols}"
 
+# ---------- Compiler ----------
 
-def _build_order_by(sort: List[SortIntent]) -> str:
-    if not sort:
-        return ""
-    parts = [f"{_quote_ident(s.field)} {s.direction.upper()}" for s in sort]
-    return "ORDER BY " + ", ".join(parts)
+# Entries per SQLCompiler fragment cache (quoted identifiers, SELECT lists)
+FRAGMENT_CACHE_SIZE = 4096
 
 
-def build_sql(intent: QueryIntent, schema: SchemaConfig) -> str:
+class SQLCompiler:
+    """
+    Compiles QueryIntents for one schema in one dialect.
+
+    Fragments that only depend on the schema/dialect (quoted identifiers,
+    FROM clauses per entity, SELECT lists) are cached on the compiler, so a
+    batch of intents doesn't re-quote the same names string-by-string.
+    Identifiers and SELECT lists come from prompts, so those two caches are
+    LRUs of at most `fragment_cache_size` entries each; FROM clauses are
+    bounded by the number of entities.
+    Get instances through compiler_for() to share them per schema.
+    """
+
+    def __init__(
+        self,
+        schema: SchemaConfig,
+        dialect: "str | Dialect" = DEFAULT_DIALECT,
+        fragment_cache_size: int = FRAGMENT_CACHE_SIZE,
+    ):
+        if fragment_cache_size < 1:
+            raise ValueError("fragment_cache_size must be at least 1")
+        self.schema = schema
+        self.dialect = get_dialect(dialect)
+        self.fragment_cache_size = fragment_cache_size
+        self._idents: "OrderedDict[str, str]" = OrderedDict()
+        self._from_clauses: Dict[str, str] = {}
+        self._select_lists: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+
+    # --- cached fragments ---
+
+    def _remember(self, cache: OrderedDict, key, value: str) -> None:
+        cache[key] = value
+        if len(cache) > self.fragment_cache_size:
+            cache.popitem(last=False)
+
+    def quote_ident(self, name: str) -> str:
+        quoted = self._idents.get(name)
+        if quoted is None:
+            quoted = self.dialect.quote_ident(name)
+            self._remember(self._idents, name, quoted)
+        else:
+            self._idents.move_to_end(name)
+        return quoted
+
+    def _from_clause(self, entity: str) -> str:
+        clause = self._from_clauses.get(entity)
+        if clause is None:
+            table_name = self.schema.get_table_for_entity(entity)
+            if not table_name:
+                raise ValueError(f"No table configured for entity '{entity}'")
+            clause = f"FROM {self.quote_ident(table_name)}"
+            self._from_clauses[entity] = clause
+        return clause
+
+    def _select_list(self, fields) -> str:
+        key = tuple(fields)
+        select_expr = self._select_lists.get(key)
+        if select_expr is None:
+            if not key:
+                select_expr = "*"
+            else:
+                select_expr = ", ".join(self.quote_ident(f) for f in key)
+            self._remember(self._select_lists, key, select_expr)
+        else:
+            self._select_lists.move_to_end(key)
+        return select_expr
+
+    # --- clauses ---
+
+    def _field_expr(self, field: str) -> str:
+        """
+        Build the SQL expression for a "field":
+        - "__count__" => COUNT(*)
+        - "expr:..."  => raw SQL expression after "expr:"
+        - anything else => quoted identifier
+        """
+        if field == "__count__":
+            return "COUNT(*)"
+        if field.startswith("expr:"):
+            return field[len("expr:") :]
+        return self.quote_ident(field)
+
+    def _build_condition(self, f: FilterIntent, binder: Optional[_ParamBinder] = None) -> str:
+        """
+        Build a single condition string from a FilterIntent.
+        Supports:
+          =, !=, >, <, >=, <=, LIKE,
+          IN (list),
+          BETWEEN (range).
+        With a binder, values become placeholders instead of inline literals.
+        """
+        op = f.operator.upper()
+        expr = self._field_expr(f.field)
+
+        # BETWEEN
+        if op == "BETWEEN":
+            # value can be a tuple (start, end) or list of length 2
+            if isinstance(f.value, (tuple, list)) and len(f.value) == 2:
+                v1, v2 = f.value
+                return (
+                    f"{expr} BETWEEN "
+                    f"{_literal(str(v1), binder)} AND {_literal(str(v2), binder)}"
+                )
+            else:
+                # fallback: treat as raw text after BETWEEN
+                return f"{expr} BETWEEN {str(f.value)}"
+
+        # IN
+        if op == "IN":
+            # value can be list/tuple or comma-separated string
+            if isinstance(f.value, (list, tuple)):
+                values = [str(v) for v in f.value]
+            else:
+                values = [p.strip() for p in str(f.value).split(",") if p.strip()]
+            if binder is not None and values:
+                values = _bucketed(values)
+            items = ", ".join(_literal(v, binder) for v in values)
+            return f"{expr} IN ({items})"
+
+        # COUNT(*) thresholds as integers where the dialect needs it, and
+        # always when bound: a parameter has no dialect, and sqlite3 never
+        # converts a bound '3' (see SQLiteDialect)
+        if (
+            f.field == "__count__"
+            and (binder is not None or self.dialect.numeric_count_literals)
+            and str(f.value).isdigit()
+        ):
+            count = int(f.value)
+            return f"{expr} {op} {count if binder is None else binder.bind(count)}"
+
+        # Simple comparison operators and LIKE
+        return f"{expr} {op} {_literal(str(f.value), binder)}"
+
+    def _build_filter_clause(
+        self,
+        filters: List[FilterIntent],
+        clause_name: str,
+        binder: Optional[_ParamBinder] = None,
+    ) -> str:
+        """
+        Build a WHERE or HAVING clause from a list of FilterIntent objects.
+        Respects each filter's logical operator (AND/OR).
+        clause_name: "WHERE" or "HAVING"
+        """
+        if not filters:
+            return ""
+        parts: List[str] = []
+
+        for idx, f in enumerate(filters):
+            cond = self._build_condition(f, binder)
+            if idx == 0:
+                parts.append(cond)
+            else:
+                parts.append(f"{f.logical} {cond}")
+
+        return f"{clause_name} " + " ".join(parts)
+
+    def _build_group_by(self, group_by: List[str]) -> str:
+        if not group_by:
+            return ""
+        cols = ", ".join(self.quote_ident(c) for c in group_by)
+        return f"GROUP BY {cols}"
+
+    def _build_order_by(self, sort: List[SortIntent]) -> str:
+        if not sort:
+            return ""
+        parts = [f"{self.quote_ident(s.field)} {s.direction.upper()}" for s in sort]
+        return "ORDER BY " + ", ".join(parts)
+
+    # --- statements ---
+
+    def compile(self, intent: QueryIntent, binder: Optional[_ParamBinder] = None) -> str:
+        distinct_str = "DISTINCT " if intent.distinct else ""
+
+        parts: List[str] = []
+        parts.append(f"SELECT {distinct_str}{self._select_list(intent.fields)}")
+        parts.append(self._from_clause(intent.entity))
+
+        # WHERE
+        where_clause = self._build_filter_clause(intent.filters, "WHERE", binder)
+        if where_clause:
+            parts.append(where_clause)
+
+        # GROUP BY / HAVING
+        group_by_clause = self._build_group_by(intent.group_by)
+        if group_by_clause:
+            parts.append(group_by_clause)
+
+        having_clause = self._build_filter_clause(intent.having, "HAVING", binder)
+        if having_clause:
+            parts.append(having_clause)
+
+        # ORDER BY
+        order_by_clause = self._build_order_by(intent.sort)
+        if order_by_clause:
+            parts.append(order_by_clause)
+
+        # LIMIT
+        if intent.limit is not None:
+            if binder is None:
+                parts.append(self.dialect.limit_clause(str(intent.limit)))
+            else:
+                parts.append(self.dialect.limit_clause(binder.bind(int(intent.limit))))
+
+        return "\n".join(parts) + ";"
+
+    def compile_params(
+        self,
+        intent: QueryIntent,
+        paramstyle: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        binder = _ParamBinder(paramstyle or self.dialect.paramstyle)
+        sql = self.compile(intent, binder)
+        return sql, binder.params
+
+
+# One compiler per (schema, dialect); dropped automatically with the schema
+_COMPILERS: "weakref.WeakKeyDictionary[SchemaConfig, Dict[str, SQLCompiler]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def compiler_for(schema: SchemaConfig, dialect: "str | Dialect" = DEFAULT_DIALECT) -> SQLCompiler:
+    """Shared, fragment-caching compiler for a schema and dialect."""
+    resolved = get_dialect(dialect)
+    per_schema = _COMPILERS.setdefault(schema, {})
+    compiler = per_schema.get(resolved.name)
+    if compiler is None:
+        compiler = SQLCompiler(schema, resolved)
+        per_schema[resolved.name] = compiler
+    return compiler
+
+
+# ---------- Public API ----------
+
+def build_sql(
+    intent: QueryIntent,
+    schema: SchemaConfig,
+    dialect: "str | Dialect" = DEFAULT_DIALECT,
+) -> str:
     """
     Convert a QueryIntent into a SQL SELECT statement string using the
     configured schema to map entities → tables.
+    dialect: "postgres" (default), "sqlite" or "duckdb".
+    """
+    return compiler_for(schema, dialect).compile(intent)
+
+
+def build_sql_params(
+    intent: QueryIntent,
+    schema: SchemaConfig,
+    paramstyle: Optional[str] = None,
+    dialect: "str | Dialect | None" = None,
+) -> Tuple[str, List[Any]]:
+    """
+    Like build_sql, but returns (sql_template, params) with every value
+    (filters, HAVING, LIMIT) bound as a placeholder in the given paramstyle.
+    Without a dialect the paramstyle defaults to "qmark", as it always has;
+    with one, to that dialect's usual style ("format" for postgres).
+    Prompts that differ only in values produce the same template, so the
+    database can reuse one prepared statement/plan for all of them.
+    """
+    if dialect is None:
+        dialect, paramstyle = DEFAULT_DIALECT, paramstyle or DEFAULT_PARAMSTYLE
+    return compiler_for(schema, dialect).compile_params(intent, paramstyle)
+
+
+def compile_many(
+    intents: Iterable[QueryIntent],
+    schema: SchemaConfig,
+    dialect: "str | Dialect | None" = None,
+    params: bool = False,
+    paramstyle: Optional[str] = None,
+) -> List:
+    """
+    Compile a batch of intents with one shared compiler (and its fragment
+    caches). Returns SQL strings, or (template, params) pairs if params=True,
+    with the same paramstyle default as build_sql_params.
     """
-    table_name = schema.get_table_for_entity(intent.entity)
-    if not table_name:
-        raise ValueError(f"No table configured for entity '{intent.entity}'")
-
-    # SELECT clause
-    if not intent.fields:
-        select_expr = "*"
-    else:
-        select_expr = ", ".join(_quote_ident(f) for f in intent.fields)
-
-    distinct_str = "DISTINCT " if intent.distinct else ""
-
-    parts: List[str] = []
-    parts.append(f"SELECT {distinct_str}{select_expr}")
-    parts.append(f"FROM {_quote_ident(table_name)}")
-
-    # WHERE
-    where_clause = _build_filter_clause(intent.filters, "WHERE")
-    if where_clause:
-        parts.append(where_clause)
-
-    # GROUP BY / HAVING
-    group_by_clause = _build_group_by(intent.group_by)
-    if group_by_clause:
-        parts.append(group_by_clause)
-
-    having_clause = _build_filter_clause(intent.having, "HAVING")
-    if having_clause:
-        parts.append(having_clause)
-
-    # ORDER BY
-    order_by_clause = _build_order_by(intent.sort)
-    if order_by_clause:
-        parts.append(order_by_clause)
-
-    # LIMIT
-    if intent.limit is not None:
-        parts.append(f"LIMIT {intent.limit}")
-
-    return "\n".join(parts) + ";"
+    if dialect is None:
+        dialect, paramstyle = DEFAULT_DIALECT, paramstyle or DEFAULT_PARAMSTYLE
+    compiler = compiler_for(schema, dialect)
+    if params:
+        return [compiler.compile_params(intent, paramstyle) for intent in intents]
+    return [compiler.compile(intent) for intent in intents]